@@ -1,4 +1,5 @@
 import os
+import sys
 from pathlib import Path
 
 from environs import Env
@@ -9,6 +10,9 @@ env.read_env()
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Running under `manage.py test`
+TESTING = sys.argv[1:2] == ["test"]
+
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/dev/howto/deployment/checklist/
 
@@ -48,7 +52,6 @@ INSTALLED_APPS = [
     "allauth.account",
     "crispy_forms",
     "crispy_bootstrap5",
-    "debug_toolbar",
     "anymail",
     "markdownx",
     # Local
@@ -60,18 +63,28 @@ INSTALLED_APPS = [
 # https://docs.djangoproject.com/en/dev/ref/settings/#middleware
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "pool.middleware.RequestTimingMiddleware",  # Query/timing instrumentation
+    "pool.middleware.PrimaryStickyMiddleware",  # Read-your-writes with a replica
     "whitenoise.middleware.WhiteNoiseMiddleware",  # WhiteNoise
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
-    "debug_toolbar.middleware.DebugToolbarMiddleware",  # Django Debug Toolbar
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "pool.middleware.ProfilerMiddleware",  # ?_profile=1 for superusers
     # "pool.middleware.SiteMaintenanceMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "allauth.account.middleware.AccountMiddleware",  # django-allauth
 ]
 
+# Django Debug Toolbar, only with DEBUG: importing it (and the django.test
+# machinery it pulls in) is a large share of a production cold start
+if DEBUG:
+    INSTALLED_APPS.append("debug_toolbar")
+    MIDDLEWARE.insert(
+        MIDDLEWARE.index("django.middleware.common.CommonMiddleware") + 1,
+        "debug_toolbar.middleware.DebugToolbarMiddleware")
+
 # https://docs.djangoproject.com/en/dev/ref/settings/#root-urlconf
 ROOT_URLCONF = "django_project.urls"
 
@@ -100,6 +113,72 @@ TEMPLATES = [
 DATABASES = {
     "default": env.dj_db_url("DATABASE_URL", default="sqlite:///db.sqlite3"),
 }
+# Optional read replica for the pool's read-heavy pages; see
+# pool/routers.py. Locally, point it at a second SQLite file and copy the
+# primary into it with `manage.py sync_replica`.
+if env.str("DATABASE_REPLICA_URL", default=""):
+    DATABASES["replica"] = env.dj_db_url("DATABASE_REPLICA_URL")
+    DATABASES["replica"]["TEST"] = {"MIRROR": "default"}
+elif TESTING:
+    # A second connection to the test database for the routing tests, which
+    # switch reads to it with POOL_READ_REPLICA
+    DATABASES["replica"] = {**DATABASES["default"],
+                            "TEST": {"MIRROR": "default"}}
+# Send reads to the replica; set False to keep a configured replica idle
+POOL_READ_REPLICA = env.bool(
+    "POOL_READ_REPLICA",
+    default=bool(env.str("DATABASE_REPLICA_URL", default="")))
+DATABASE_ROUTERS = ["pool.routers.PrimaryReplicaRouter"]
+# Seconds a user's reads stay on the primary after they write
+POOL_REPLICA_STICKY_SECONDS = env.int("POOL_REPLICA_STICKY_SECONDS", default=10)
+
+# Applied to every new SQLite connection unless SQLITE_TUNED=False. WAL
+# lets reads carry on while scores are being written; compare with
+# `manage.py benchmark_sqlite`.
+SQLITE_PRAGMAS = {
+    "busy_timeout": env.int("SQLITE_BUSY_TIMEOUT_MS", default=5000),
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",  # safe with WAL; fsync at checkpoints only
+    "mmap_size": env.int("SQLITE_MMAP_SIZE", default=128 * 1024 * 1024),
+    "cache_size": -env.int("SQLITE_CACHE_KB", default=32 * 1024),
+    "temp_store": "MEMORY",
+}
+for database in DATABASES.values():
+    if database["ENGINE"] == "django.db.backends.sqlite3":
+        sqlite_options = database.setdefault("OPTIONS", {})
+        # Take the write lock when a transaction starts, so concurrent
+        # writers queue on the busy timeout instead of failing with
+        # "database is locked"
+        sqlite_options["transaction_mode"] = "IMMEDIATE"
+        # Tests use a file as well: an in-memory database's shared cache
+        # fails concurrent writers with "database table is locked" at once
+        # instead of letting them wait out the busy timeout
+        database.setdefault("TEST", {}).setdefault(
+            "NAME", str(BASE_DIR / "test_db.sqlite3"))
+        if env.bool("SQLITE_TUNED", default=True):
+            sqlite_options["init_command"] = ";".join(
+                f"PRAGMA {name}={value}"
+                for name, value in SQLITE_PRAGMAS.items())
+            # Keep connections (and their page cache) between requests
+            database["CONN_MAX_AGE"] = env.int(
+                "SQLITE_CONN_MAX_AGE", default=600)
+    elif database["ENGINE"] == "django.db.backends.postgresql":
+        if env.bool("DB_POOL", default=True):
+            # psycopg 3 pool per worker process; Django requires
+            # CONN_MAX_AGE=0 with it, connections go back to the pool at
+            # the end of a request
+            database.setdefault("OPTIONS", {})["pool"] = {
+                "min_size": env.int("DB_POOL_MIN_SIZE", default=2),
+                "max_size": env.int("DB_POOL_MAX_SIZE", default=10),
+                # Seconds a request waits for a free connection before failing
+                "timeout": env.float("DB_POOL_TIMEOUT", default=10.0),
+            }
+            database["CONN_MAX_AGE"] = 0
+        else:
+            # Persistent connection per worker thread, pinged before reuse
+            database["CONN_MAX_AGE"] = env.int("CONN_MAX_AGE", default=600)
+            database["CONN_HEALTH_CHECKS"] = True
+# Compare modes with `manage.py benchmark_requests`.
 
 # For Docker/PostgreSQL usage uncomment this and comment the DATABASES config above
 # DATABASES = {
@@ -237,3 +316,95 @@ ACCOUNT_SIGNUP_FORM_CLASS = 'accounts.signup_forms.CustomSignupForm'
 
 # Change to False to allow picks outside pick window
 ENFORCE_PICK_WINDOW = True
+
+# Per-request query and timing instrumentation (pool.middleware.RequestTimingMiddleware)
+# Requests over any budget are logged at WARNING with an "over_budget" key.
+POOL_REQUEST_TIMING = env.bool("POOL_REQUEST_TIMING", default=True)
+POOL_REQUEST_BUDGETS = {
+    "total_ms": env.int("POOL_BUDGET_TOTAL_MS", default=500),
+    "db_ms": env.int("POOL_BUDGET_DB_MS", default=200),
+    "queries": env.int("POOL_BUDGET_QUERIES", default=50),
+}
+
+# On-demand cProfile runs (pool.middleware.ProfilerMiddleware)
+POOL_PROFILE_KEEP = env.int("POOL_PROFILE_KEEP", default=50)
+POOL_PROFILE_TOP_N = env.int("POOL_PROFILE_TOP_N", default=40)
+
+# Queries slower than this are saved with their EXPLAIN plan (pool.slow_queries).
+# Set POOL_SLOW_QUERY_MS=0 to switch the logger off.
+POOL_SLOW_QUERY_MS = env.float("POOL_SLOW_QUERY_MS", default=100) or None
+
+# How the standings and summaries read picks (pool.scoring): "snapshot"
+# (per-process copy of the season, pool.snapshot), "rows" (Pick),
+# "bitmask" (PickSheet) or "numpy"
+POOL_SCORING_BACKEND = env.str("POOL_SCORING_BACKEND", default="snapshot")
+# Seconds a worker trusts its snapshot before re-checking Season.data_version
+POOL_SNAPSHOT_MAX_AGE = env.float("POOL_SNAPSHOT_MAX_AGE", default=1.0)
+
+# How long past its data version a stored standings or week-summary result
+# (pool.models.WarmResult) may still be served while one background
+# recompute runs. 0 recomputes in the request instead.
+POOL_STALE_MAX_SECONDS = env.float("POOL_STALE_MAX_SECONDS", default=30.0)
+
+# Missing-picks reminders (pool.reminders): sent this many hours before a
+# week's picks close (0 for no scheduled reminders), linking to POOL_SITE_URL
+POOL_REMINDER_LEAD_HOURS = env.float("POOL_REMINDER_LEAD_HOURS", default=24)
+POOL_SITE_URL = env.str("POOL_SITE_URL", default="").rstrip("/")
+
+# Recap emails (pool.mailing, `manage.py send_recap_email`) go out one
+# message per recipient in batches of this size, each over one connection
+# and saved as it finishes, with an optional pause between batches for the
+# provider's rate limit
+POOL_EMAIL_BATCH_SIZE = env.int("POOL_EMAIL_BATCH_SIZE", default=50)
+POOL_EMAIL_BATCH_PAUSE_SECONDS = env.float("POOL_EMAIL_BATCH_PAUSE_SECONDS",
+                                           default=0.0)
+
+# Where queued jobs (pool.jobs) run. "inline": a thread in the web process
+# that queued them, next to the week scheduler (pool.scheduler), so
+# scaled-to-zero machines need nothing else. "worker":
+# `manage.py run_pool_worker`, which finds the jobs through the database
+# and so must share the web's: PostgreSQL, or SQLite on the same machine.
+# Tests run jobs explicitly.
+POOL_JOB_RUNNER = env.str("POOL_JOB_RUNNER",
+                          default="worker" if TESTING else "inline")
+# A running job is handed to another worker once its heartbeat is this old,
+# and a failed attempt is retried after POOL_JOB_RETRY_SECONDS, doubling
+# each time, while the job has attempts left (pool.jobs.MAX_ATTEMPTS)
+POOL_JOB_LEASE_SECONDS = env.int("POOL_JOB_LEASE_SECONDS", default=60)
+POOL_JOB_RETRY_SECONDS = env.int("POOL_JOB_RETRY_SECONDS", default=30)
+
+# Week transitions fired by pool.scheduler (in each web process when jobs
+# run inline, else `manage.py run_scheduler`): how late a missed one may
+# still fire, and how often the windows are re-read
+POOL_SCHEDULER_CATCH_UP_SECONDS = env.int("POOL_SCHEDULER_CATCH_UP_SECONDS",
+                                          default=6 * 3600)
+POOL_SCHEDULER_RESYNC_SECONDS = env.int("POOL_SCHEDULER_RESYNC_SECONDS",
+                                        default=900)
+
+# Prime the caches when the WSGI application loads (pool.warmup), and the
+# import-time budget for loading it, checked by pool.tests.test_startup
+POOL_WARM_UP = env.bool("POOL_WARM_UP", default=True)
+POOL_STARTUP_BUDGET_MS = env.int("POOL_STARTUP_BUDGET_MS", default=2000)
+
+# Finished seasons frozen by `manage.py archive_season` (pool.archive)
+POOL_ARCHIVE_DIR = Path(env.str("POOL_ARCHIVE_DIR", default=str(BASE_DIR / "archives")))
+
+# https://docs.djangoproject.com/en/dev/topics/logging/
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {
+            "class": "logging.StreamHandler",
+        },
+    },
+    "loggers": {
+        # Quiet under `manage.py test` (assertLogs still sees every record);
+        # set POOL_LOG_LEVEL to watch a test run
+        "pool": {
+            "handlers": ["console"],
+            "level": env.str("POOL_LOG_LEVEL",
+                             default="CRITICAL" if TESTING else "INFO"),
+        },
+    },
+}
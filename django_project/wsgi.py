@@ -1,7 +1,14 @@
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "django_project.settings")
 
 application = get_wsgi_application()
+
+# Prime the caches before this worker (or, with gunicorn's preload_app, the
+# master it is forked from) starts taking requests
+if settings.POOL_WARM_UP:
+    from pool.warmup import warm_up
+    warm_up()
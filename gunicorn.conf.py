@@ -0,0 +1,11 @@
+# gunicorn.conf.py
+# Read by gunicorn from the working directory (/code in the image).
+import os
+
+bind = f":{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get("WEB_CONCURRENCY", "2"))
+
+# Load Django and warm the caches once in the master, then fork: after a
+# scale-to-zero start the workers come up ready and share the imported
+# modules' memory. GUNICORN_PRELOAD=0 loads the app in each worker instead.
+preload_app = os.environ.get("GUNICORN_PRELOAD", "1").lower() not in ("0", "false")
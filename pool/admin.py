@@ -1,61 +1,34 @@
 # pool/admin.py
 
-import re
-from io import StringIO
+import os
 
-import markdown
 from django import forms
 from django.conf import settings
 from django.contrib import admin, messages
 from django.contrib.auth import get_user_model
-from django.core.mail import send_mail
-from django.core.mail import EmailMultiAlternatives
-from django.core.management import call_command
+from django.core.exceptions import PermissionDenied
 from django.http import JsonResponse
 from django.shortcuts import redirect
+from django.template.response import TemplateResponse
 from django.urls import path
 from django.urls import reverse
+from django.utils.html import format_html
 from markdownx.admin import MarkdownxModelAdmin
 
-from .models import Team, Game, Pick, Score, PoolSettings, Email, WeeklyNote
+from .instrumentation import connection_stats, route_stats, warm_stats
+from .jobs import enqueue
+from .mailing import parse_markdown_email, recap_recipients
+from .models import (Team, Game, Pick, Score, PoolSettings, Email, WeeklyNote,
+                     RequestProfile, SlowQuery, Season, WeekWindow,
+                     WarmResult, PoolJob, ScheduleEvent, PickReminder,
+                     EmailDelivery)
+from .reminders import matrix, missing_picks
+from .snapshot import snapshot_stats
+from .utils import get_current_season, get_week_info
 
 User = get_user_model()
 
 
-def parse_markdown_email(md_text: str):
-    """
-    Parse a markdown email string into subject, plain text body, and HTML body.
-
-    Assumes the first line is "Subject: ..." or just the subject line.
-    """
-    lines = md_text.splitlines()
-
-    # Find first non-empty line for subject
-    subject = ""
-    body_lines = []
-    for i, line in enumerate(lines):
-        stripped = line.strip()
-        if stripped:
-            # This line is the subject
-            subject = stripped
-            # If it starts with 'Subject:', remove that
-            if subject.lower().startswith("subject:"):
-                subject = subject[len("subject:"):].strip()
-            # Everything after this line is the body
-            body_lines = lines[i + 1:]
-            break
-
-    body_md = "\n".join(body_lines).strip()
-
-    # Plain text version: remove Markdown formatting
-    body_text = re.sub(r'(\*\*|__|\*|~~|`|#)', '', body_md).strip()
-
-    # HTML version
-    body_html = markdown.markdown(body_md)
-
-    return subject, body_text, body_html
-
-
 class PoolAdmin(admin.AdminSite):
     site_header = 'NFL Pool Administration'
     site_title = 'NFL Pool Administration'
@@ -75,44 +48,110 @@ class PoolAdmin(admin.AdminSite):
             path("send_email/",
                  self.admin_view(self.send_email_view),
                  name="send_email", ),
+            path("request_metrics/",
+                 self.admin_view(self.request_metrics_view),
+                 name="request_metrics", ),
+            path("jobs/<int:job_id>/",
+                 self.admin_view(self.job_status_view),
+                 name="job_status", ),
+            path("missing_picks/",
+                 self.admin_view(self.missing_picks_view),
+                 name="missing_picks", ),
         ]
         return custom_urls + urls
 
+    def request_metrics_view(self, request):
+        """
+        Per-route timing percentiles collected by RequestTimingMiddleware,
+        and this worker's season snapshots, stored results and database
+        connections.
+        """
+        if not request.user.is_superuser:
+            raise PermissionDenied
+
+        if request.method == "POST" and "reset" in request.POST:
+            route_stats.reset()
+            warm_stats.reset()
+            messages.success(request, "Request metrics reset.")
+            return redirect("pooladmin:request_metrics")
+
+        context = {
+            **self.each_context(request),
+            "title": "Request metrics",
+            "rows": route_stats.summary(),
+            "snapshots": snapshot_stats(),
+            "connections": connection_stats(),
+            "warm_results": warm_stats.summary(),
+            "stale_max_seconds": settings.POOL_STALE_MAX_SECONDS,
+            "budgets": getattr(settings, "POOL_REQUEST_BUDGETS", {}),
+            "pid": os.getpid(),
+        }
+        return TemplateResponse(request, "admin/pool/request_metrics.html",
+                                context)
+
+    def missing_picks_view(self, request):
+        """
+        Who has not picked which of the week's games that are still open
+        (?week=, default this week), from the same query the reminder
+        emails use; POST queues the reminders for anyone not reminded yet.
+        """
+        season = get_current_season()
+        current = get_week_info()["week"]
+        week = request.GET.get("week", "")
+        week = int(week) if week.isdigit() else current
+
+        if request.method == "POST" and "remind" in request.POST:
+            steps = [["send_pick_reminders", {"week": week}]]
+            job = PoolJob.enqueue("pick_reminders", steps, user=request.user)
+            messages.success(request, f"Reminders queued as job {job.pk}.")
+            return redirect(
+                f"{reverse('pooladmin:missing_picks')}?week={week}")
+
+        games, rows = matrix(missing_picks(season, week)) if season else ([], [])
+        context = {
+            **self.each_context(request),
+            "title": f"Missing picks, week {week}",
+            "season": season,
+            "week": week,
+            "games": games,
+            "rows": rows,
+        }
+        return TemplateResponse(request, "admin/pool/missing_picks.html",
+                                context)
+
     def update_points_view(self, request):
-        """AJAX view to run the command and return JSON output."""
-        output = StringIO()
-        try:
-            call_command("update_points_earned", stdout=output)
-            status = "success"
-        except Exception as e:
-            output.write(str(e))
-            status = "error"
+        """AJAX view to queue the command; poll job_status for its output."""
+        return self.enqueue_job(request, "update_points")
+
+    def create_email_view(self, request):
+        """AJAX view to queue the command; poll job_status for its output."""
+        return self.enqueue_job(request, "create_email")
 
+    def enqueue_job(self, request, name):
+        job = enqueue(name, user=request.user)
         return JsonResponse({
-            "status": status,
-            "output": output.getvalue(),
+            **job.as_dict(),
+            "status_url": reverse("pooladmin:job_status", args=[job.pk]),
         })
 
-    def create_email_view(self, request):
-        """AJAX view to run the command and return JSON output."""
-        output = StringIO()
+    def job_status_view(self, request, job_id):
+        """AJAX view with a queued job's status, progress and output."""
         try:
-            call_command("create_email", stdout=output)
-            status = "success"
-
-        except Exception as e:
-            output.write(str(e))
-            status = "error"
-
-        raw_output = output.getvalue()
-        rendered_output = markdown.markdown(raw_output)
+            job = PoolJob.objects.get(pk=job_id)
+        except PoolJob.DoesNotExist:
+            return JsonResponse({"error": "No such job."}, status=404)
 
-        return JsonResponse({
-            "status": status,
-            "output": rendered_output,
-        })
+        data = job.as_dict()
+        if job.name == "create_email":
+            import markdown
+            data["output"] = markdown.markdown(job.output)
+        return JsonResponse(data)
 
     def send_email_view(self, request):
+        """
+        Queue the email for every active user (send_recap_email, run as a
+        pool.jobs job), so a long list does not hold up the request.
+        """
         email_id = request.GET.get("id")
         if not email_id:
             messages.error(request, "No email ID provided.")
@@ -120,43 +159,25 @@ class PoolAdmin(admin.AdminSite):
 
         try:
             email = Email.objects.get(pk=email_id)
-            subject, plain_text, html_text = parse_markdown_email(
-                email.email_text)
+        except (Email.DoesNotExist, ValueError):
+            messages.error(request, "Email not found.")
+            return redirect("admin:pool_email_changelist")
 
-            recipients = (
-                User.objects.filter(is_active=True)
-                .exclude(email="")
-                .values_list("email", flat=True)
-            )
+        subject = parse_markdown_email(email.email_text)[0]
+        job = PoolJob.enqueue(
+            "send_email", [["send_recap_email", {"email_id": email.pk}]],
+            user=request.user)
+        messages.success(request, format_html(
+            "Email '{}' queued for {} users as <a href=\"{}\">job {}</a>.",
+            subject, len(recap_recipients(email)),
+            reverse("pooladmin:pool_pooljob_change", args=[job.pk]), job.pk))
+        return redirect("admin:pool_email_changelist")
 
-            # for recipient in recipients:
-            #     send_mail(
-            #         subject=subject,
-            #         message=plain_text,
-            #         html_message=html_text,
-            #         from_email=settings.DEFAULT_FROM_EMAIL,
-            #         recipient_list=[recipient],
-            #         fail_silently=False,
-            #     )
-            msg = EmailMultiAlternatives(
-                subject=subject,
-                body=plain_text,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                to=[settings.DEFAULT_FROM_EMAIL],
-                cc=recipients,
-            )
-            msg.attach_alternative(html_text, "text/html")
-            msg.send()
 
-            messages.success(
-                request,
-                f"Email '{subject}' sent to {len(recipients)} users."
-            )
-            return redirect("admin:pool_email_changelist")
-
-        except Email.DoesNotExist:
-            messages.error(request, "Email not found.")
-            return redirect("admin:pool_email_changelist")
+@admin.register(Season)
+class SeasonAdmin(admin.ModelAdmin):
+    list_display = ("name", "year", "is_current", "is_archived")
+    list_editable = ("is_current",)
 
 
 @admin.register(Team)
@@ -184,8 +205,15 @@ class GameAdminForm(forms.ModelForm):
 @admin.register(Game)
 class GameAdmin(admin.ModelAdmin):
     form = GameAdminForm
-    list_display = ("home_team", "away_team", "week")
-    list_filter = ("week",)  # adds a sidebar filter for weeks
+    list_display = ("home_team", "away_team", "week", "season")
+    list_filter = ("season", "week")  # adds a sidebar filter for weeks
+
+
+@admin.register(WeekWindow)
+class WeekWindowAdmin(admin.ModelAdmin):
+    list_display = ("week", "season", "phase", "opens_at", "closes_at",
+                    "ends_at")
+    list_filter = ("season", "phase")
 
 
 @admin.register(Pick)
@@ -195,7 +223,7 @@ class PickAdmin(admin.ModelAdmin):
 
 @admin.register(Score)
 class ScoreAdmin(admin.ModelAdmin):
-    list_display = ("week", "points")
+    list_display = ("season", "week", "points")
 
 
 # @admin.register(PoolSettings)
@@ -249,9 +277,168 @@ class EmailAdmin(MarkdownxModelAdmin):
 
 @admin.register(WeeklyNote)
 class WeeklyNoteAdmin(MarkdownxModelAdmin):
-    list_display = ("week",)
+    list_display = ("week", "season")
+
+class RequestProfileAdmin(admin.ModelAdmin):
+    """Profiles captured by ProfilerMiddleware, newest first."""
+    list_display = ("created", "method", "path", "duration_ms", "user")
+    fields = ("created", "method", "path", "duration_ms", "user",
+              "top_functions")
+    readonly_fields = fields
+
+    def has_module_permission(self, request):
+        return request.user.is_superuser
+
+    def has_view_permission(self, request, obj=None):
+        return request.user.is_superuser
+
+    def has_delete_permission(self, request, obj=None):
+        return request.user.is_superuser
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    @admin.display(description="Top functions by cumulative time")
+    def top_functions(self, obj):
+        limit = getattr(settings, "POOL_PROFILE_TOP_N", 40)
+        return format_html("<pre>{}</pre>", obj.top_functions(limit))
+
+
+class SlowQueryAdmin(admin.ModelAdmin):
+    """Slow-query report, grouped by normalized SQL, worst total time first."""
+    list_display = ("short_sql", "count", "total_ms", "avg_ms_display",
+                    "max_ms", "full_scan", "source", "last_seen")
+    list_filter = ("vendor",)
+    search_fields = ("normalized_sql", "source")
+    fields = ("normalized_sql", "sample_sql", "plan", "vendor", "source",
+              "count", "total_ms", "max_ms", "first_seen", "last_seen")
+    readonly_fields = fields
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    @admin.display(description="SQL")
+    def short_sql(self, obj):
+        return obj.normalized_sql[:120]
+
+    @admin.display(description="Avg ms")
+    def avg_ms_display(self, obj):
+        return round(obj.avg_ms, 1)
+
+    @admin.display(description="Full scan", boolean=True)
+    def full_scan(self, obj):
+        return obj.full_scan
+
+    @admin.display(description="EXPLAIN")
+    def plan(self, obj):
+        return format_html("<pre>{}</pre>", obj.explain)
+
+
+class WarmResultAdmin(admin.ModelAdmin):
+    """Stored results from warm_pool_caches and the dashboard."""
+    list_display = ("name", "season", "data_version", "current",
+                    "compute_ms", "computed_at", "refreshing_since")
+    list_filter = ("season", "name")
+    fields = ("season", "name", "data_version", "result_format",
+              "compute_ms", "computed_at", "refreshing_since")
+    readonly_fields = fields
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    @admin.display(description="Current", boolean=True)
+    def current(self, obj):
+        return (obj.data_version == obj.season.data_version
+                and obj.result_format == WarmResult.RESULT_FORMAT)
+
+
+class PoolJobAdmin(admin.ModelAdmin):
+    """Jobs queued from the admin and the scheduler, run by pool.jobs."""
+    list_display = ("name", "status", "progress", "attempts", "created",
+                    "created_by", "finished_at", "worker")
+    list_filter = ("status", "name")
+    fields = ("name", "steps", "status", "progress", "progress_message",
+              "attempts", "max_attempts", "created_by", "created",
+              "run_after", "started_at", "heartbeat_at", "finished_at",
+              "worker", "error", "output_text")
+    readonly_fields = fields
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    @admin.display(description="Output")
+    def output_text(self, obj):
+        return format_html("<pre>{}</pre>", obj.output)
+
+
+class ScheduleEventAdmin(admin.ModelAdmin):
+    """Week transitions fired by pool.scheduler and the actions they ran."""
+    list_display = ("season", "week", "kind", "at", "fired_at", "actions")
+    list_filter = ("season", "kind")
+    fields = list_display
+    readonly_fields = fields
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+class PickReminderAdmin(admin.ModelAdmin):
+    """Missing-picks reminders sent by `manage.py send_pick_reminders`."""
+    list_display = ("user", "season", "week", "sent_at")
+    list_filter = ("season", "week")
+    fields = ("user", "season", "week", "sent_at", "games")
+    readonly_fields = fields
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+class EmailDeliveryAdmin(admin.ModelAdmin):
+    """Recap email runs by `manage.py send_recap_email`, per batch."""
+    list_display = ("email", "started_at", "finished_at", "recipients",
+                    "sent", "failed", "per_second")
+    fields = ("email", "started_at", "finished_at", "batch_size",
+              "recipients", "sent", "failed", "per_second", "batches",
+              "failures")
+    readonly_fields = fields
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    @admin.display(description="Messages/s")
+    def per_second(self, obj):
+        return obj.per_second
+
 
 # Register models with custom admin site
 pool_admin_site = PoolAdmin(name="pooladmin")
 pool_admin_site.register(Pick)
 pool_admin_site.register(Game)
+pool_admin_site.register(RequestProfile, RequestProfileAdmin)
+pool_admin_site.register(SlowQuery, SlowQueryAdmin)
+pool_admin_site.register(WarmResult, WarmResultAdmin)
+pool_admin_site.register(PoolJob, PoolJobAdmin)
+pool_admin_site.register(ScheduleEvent, ScheduleEventAdmin)
+pool_admin_site.register(PickReminder, PickReminderAdmin)
+pool_admin_site.register(EmailDelivery, EmailDeliveryAdmin)
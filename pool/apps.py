@@ -5,6 +5,19 @@ class PoolConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'pool'
 
+    def ready(self):
+        from django.contrib.auth import get_user_model
+        from django.core.signals import request_started
+        from django.db.models.signals import post_delete, post_save, pre_save
 
-def ready(self):
-    import pool.signals
\ No newline at end of file
+        from .models import discard_warm_results, note_warm_user_changes
+        from .routers import install_write_watch
+        from .scheduler import start_in_process
+        from .slow_queries import install_slow_query_log
+        install_slow_query_log()
+        install_write_watch()
+        pre_save.connect(note_warm_user_changes, sender=get_user_model())
+        for signal in (post_save, post_delete):
+            signal.connect(discard_warm_results, sender=get_user_model())
+        request_started.connect(start_in_process, weak=False,
+                                dispatch_uid="pool_scheduler_in_process")
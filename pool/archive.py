@@ -0,0 +1,286 @@
+# pool/archive.py
+"""
+Read-only snapshots of finished seasons.
+
+An archive is one gzipped JSON file per season holding the season's teams,
+users, games and picks as column lists, plus the weekly results and final
+standings exactly as the dashboard computed them when it was written.
+"""
+import gzip
+import json
+import os
+from functools import lru_cache
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from .models import Game, Pick, Team
+
+ARCHIVE_FORMAT = "pool-season-archive"
+ARCHIVE_VERSION = 1
+
+User = get_user_model()
+
+
+def archive_dir():
+    return Path(getattr(settings, "POOL_ARCHIVE_DIR",
+                        settings.BASE_DIR / "archives"))
+
+
+def archive_path(year, directory=None):
+    return Path(directory or archive_dir()) / f"season_{year}.json.gz"
+
+
+def build_season_archive(season):
+    """Collect everything needed to redisplay a season, as plain data."""
+    from .views import DashboardView
+
+    games = list(
+        Game.objects.filter(season=season).order_by("week", "game_time", "id")
+    )
+    team_ids = {g.home_team_id for g in games} | {g.away_team_id for g in games}
+    teams = list(Team.objects.filter(pk__in=team_ids).order_by("id"))
+
+    # Weekly results and standings exactly as the dashboard shows them
+    view = DashboardView()
+    summaries = view.get_all_weeks_game_picks_summary(season=season)
+    standings = view.get_overall_standings(season=season)
+
+    # Read picks after the summary, which can update bonus_points
+    picks = list(
+        Pick.objects.filter(season=season).order_by("id")
+        .values_list("user_id", "game_id", "picked_team_id",
+                     "points_earned", "bonus_points")
+    )
+    user_ids = {p[0] for p in picks}
+    user_ids |= {row["user"].id for entry in summaries
+                 for row in entry["summary"]}
+    user_ids |= {row["user"].id for row in standings["standings"]}
+    users = list(User.objects.filter(pk__in=user_ids).order_by("id"))
+
+    return {
+        "format": ARCHIVE_FORMAT,
+        "version": ARCHIVE_VERSION,
+        "created": timezone.now().isoformat(),
+        "season": {"year": season.year, "name": season.name},
+        "teams": {
+            "id": [t.id for t in teams],
+            "name": [t.name for t in teams],
+            "alias": [t.alias for t in teams],
+        },
+        "users": {
+            "id": [u.id for u in users],
+            "username": [u.username for u in users],
+            "first_name": [u.first_name for u in users],
+            "last_name": [u.last_name for u in users],
+        },
+        "games": {
+            "id": [g.id for g in games],
+            "week": [g.week for g in games],
+            "game_time": [g.game_time.isoformat() for g in games],
+            "home_team": [g.home_team_id for g in games],
+            "away_team": [g.away_team_id for g in games],
+            "winner": [g.winner_id for g in games],
+            "points": [g.points for g in games],
+        },
+        "picks": {
+            "user": [p[0] for p in picks],
+            "game": [p[1] for p in picks],
+            "picked_team": [p[2] for p in picks],
+            "points_earned": [p[3] for p in picks],
+            "bonus_points": [p[4] for p in picks],
+        },
+        "weeks": [
+            {
+                "week": entry["week"],
+                "results": [
+                    {
+                        "user": row["user"].id,
+                        "points_earned": row["points_earned"],
+                        "rank": row["rank"],
+                        "perfect_week": row["perfect_week"],
+                    }
+                    for row in entry["summary"]
+                ],
+            }
+            for entry in summaries
+        ],
+        "standings": {
+            "weeks": list(standings["weeks"]),
+            "rows": [
+                {
+                    "user": row["user"].id,
+                    "weekly_points": row["weekly_points"],
+                    "total_points": row["total_points"],
+                    "rank": row["rank"],
+                }
+                for row in standings["standings"]
+            ],
+        },
+    }
+
+
+def write_season_archive(data, path):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    with gzip.open(tmp_path, "wt", encoding="utf-8", compresslevel=9) as f:
+        json.dump(data, f, separators=(",", ":"))
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_season_archive(year, directory=None):
+    """Cached SeasonArchive for a season; reloaded if the file changes."""
+    path = archive_path(year, directory)
+    return _load(str(path), path.stat().st_mtime)
+
+
+@lru_cache(maxsize=4)
+def _load(path, mtime):
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        data = json.load(f)
+    if data.get("format") != ARCHIVE_FORMAT:
+        raise ValueError(f"{path} is not a season archive")
+    if data.get("version") != ARCHIVE_VERSION:
+        raise ValueError(
+            f"{path} is archive version {data.get('version')}, "
+            f"expected {ARCHIVE_VERSION}")
+    return SeasonArchive(data)
+
+
+def _rows(columns):
+    keys = list(columns)
+    return [dict(zip(keys, values)) for values in zip(*columns.values())]
+
+
+class SeasonArchive:
+    """
+    Read path over an archive file. Teams, users, games and picks come back
+    as dicts shaped like the model instances the pool templates expect.
+    """
+
+    def __init__(self, data):
+        self.data = data
+        self.year = data["season"]["year"]
+        self.name = data["season"]["name"]
+
+        self.teams = {t["id"]: t for t in _rows(data["teams"])}
+        self.users = {u["id"]: u for u in _rows(data["users"])}
+        for user in self.users.values():
+            first, last = user["first_name"], user["last_name"]
+            user["display_name"] = (f"{first} {last[0]}." if first and last
+                                    else user["username"])
+
+        self.games = {}
+        for game in _rows(data["games"]):
+            game["home_team"] = self.teams[game["home_team"]]
+            game["away_team"] = self.teams[game["away_team"]]
+            game["winner"] = self.teams.get(game["winner"])
+            self.games[game["id"]] = game
+
+        self.picks = []
+        for pick in _rows(data["picks"]):
+            pick["user"] = self.users[pick["user"]]
+            pick["game"] = self.games[pick["game"]]
+            pick["picked_team"] = self.teams[pick["picked_team"]]
+            pick["total_points"] = pick["points_earned"] + pick["bonus_points"]
+            self.picks.append(pick)
+
+    def standings(self):
+        """Final standings in the shape of DashboardView.get_overall_standings."""
+        return {
+            "weeks": self.data["standings"]["weeks"],
+            "standings": [
+                {**row, "user": self.users[row["user"]]}
+                for row in self.data["standings"]["rows"]
+            ],
+        }
+
+    def week_summaries(self):
+        """Weekly results in the shape of get_all_weeks_game_picks_summary."""
+        picks_by_user_game = {
+            (p["user"]["id"], p["game"]["id"]): p for p in self.picks
+        }
+        games_by_week = {}
+        for game in self.games.values():
+            games_by_week.setdefault(game["week"], []).append(game)
+
+        summaries = []
+        for entry in self.data["weeks"]:
+            games = games_by_week.get(entry["week"], [])
+            summaries.append({
+                "week": entry["week"],
+                "games": games,
+                "summary": [
+                    {
+                        **row,
+                        "user": self.users[row["user"]],
+                        "week": entry["week"],
+                        "picks": [picks_by_user_game.get((row["user"], g["id"]))
+                                  for g in games],
+                    }
+                    for row in entry["results"]
+                ],
+            })
+        return summaries
+
+    def week_summary(self, week):
+        for entry in self.week_summaries():
+            if entry["week"] == week:
+                return entry
+        return None
+
+    def season_report(self):
+        """
+        The season_picks.txt report: pool totals, records, every pick.
+        Picks on games without a winner are neither right nor wrong.
+        """
+        correct = {}
+        incorrect = {}
+        for pick in self.picks:
+            uid = pick["user"]["id"]
+            winner = pick["game"]["winner"]
+            if winner is None:
+                continue
+            if winner["id"] == pick["picked_team"]["id"]:
+                correct[uid] = correct.get(uid, 0) + 1
+            else:
+                incorrect[uid] = incorrect.get(uid, 0) + 1
+
+        total_correct = sum(correct.values())
+        total_incorrect = sum(incorrect.values())
+        decided = total_correct + total_incorrect
+        accuracy = total_correct / decided * 100 if decided else 0
+
+        lines = [
+            f"Total Games: {len(self.games)}",
+            f"Total Picks: {len(self.picks)}",
+            f"Record: {total_correct} / {total_incorrect}",
+            f"Pool Accuracy: {accuracy:.1f}%",
+        ]
+        if decided < len(self.picks):
+            lines.append(f"Undecided Picks: {len(self.picks) - decided}")
+        lines += [
+            "",
+            "Records:",
+        ]
+        user_ids = sorted({p["user"]["id"] for p in self.picks},
+                          key=lambda uid: correct.get(uid, 0), reverse=True)
+        for uid in user_ids:
+            lines.append(f"{self.users[uid]['display_name']}: "
+                         f"{correct.get(uid, 0)} / {incorrect.get(uid, 0)}")
+        lines += ["", ""]
+
+        for pick in self.picks:
+            game = pick["game"]
+            winner = game["winner"]["name"] if game["winner"] else None
+            lines.append(
+                f"Week {game['week']} -- {pick['user']['display_name']}: "
+                f"{game['away_team']['name']} @ {game['home_team']['name']}")
+            lines.append(f"\tPick: {pick['picked_team']['name']} ------ "
+                         f"Winner: {winner}")
+            lines.append("")
+        return "\n".join(lines) + "\n"
@@ -27,8 +27,9 @@ class PickForm(forms.ModelForm):
 
 
 class BasePickFormSet(BaseFormSet):
-    def __init__(self, *args, games=None, **kwargs):
+    def __init__(self, *args, games=None, locked=frozenset(), **kwargs):
         self.games = games or []
+        self.locked = locked  # ids of games that have kicked off
         super().__init__(*args, **kwargs)
 
         for i, form in enumerate(self.forms):
@@ -41,5 +42,8 @@ class BasePickFormSet(BaseFormSet):
                     id__in=[game.home_team_id, game.away_team_id]
                 )
                 form.fields['picked_team'].label_from_instance = lambda obj: obj.name
+                # A disabled field keeps its initial value and ignores
+                # whatever is posted for it
+                form.fields['picked_team'].disabled = game.id in self.locked
 
 PickFormSet = formset_factory(PickForm, formset=BasePickFormSet, extra=0)
@@ -0,0 +1,260 @@
+# pool/instrumentation.py
+import json
+import logging
+import math
+import os
+import threading
+import time
+from collections import Counter, deque
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger("pool.timing")
+
+# Samples kept per route, and the most routes we will track in one process
+MAX_SAMPLES = 500
+MAX_ROUTES = 200
+
+
+class RequestTiming:
+    """
+    Per-request counters, filled in by RequestTimingMiddleware.
+
+    Also used as a database execute wrapper so every query on every
+    connection is counted and timed.
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.queries = 0
+        self.db_ms = 0.0
+        self.view_start = None
+        self.view_ms = 0.0
+        self.template_ms = 0.0
+        self.total_ms = 0.0
+        self.route = None
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_ms += (time.perf_counter() - start) * 1000
+            self.queries += 1
+
+    def over_budget(self):
+        """Return the names of any budgets this request went over."""
+        budgets = getattr(settings, "POOL_REQUEST_BUDGETS", {})
+        measured = {
+            "total_ms": self.total_ms,
+            "db_ms": self.db_ms,
+            "queries": self.queries,
+        }
+        return [
+            name for name, limit in budgets.items()
+            if limit is not None and measured.get(name, 0) > limit
+        ]
+
+    def server_timing(self):
+        """Value for the Server-Timing response header."""
+        return ", ".join([
+            f'db;dur={self.db_ms:.1f};desc="{self.queries} queries"',
+            f"view;dur={self.view_ms:.1f}",
+            f"tpl;dur={self.template_ms:.1f}",
+            f"total;dur={self.total_ms:.1f}",
+        ])
+
+    def as_dict(self, request, response):
+        return {
+            "method": request.method,
+            "path": request.path,
+            "route": self.route,
+            "status": response.status_code,
+            "queries": self.queries,
+            "db_ms": round(self.db_ms, 1),
+            "view_ms": round(self.view_ms, 1),
+            "template_ms": round(self.template_ms, 1),
+            "total_ms": round(self.total_ms, 1),
+        }
+
+
+class RouteStats:
+    """
+    Rolling per-route samples for this worker process.
+
+    Each gunicorn worker keeps its own window; the admin report shows the
+    worker that served it.
+    """
+
+    def __init__(self, max_samples=MAX_SAMPLES, max_routes=MAX_ROUTES):
+        self.max_samples = max_samples
+        self.max_routes = max_routes
+        self.samples = {}
+        self.lock = threading.Lock()
+
+    def record(self, timing):
+        route = timing.route or "unresolved"
+        with self.lock:
+            samples = self.samples.get(route)
+            if samples is None:
+                if len(self.samples) >= self.max_routes:
+                    return
+                samples = self.samples[route] = deque(maxlen=self.max_samples)
+            samples.append((timing.total_ms, timing.db_ms, timing.queries))
+
+    def reset(self):
+        with self.lock:
+            self.samples.clear()
+
+    def summary(self):
+        """Per-route counts and p50/p90/p99 timings, slowest p90 first."""
+        with self.lock:
+            snapshot = {route: list(s) for route, s in self.samples.items()}
+
+        rows = []
+        for route, samples in snapshot.items():
+            total = sorted(s[0] for s in samples)
+            db = sorted(s[1] for s in samples)
+            queries = [s[2] for s in samples]
+            rows.append({
+                "route": route,
+                "count": len(samples),
+                "total_p50": percentile(total, 50),
+                "total_p90": percentile(total, 90),
+                "total_p99": percentile(total, 99),
+                "db_p50": percentile(db, 50),
+                "db_p90": percentile(db, 90),
+                "queries_avg": round(sum(queries) / len(queries), 1),
+                "queries_max": max(queries),
+            })
+        rows.sort(key=lambda r: r["total_p90"], reverse=True)
+        return rows
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return round(sorted_values[rank - 1], 1)
+
+
+route_stats = RouteStats()
+
+class WarmStats:
+    """
+    How this worker's WarmResult reads were served (current, stale while
+    a recompute runs, or computed in the request) and how long the
+    recomputes took.
+    """
+    OUTCOMES = ("fresh", "stale", "computed")
+
+    def __init__(self, max_samples=MAX_SAMPLES):
+        self.max_samples = max_samples
+        self.served = Counter()
+        self.samples = {}
+        self.lock = threading.Lock()
+
+    def record_served(self, name, outcome):
+        with self.lock:
+            self.served[name, outcome] += 1
+
+    def record_compute(self, name, ms, background):
+        with self.lock:
+            samples = self.samples.setdefault(
+                name, deque(maxlen=self.max_samples))
+            samples.append((ms, background))
+
+    def reset(self):
+        with self.lock:
+            self.served.clear()
+            self.samples.clear()
+
+    def summary(self):
+        with self.lock:
+            served = Counter(self.served)
+            samples = {name: list(s) for name, s in self.samples.items()}
+
+        rows = []
+        for name in sorted({name for name, _ in served} | set(samples)):
+            counts = {outcome: served[name, outcome]
+                      for outcome in self.OUTCOMES}
+            total = sum(counts.values())
+            ms = sorted(s[0] for s in samples.get(name, ()))
+            rows.append({
+                "name": name,
+                **counts,
+                "stale_pct": round(100 * counts["stale"] / total, 1)
+                if total else 0.0,
+                "recomputes": len(ms),
+                "background": sum(1 for s in samples.get(name, ()) if s[1]),
+                "compute_p50": percentile(ms, 50),
+                "compute_p90": percentile(ms, 90),
+                "compute_max": round(ms[-1], 1) if ms else 0.0,
+            })
+        return rows
+
+
+warm_stats = WarmStats()
+
+# Connections opened (or, with a pool, checked out) by this process
+_connects = Counter()
+
+
+def count_connect(sender, connection, **kwargs):
+    _connects[connection.alias] += 1
+
+
+connection_created.connect(count_connect, dispatch_uid="pool_count_connects")
+
+
+def connection_stats():
+    """
+    How each database alias holds its connections in this worker, with the
+    psycopg pool's counters (including time spent waiting for a
+    connection) when pooling is on.
+    """
+    rows = []
+    for alias in connections:
+        conn = connections[alias]
+        pool_options = conn.settings_dict.get("OPTIONS", {}).get("pool")
+        max_age = conn.settings_dict.get("CONN_MAX_AGE", 0)
+        if pool_options:
+            mode = "pool"
+        elif max_age is None or max_age > 0:
+            mode = f"persistent ({'unlimited' if max_age is None else f'{max_age} s'})"
+        else:
+            mode = "per request"
+        row = {"alias": alias, "vendor": conn.vendor, "mode": mode,
+               "connects": _connects[alias],
+               "health_checks": conn.settings_dict.get("CONN_HEALTH_CHECKS", False)}
+        if pool_options and getattr(conn, "pool", None) is not None:
+            stats = conn.pool.get_stats()
+            queued = stats.get("requests_queued", 0)
+            row["pool"] = {
+                "size": stats.get("pool_size", 0),
+                "available": stats.get("pool_available", 0),
+                "max": stats.get("pool_max", 0),
+                "requests": stats.get("requests_num", 0),
+                "waiting": stats.get("requests_waiting", 0),
+                "queued": queued,
+                "wait_ms_avg": round(stats.get("requests_wait_ms", 0) / queued, 1)
+                if queued else 0.0,
+                "timeouts": stats.get("requests_errors", 0),
+                "connections_lost": stats.get("connections_lost", 0),
+            }
+        rows.append(row)
+    return rows
+
+
+def log_request(request, response, timing):
+    data = timing.as_dict(request, response)
+    data["pid"] = os.getpid()
+    over = timing.over_budget()
+    if over:
+        data["over_budget"] = over
+        logger.warning(json.dumps(data))
+    else:
+        logger.info(json.dumps(data))
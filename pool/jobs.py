@@ -0,0 +1,213 @@
+# pool/jobs.py
+"""
+Runs PoolJob rows: the admin enqueues a job and polls it, and a runner
+claims and runs it. The queue is the database table, so no broker is
+needed. With POOL_JOB_RUNNER="inline" the runner is a thread in the web
+process that queued the job (InlineRunner); with "worker" it is
+`manage.py run_pool_worker`, in its own process.
+"""
+import io
+import logging
+import os
+import socket
+import threading
+import time
+import traceback
+
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.db import DEFAULT_DB_ALIAS, close_old_connections, connections
+from django.utils import timezone
+
+from .models import PoolJob
+
+logger = logging.getLogger("pool.jobs")
+
+# Jobs the admin and pool.scheduler can start: name -> steps
+# ([command, options] in order)
+JOBS = {
+    "update_points": [["update_points_earned", {}], ["warm_pool_caches", {}]],
+    "create_email": [["create_email", {}]],
+    "warm_caches": [["warm_pool_caches", {}]],
+    "pick_reminders": [["send_pick_reminders", {}]],
+}
+
+# Jobs that must not run again after a failure: create_email pays for an
+# OpenAI completion and saves a new Email each time it runs
+MAX_ATTEMPTS = {
+    "create_email": 1,
+}
+
+
+def enqueue(name, user=None):
+    if name in MAX_ATTEMPTS:
+        return PoolJob.enqueue(name, JOBS[name], user=user,
+                               max_attempts=MAX_ATTEMPTS[name])
+    return PoolJob.enqueue(name, JOBS[name], user=user)
+
+
+def require_shared_database(same_machine, process):
+    """
+    A process outside the web server finds its work through the database,
+    so it must use the web server's. On SQLite that is a file on one
+    machine: refuse unless same_machine says the web server uses it too.
+    """
+    if connections[DEFAULT_DB_ALIAS].vendor == "sqlite" and not same_machine:
+        raise CommandError(
+            f"The {process} only sees the web server's jobs and weeks through "
+            "a shared database. On SQLite that is a file on this machine; use "
+            "PostgreSQL, or pass --same-machine if the web server uses this "
+            "file too. With POOL_JOB_RUNNER=inline (the default) the web "
+            "server runs both itself.")
+
+
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class JobOutput(io.StringIO):
+    """Captures a command's output and saves it to the job every second."""
+
+    def __init__(self, job):
+        super().__init__(job.output)
+        self.seek(0, io.SEEK_END)
+        self.job = job
+        self.saved = time.monotonic()
+
+    def write(self, text):
+        written = super().write(text)
+        if time.monotonic() - self.saved >= 1:
+            self.save()
+        return written
+
+    def save(self):
+        self.saved = time.monotonic()
+        self.job.heartbeat(output=self.getvalue())
+
+
+class Heartbeat(threading.Thread):
+    """Keeps a job's lease while a step is quiet (e.g. waiting on an API)."""
+
+    def __init__(self, job, interval):
+        super().__init__(name=f"job-{job.pk}-heartbeat", daemon=True)
+        self.job = job
+        self.interval = interval
+        self.stopped = threading.Event()
+
+    def run(self):
+        try:
+            while not self.stopped.wait(self.interval):
+                PoolJob.objects.filter(pk=self.job.pk, worker=self.job.worker,
+                                       status=PoolJob.RUNNING).update(
+                    heartbeat_at=timezone.now())
+        finally:
+            connections.close_all()
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+def run_job(job):
+    """Run each step of a claimed job and record how it ended."""
+    output = JobOutput(job)
+    heartbeat = Heartbeat(job, max(settings.POOL_JOB_LEASE_SECONDS / 4, 1))
+    heartbeat.start()
+    error = None
+    try:
+        for i, (command, options) in enumerate(job.steps):
+            job.heartbeat(progress=round(100 * i / len(job.steps)),
+                          progress_message=f"Running {command}",
+                          output=output.getvalue())
+            call_command(command, stdout=output, stderr=output, **options)
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+        output.write(traceback.format_exc())
+        logger.warning("Job %s attempt %d failed: %s", job, job.attempts, error)
+    finally:
+        heartbeat.stop()
+
+    job.output = output.getvalue()
+    retry_delay = settings.POOL_JOB_RETRY_SECONDS * 2 ** (job.attempts - 1)
+    job.finish(error, retry_delay)
+    logger.info("Job %s %s after %d attempt(s)", job, job.status, job.attempts)
+    return job
+
+
+def work(once=False, poll_seconds=2.0, max_jobs=None, stop=None):
+    """
+    Claim and run jobs until stop is set, max_jobs have run or, with
+    once=True, the queue is empty. Returns the number of jobs run.
+    """
+    worker = worker_name()
+    stop = stop or threading.Event()
+    ran = 0
+    while not stop.is_set() and (max_jobs is None or ran < max_jobs):
+        close_old_connections()
+        PoolJob.requeue_abandoned(settings.POOL_JOB_LEASE_SECONDS)
+        job = PoolJob.claim(worker)
+        if job is None:
+            if once:
+                break
+            stop.wait(poll_seconds)
+            continue
+        run_job(job)
+        ran += 1
+    return ran
+
+
+class InlineRunner:
+    """
+    Drains the queue from a daemon thread in this process. kick() starts
+    the thread, or tells a running one to look again; it exits once no job
+    is queued. Retries that are not due yet are waited for.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.thread = None
+        self.more = False
+
+    def kick(self):
+        with self.lock:
+            self.more = True
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run,
+                                               name="pool-jobs", daemon=True)
+                self.thread.start()
+
+    def run(self):
+        try:
+            while True:
+                with self.lock:
+                    if not self.more:
+                        self.thread = None
+                        return
+                    self.more = False
+                try:
+                    work(once=True)
+                    self.wait_for_retries()
+                except Exception:
+                    logger.exception("Running queued jobs failed")
+        finally:
+            connections.close_all()
+
+    def wait_for_retries(self):
+        """Sleep until the next queued job is due, if there is one."""
+        run_after = (PoolJob.objects.filter(status=PoolJob.QUEUED)
+                     .order_by("run_after")
+                     .values_list("run_after", flat=True).first())
+        if run_after is None:
+            return
+        time.sleep(max((run_after - timezone.now()).total_seconds(), 0))
+        with self.lock:
+            self.more = True
+
+
+inline_runner = InlineRunner()
+
+
+def run_inline():
+    """Run queued jobs in this process, if POOL_JOB_RUNNER is "inline"."""
+    if settings.POOL_JOB_RUNNER == "inline":
+        inline_runner.kick()
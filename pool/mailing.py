@@ -0,0 +1,160 @@
+# pool/mailing.py
+"""
+Bulk email delivery: one message per recipient, sent in batches over one
+backend connection per batch. deliver() does the sending for the recap email
+(`manage.py send_recap_email`) and the missing-picks reminders
+(pool.reminders); send_recap() records each recap run as an EmailDelivery.
+"""
+import logging
+import re
+import time
+from collections import namedtuple
+from itertools import islice
+from time import perf_counter
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.utils import timezone
+
+from .models import EmailDelivery
+
+logger = logging.getLogger("pool.mailing")
+
+
+class Batch(namedtuple("Batch", "number sent failed ms")):
+    """A sent batch: the keys sent, (key, error) pairs that failed, time."""
+
+    @property
+    def per_second(self):
+        return 1000 * len(self.sent) / self.ms if self.ms else 0.0
+
+
+def parse_markdown_email(md_text: str):
+    """
+    Parse a markdown email string into subject, plain text body, and HTML body.
+
+    Assumes the first line is "Subject: ..." or just the subject line.
+    """
+    lines = md_text.splitlines()
+
+    # Find first non-empty line for subject
+    subject = ""
+    body_lines = []
+    for i, line in enumerate(lines):
+        stripped = line.strip()
+        if stripped:
+            # This line is the subject
+            subject = stripped
+            # If it starts with 'Subject:', remove that
+            if subject.lower().startswith("subject:"):
+                subject = subject[len("subject:"):].strip()
+            # Everything after this line is the body
+            body_lines = lines[i + 1:]
+            break
+
+    body_md = "\n".join(body_lines).strip()
+
+    # Plain text version: remove Markdown formatting
+    body_text = re.sub(r'(\*\*|__|\*|~~|`|#)', '', body_md).strip()
+
+    # HTML version (markdown is only imported when an email is sent)
+    import markdown
+    body_html = markdown.markdown(body_md)
+
+    return subject, body_text, body_html
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def deliver(messages, batch_size=None, pause=None):
+    """
+    Send (key, message) pairs batch_size at a time, each batch over one
+    connection that is closed before the Batch is yielded, so none is held
+    open through the pause or while the caller saves its progress. A
+    message that fails is reported in its batch and the connection
+    reopened; the rest still go out. If the connection cannot be opened
+    (or reopened), what the batch sent so far is yielded before the error
+    is raised, so the caller can save it.
+    """
+    batch_size = batch_size or settings.POOL_EMAIL_BATCH_SIZE
+    pause = settings.POOL_EMAIL_BATCH_PAUSE_SECONDS if pause is None else pause
+    for number, chunk in enumerate(batched(messages, batch_size), 1):
+        if number > 1 and pause:
+            time.sleep(pause)
+        start = perf_counter()
+        sent, failed = [], []
+        connection = get_connection()
+        try:
+            connection.open()
+            for key, message in chunk:
+                message.connection = connection
+                try:
+                    if connection.send_messages([message]):
+                        sent.append(key)
+                    else:
+                        failed.append((key, "not accepted by the backend"))
+                except Exception as e:
+                    failed.append((key, f"{type(e).__name__}: {e}"))
+                    logger.warning("Sending to %s failed: %s",
+                                   ", ".join(message.to), e)
+                    # The connection may be broken; carry on with a fresh one
+                    connection.close()
+                    connection.open()
+        except Exception:
+            connection.close()
+            if sent or failed:
+                yield Batch(number, sent, failed,
+                            (perf_counter() - start) * 1000)
+            raise
+        finally:
+            connection.close()
+        yield Batch(number, sent, failed, (perf_counter() - start) * 1000)
+
+
+def recap_recipients(email, again=False):
+    """
+    Active users' addresses, in signup order, less those an earlier
+    delivery of the email reached (unless again).
+    """
+    addresses = dict.fromkeys(
+        get_user_model().objects.filter(is_active=True).exclude(email="")
+        .order_by("id").values_list("email", flat=True))
+    if not again:
+        for address in EmailDelivery.delivered(email):
+            addresses.pop(address, None)
+    return list(addresses)
+
+
+def recap_messages(email, addresses):
+    """One message per address; the markdown is rendered once."""
+    subject, plain_text, html_text = parse_markdown_email(email.email_text)
+    for address in addresses:
+        message = EmailMultiAlternatives(subject, plain_text,
+                                         settings.DEFAULT_FROM_EMAIL, [address])
+        message.attach_alternative(html_text, "text/html")
+        yield address, message
+
+
+def send_recap(email, batch_size=None, again=False, progress=None):
+    """
+    Send the recap to every recipient not reached yet, saving the delivery
+    after each batch. progress(delivery, batch) is called after each. If
+    sending stops with an error, the batches saved so far are kept (with no
+    finished_at) and a rerun sends only to the rest.
+    """
+    batch_size = batch_size or settings.POOL_EMAIL_BATCH_SIZE
+    addresses = recap_recipients(email, again)
+    delivery = EmailDelivery.objects.create(
+        email=email, batch_size=batch_size, recipients=len(addresses))
+    for batch in deliver(recap_messages(email, addresses), batch_size):
+        delivery.record(batch)
+        if progress:
+            progress(delivery, batch)
+    delivery.finished_at = timezone.now()
+    delivery.save(update_fields=["finished_at"])
+    return delivery
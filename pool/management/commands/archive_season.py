@@ -0,0 +1,86 @@
+# pool/management/commands/archive_season.py
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from pool.archive import (archive_path, build_season_archive,
+                          load_season_archive, write_season_archive)
+from pool.models import Game, Pick, Season
+
+
+# Usage
+# python manage.py archive_season 2025            # write archives/season_2025.json.gz
+# python manage.py archive_season 2025 --delete   # ...then drop the season's live rows
+#
+# The archive is read back and checked against the live rows before anything
+# is deleted. --delete removes every row that belongs to the season (games,
+# picks, scores, pick sheets, week windows, reveals, stored results, emails,
+# notes...) in one transaction; the Season row stays, marked archived.
+# Archived seasons are served by pool.views.SeasonArchiveView.
+
+
+def season_rows(season):
+    """A queryset per model with a foreign key to Season, for the season."""
+    for relation in Season._meta.related_objects:
+        yield relation.related_model._base_manager.filter(
+            **{relation.field.name: season})
+
+
+class Command(BaseCommand):
+    help = "Freeze a finished season into a compressed, read-only archive file."
+
+    def add_arguments(self, parser):
+        parser.add_argument('year', type=int, help='Season year, e.g. 2025')
+        parser.add_argument('--output-dir',
+                            help='Directory for the archive (default: POOL_ARCHIVE_DIR)')
+        parser.add_argument('--delete', action='store_true',
+                            help="Delete the season's rows (all but the Season "
+                                 "itself) once the archive is written")
+        parser.add_argument('--force', action='store_true',
+                            help='Allow archiving the current season')
+
+    def handle(self, *args, **options):
+        year = options['year']
+        try:
+            season = Season.objects.get(year=year)
+        except Season.DoesNotExist:
+            raise CommandError(f"No season {year}.")
+        if season.is_current and not options['force']:
+            raise CommandError(
+                f"{season} is the current season. Make another season current "
+                f"first, or pass --force.")
+
+        games = Game.objects.filter(season=season)
+        picks = Pick.objects.filter(season=season)
+        if not games.exists():
+            raise CommandError(f"{season} has no games to archive.")
+        if games.filter(winner__isnull=True).exists():
+            self.stdout.write(self.style.WARNING(
+                f"{games.filter(winner__isnull=True).count()} games in "
+                f"{season} have no winner."))
+
+        data = build_season_archive(season)
+        path = write_season_archive(data, archive_path(year, options['output_dir']))
+
+        # Read the file back before trusting it with the only copy
+        archive = load_season_archive(year, options['output_dir'])
+        if (len(archive.games) != games.count()
+                or len(archive.picks) != picks.count()):
+            raise CommandError(f"{path} does not match the database; "
+                               f"nothing was deleted.")
+
+        self.stdout.write(
+            f"Wrote {path} ({path.stat().st_size / 1024:.0f} KB): "
+            f"{len(archive.games)} games, {len(archive.picks)} picks, "
+            f"{len(archive.users)} users.")
+
+        with transaction.atomic():
+            if options['delete']:
+                for rows in season_rows(season):
+                    rows.delete()
+                Season.record_change(season.id)
+                self.stdout.write(f"Deleted the live rows for {season}.")
+            season.is_archived = True
+            season.save(update_fields=["is_archived"])
+
+        self.stdout.write(self.style.SUCCESS(f"{season} archived."))
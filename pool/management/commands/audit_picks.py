@@ -5,6 +5,7 @@ from datetime import datetime
 from django.core.management.base import BaseCommand
 
 from pool.models import Game, Pick, User
+from pool.utils import get_current_season
 
 
 class Command(BaseCommand):
@@ -12,8 +13,9 @@ class Command(BaseCommand):
 
     def handle(self, *args, **options):
         users = User.objects.all()
-        weeks = Game.objects.values_list('week', flat=True).distinct().order_by(
-            '-week')  # most recent first
+        season = get_current_season()
+        weeks = Game.objects.filter(season=season).values_list(
+            'week', flat=True).distinct().order_by('-week')  # most recent first
 
         # Prepare CSV
         today_str = datetime.now().strftime("%Y%m%d")
@@ -27,7 +29,8 @@ class Command(BaseCommand):
 
             for week in weeks:
                 self.stdout.write(f"=== Week {week} ===")
-                games = Game.objects.filter(week=week).order_by('game_time')
+                games = Game.objects.filter(season=season,
+                                            week=week).order_by('game_time')
 
                 for game in games:
                     winner_name = game.winner.alias if game.winner else 'TBD'
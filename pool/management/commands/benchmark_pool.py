@@ -0,0 +1,424 @@
+# pool/management/commands/benchmark_pool.py
+
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import tempfile
+import time
+import types
+from datetime import timedelta
+
+import django
+from django.contrib.auth import get_user_model
+from django.contrib.messages.storage.fallback import FallbackStorage
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import RequestFactory
+from django.urls import include, path, set_urlconf
+from django.utils import timezone
+
+from pool.models import Team, Game, Pick, PickSheet, Season, WeekWindow
+
+User = get_user_model()
+
+
+# Usage
+# python manage.py benchmark_pool --sizes 10,50,200 --output bench.json
+# python manage.py benchmark_pool --baseline bench.json --threshold 20
+#
+# Runs against a throwaway test database created from the configured
+# DATABASES["default"] (in-memory for SQLite, test_<name> for Postgres), so
+# live data is never touched.
+
+GAMES_PER_WEEK = 16
+TEAMS = 32
+
+SCENARIOS = [
+    "dashboard_get",
+    "pick_submit",
+    "overall_standings",
+    "weeks_summary",
+    "set_week_winners",
+    "email_data_prep",
+    "schedule_import",
+    "score_weeks_rows",
+    "score_weeks_bitmask",
+    "score_weeks_numpy",
+    "week_info",
+    "pick_locks",
+]
+
+# The pool urls are switched off in the off season, so the benchmark mounts
+# them itself for the dashboard's {% url %} tags.
+benchmark_urlconf = types.ModuleType("pool_benchmark_urls")
+
+
+def seed_benchmark_data(num_users, num_weeks, seed=0):
+    """
+    Fill an empty database with a deterministic season: 32 teams, 16 games
+    per week, every user picking every game. All weeks before the last have
+    winners; the last week kicks off in the future and is the current week.
+    """
+    rng = random.Random(seed)
+
+    season, _ = Season.objects.get_or_create(year=2025)
+    season.is_current = True
+    season.save()
+
+    teams = Team.objects.bulk_create([
+        Team(name=f"Team {i:02d}", alias=f"T{i:02d}") for i in range(TEAMS)
+    ])
+
+    users = User.objects.bulk_create([
+        User(username=f"bench{i}", email=f"bench{i}@example.com",
+             first_name=f"Bench{i}", last_name="User")
+        for i in range(num_users)
+    ])
+
+    now = timezone.now()
+    games = []
+    for week in range(1, num_weeks + 1):
+        if week == num_weeks:
+            week_start = now + timedelta(hours=1)
+        else:
+            week_start = now - timedelta(weeks=num_weeks - week)
+        order = teams[:]
+        rng.shuffle(order)
+        for i in range(GAMES_PER_WEEK):
+            home, away = order[i * 2], order[i * 2 + 1]
+            decided = week != num_weeks
+            games.append(Game(
+                season=season,
+                week=week,
+                home_team=home,
+                away_team=away,
+                game_time=week_start + timedelta(hours=i * 3),
+                winner=rng.choice([home, away]) if decided else None,
+                points=2 if i == 0 else 1,
+            ))
+    games = Game.objects.bulk_create(games)
+
+    picks = []
+    for user in users:
+        for game in games:
+            picked = rng.choice([game.home_team, game.away_team])
+            correct = game.winner_id is not None and picked.id == game.winner_id
+            picks.append(Pick(
+                user=user,
+                game=game,
+                picked_team=picked,
+                season=season,
+                week=game.week,
+                is_correct=correct if game.winner_id else None,
+                points_earned=game.points if correct else 0,
+            ))
+    Pick.objects.bulk_create(picks, batch_size=2000)
+    for week in range(1, num_weeks + 1):
+        PickSheet.rebuild(season.id, week)
+    Season.record_change(season.id)
+    WeekWindow.generate(season)
+
+    return users, games
+
+
+class QueryCounter:
+    """Execute wrapper counting queries without the debug cursor's cap."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def clear_benchmark_data():
+    WeekWindow.objects.all().delete()
+    PickSheet.objects.all().delete()
+    Pick.objects.all().delete()
+    Game.objects.all().delete()
+    Team.objects.all().delete()
+    User.objects.all().delete()
+    for season_id in Season.objects.values_list("id", flat=True):
+        Season.record_change(season_id)
+
+
+def build_request(factory, user, method="get", path="/", data=None):
+    request = getattr(factory, method)(path, data or {})
+    request.user = user
+    request.session = SessionStore()
+    request._messages = FallbackStorage(request)
+    return request
+
+
+def schedule_payload(week):
+    """Generate one week of games in the import_season_schedule format."""
+    kickoff = timezone.now() + timedelta(weeks=4)
+    return [
+        {
+            "scheduled": (kickoff + timedelta(hours=i * 3)).isoformat(),
+            "week": week,
+            "home": {"name": f"Team {i * 2:02d}"},
+            "away": {"name": f"Team {i * 2 + 1:02d}"},
+        }
+        for i in range(GAMES_PER_WEEK)
+    ]
+
+
+class Command(BaseCommand):
+    help = ("Time and count queries for the pool's hot paths against a seeded "
+            "throwaway database at several dataset sizes.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=str, default="10,50,200",
+                            help='Comma separated user counts (default 10,50,200)')
+        parser.add_argument('--weeks', type=int, default=18,
+                            help='Weeks of games to seed (default 18)')
+        parser.add_argument('--repeat', type=int, default=5,
+                            help='Timed runs per scenario (default 5)')
+        parser.add_argument('--scenarios', type=str, default="",
+                            help='Comma separated subset of scenarios to run')
+        parser.add_argument('--output', type=str, default="",
+                            help='Write JSON results to this file')
+        parser.add_argument('--baseline', type=str, default="",
+                            help='Compare against a previous JSON results file')
+        parser.add_argument('--threshold', type=float, default=20.0,
+                            help='Allowed slowdown vs baseline in percent (default 20)')
+
+    def handle(self, *args, **options):
+        sizes = [int(s) for s in options['sizes'].split(",") if s.strip()]
+        scenarios = [s.strip() for s in options['scenarios'].split(",")
+                     if s.strip()] or SCENARIOS
+        unknown = set(scenarios) - set(SCENARIOS)
+        if unknown:
+            raise CommandError(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+
+        baseline = None
+        if options['baseline']:
+            try:
+                with open(options['baseline'], 'r') as f:
+                    baseline = json.load(f)
+            except FileNotFoundError:
+                raise CommandError(f"File not found: {options['baseline']}")
+            except json.JSONDecodeError as e:
+                raise CommandError(f"Invalid JSON: {e}")
+
+        from pool import urls as pool_urls
+        from django_project import urls as project_urls
+        benchmark_urlconf.urlpatterns = (
+            [path("", include(pool_urls))] + project_urls.urlpatterns
+        )
+
+        old_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        set_urlconf(benchmark_urlconf)
+        results = []
+        try:
+            for size in sizes:
+                clear_benchmark_data()
+                seed_benchmark_data(size, options['weeks'])
+                self.stdout.write(f"=== {size} users, {options['weeks']} weeks ===")
+                for name in scenarios:
+                    row = self.run_scenario(name, size, options['repeat'])
+                    results.append(row)
+                    self.stdout.write(
+                        f"  {name:<20} median {row['median_ms']:>9.1f} ms  "
+                        f"min {row['min_ms']:>9.1f} ms  "
+                        f"queries {row['queries']}")
+        finally:
+            set_urlconf(None)
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        report = {
+            "meta": {
+                "created": timezone.now().isoformat(),
+                "vendor": connection.vendor,
+                "django": django.get_version(),
+                "python": platform.python_version(),
+                "weeks": options['weeks'],
+                "repeat": options['repeat'],
+            },
+            "results": results,
+        }
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(f"\nResults saved to {options['output']}")
+
+        if baseline is not None:
+            self.compare(results, baseline, options['threshold'])
+
+    # ------------------------
+    # Scenarios
+    # ------------------------
+    def run_scenario(self, name, size, repeat):
+        setup = getattr(self, f"setup_{name}", None)
+        func = getattr(self, f"scenario_{name}")
+        timings = []
+        queries = 0
+        for i in range(repeat):
+            state = setup(i) if setup else None
+            counter = QueryCounter()
+            with connection.execute_wrapper(counter), \
+                    contextlib.redirect_stdout(io.StringIO()):
+                start = time.perf_counter()
+                func(state)
+                timings.append((time.perf_counter() - start) * 1000)
+            queries = counter.count
+            teardown = getattr(self, f"teardown_{name}", None)
+            if teardown:
+                teardown(state)
+
+        return {
+            "size": size,
+            "scenario": name,
+            "median_ms": round(statistics.median(timings), 3),
+            "min_ms": round(min(timings), 3),
+            "max_ms": round(max(timings), 3),
+            "queries": queries,
+        }
+
+    def current_week_games(self):
+        week = Game.objects.order_by("-week").values_list("week", flat=True).first()
+        return list(Game.objects.filter(week=week).order_by("game_time"))
+
+    def setup_dashboard_get(self, i):
+        return User.objects.order_by("id").first()
+
+    def scenario_dashboard_get(self, user):
+        from pool.views import DashboardView
+        request = build_request(RequestFactory(), user)
+        DashboardView.as_view()(request).render()
+
+    def setup_pick_submit(self, i):
+        user = User.objects.order_by("id").first()
+        games = self.current_week_games()
+        data = {
+            "form-TOTAL_FORMS": len(games),
+            "form-INITIAL_FORMS": 0,
+        }
+        for n, game in enumerate(games):
+            team = game.home_team_id if (n + i) % 2 else game.away_team_id
+            data[f"form-{n}-picked_team"] = team
+        return user, games[0].week, data
+
+    def scenario_pick_submit(self, state):
+        from pool.views import PickView
+        user, week, data = state
+        request = build_request(RequestFactory(), user, "post",
+                                f"/picks/week/{week}/", data)
+        PickView.as_view()(request, week=week)
+
+    def scenario_overall_standings(self, state):
+        from pool.views import DashboardView
+        DashboardView().get_overall_standings()
+
+    def scenario_weeks_summary(self, state):
+        from pool.views import DashboardView
+        DashboardView().get_all_weeks_game_picks_summary()
+
+    def setup_set_week_winners(self, i):
+        return list(Game.objects.filter(week=1).order_by("game_time"))
+
+    def scenario_set_week_winners(self, games):
+        for game in games:
+            game.winner_id = (game.home_team_id
+                              if game.winner_id != game.home_team_id
+                              else game.away_team_id)
+            game.save()
+
+    def scenario_email_data_prep(self, state):
+        from pool.management.commands.create_email import (
+            get_all_weeks_summary, serialize_weeks_summary,
+            build_full_results_package, trim_full_results_for_llm)
+        serialized = serialize_weeks_summary(get_all_weeks_summary())
+        trim_full_results_for_llm(build_full_results_package(serialized))
+
+    def setup_schedule_import(self, i):
+        fd, file_path = tempfile.mkstemp(suffix=".json")
+        with os.fdopen(fd, 'w') as f:
+            json.dump(schedule_payload(week=99), f)
+        return file_path
+
+    def scenario_schedule_import(self, file_path):
+        call_command("import_season_schedule", file_path,
+                     stdout=io.StringIO(), stderr=io.StringIO())
+
+    def teardown_schedule_import(self, file_path):
+        os.remove(file_path)
+        Game.objects.filter(week=99).delete()
+        season = Season.objects.get(is_current=True)
+        Season.record_change(season.id)
+        WeekWindow.generate(season)
+
+    def setup_score_weeks_rows(self, i):
+        return [
+            (week, list(Game.objects.filter(week=week)))
+            for week in Game.objects.values_list("week", flat=True)
+            .distinct().order_by("week")
+        ]
+
+    setup_score_weeks_bitmask = setup_score_weeks_rows
+    setup_score_weeks_numpy = setup_score_weeks_rows
+
+    def scenario_score_weeks_rows(self, weeks, backend="rows"):
+        from pool.scoring import score_week
+        season = Season.objects.get(is_current=True)
+        for week, games in weeks:
+            score_week(season, week, games, backend=backend)
+
+    def scenario_score_weeks_bitmask(self, weeks):
+        self.scenario_score_weeks_rows(weeks, backend="bitmask")
+
+    def scenario_score_weeks_numpy(self, weeks):
+        self.scenario_score_weeks_rows(weeks, backend="numpy")
+
+    def scenario_week_info(self, state):
+        from pool.utils import get_week_info
+        get_week_info()
+
+    def setup_pick_locks(self, i):
+        return Season.objects.get(is_current=True)
+
+    def scenario_pick_locks(self, season):
+        from pool.utils import get_locked_games
+        get_locked_games(season)
+
+    # ------------------------
+    # Baseline comparison
+    # ------------------------
+    def compare(self, results, baseline, threshold):
+        previous = {
+            (row["size"], row["scenario"]): row
+            for row in baseline.get("results", [])
+        }
+        regressions = []
+        self.stdout.write(f"\n=== Compared to baseline ({threshold:g}% threshold) ===")
+        for row in results:
+            old = previous.get((row["size"], row["scenario"]))
+            if old is None:
+                continue
+            change = ((row["median_ms"] - old["median_ms"]) / old["median_ms"] * 100
+                      if old["median_ms"] else 0.0)
+            slower = change > threshold
+            more_queries = row["queries"] > old["queries"]
+            line = (f"  {row['size']:>6} {row['scenario']:<20} "
+                    f"{old['median_ms']:>9.1f} -> {row['median_ms']:>9.1f} ms "
+                    f"({change:+.1f}%)  queries {old['queries']} -> {row['queries']}")
+            if slower or more_queries:
+                regressions.append(row)
+                self.stdout.write(self.style.ERROR(line))
+            else:
+                self.stdout.write(line)
+
+        if regressions:
+            raise CommandError(
+                f"{len(regressions)} benchmark(s) regressed against the baseline.")
+        self.stdout.write(self.style.SUCCESS("No regressions against the baseline."))
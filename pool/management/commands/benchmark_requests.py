@@ -0,0 +1,259 @@
+# pool/management/commands/benchmark_requests.py
+
+import io
+import json
+import logging
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.db.backends.signals import connection_created
+from django.test import Client, override_settings
+from django.urls import include, path
+from django.utils import timezone
+
+from pool.instrumentation import connection_stats
+from pool.management.commands.benchmark_pool import (benchmark_urlconf,
+                                                     seed_benchmark_data)
+from pool.slow_queries import install_slow_query_log
+
+User = get_user_model()
+
+
+# Usage
+# python manage.py benchmark_requests
+# python manage.py benchmark_requests --threads 8 --seconds 10 --path / --output rps.json
+#
+# Requests per second through the full WSGI stack (middleware, sessions,
+# connection handling) from several threads, as a gthread worker would
+# serve them, for each way of holding database connections:
+#   per_request  connect and disconnect around every request (CONN_MAX_AGE=0)
+#   persistent   CONN_MAX_AGE with CONN_HEALTH_CHECKS
+#   pool         psycopg 3 pool (PostgreSQL only), sized by --pool-size
+# Runs on a throwaway database, so live data is never touched.
+
+MODES = ("per_request", "persistent", "pool")
+
+
+def percentile(timings, pct):
+    return timings[max(int(len(timings) * pct / 100) - 1, 0)] if timings else 0.0
+
+
+def wsgi_environ(request_path, cookie):
+    return {
+        "REQUEST_METHOD": "GET",
+        "PATH_INFO": request_path,
+        "QUERY_STRING": "",
+        "SERVER_NAME": "localhost",
+        "SERVER_PORT": "80",
+        "SERVER_PROTOCOL": "HTTP/1.1",
+        "HTTP_HOST": "localhost",
+        "HTTP_COOKIE": f"{settings.SESSION_COOKIE_NAME}={cookie}",
+        "REMOTE_ADDR": "10.0.0.1",
+        "wsgi.input": io.BytesIO(b""),
+        "wsgi.errors": io.StringIO(),
+        "wsgi.url_scheme": "http",
+        "wsgi.version": (1, 0),
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+    }
+
+
+def client_thread(handler, request_path, cookie, seconds, start_line, results):
+    statuses = []
+
+    def start_response(status, headers, exc_info=None):
+        statuses.append(status)
+
+    timings, errors = [], 0
+    start_line.wait()
+    stop = time.perf_counter() + seconds
+    while time.perf_counter() < stop:
+        start = time.perf_counter()
+        try:
+            response = handler(wsgi_environ(request_path, cookie),
+                               start_response)
+            b"".join(response)
+            response.close()  # request_finished: connections are released
+            if not statuses[-1].startswith("200"):
+                errors += 1
+        except Exception:
+            errors += 1
+        timings.append((time.perf_counter() - start) * 1000)
+    connections.close_all()  # persistent connections are per thread
+    results.append((timings, errors))
+
+
+class Command(BaseCommand):
+    help = ("Compare requests per second with per-request, persistent and "
+            "pooled database connections.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=50,
+                            help='Users to seed (default 50)')
+        parser.add_argument('--weeks', type=int, default=18,
+                            help='Weeks of games to seed (default 18)')
+        parser.add_argument('--threads', type=int, default=8,
+                            help='Concurrent request threads (default 8)')
+        parser.add_argument('--seconds', type=float, default=5.0,
+                            help='Run time per mode (default 5)')
+        parser.add_argument('--path', type=str, default="/picks/week/1/",
+                            help='Page to request (default /picks/week/1/)')
+        parser.add_argument('--pool-size', type=int, default=4,
+                            help='max_size for the pool mode (default 4)')
+        parser.add_argument('--modes', type=str, default="",
+                            help='Comma separated subset of modes to run')
+        parser.add_argument('--output', type=str, default="",
+                            help='Write JSON results to this file')
+
+    def handle(self, *args, **options):
+        modes = [m.strip() for m in options['modes'].split(",")
+                 if m.strip()] or list(MODES)
+        unknown = set(modes) - set(MODES)
+        if unknown:
+            raise CommandError(f"Unknown modes: {', '.join(sorted(unknown))}")
+        if connection.vendor != "postgresql" and "pool" in modes:
+            if options['modes']:
+                raise CommandError("The pool mode needs a PostgreSQL database.")
+            modes.remove("pool")
+
+        from pool import urls as pool_urls
+        from django_project import urls as project_urls
+        benchmark_urlconf.urlpatterns = (
+            [path("", include(pool_urls))] + project_urls.urlpatterns
+        )
+
+        db = connection.settings_dict
+        saved = {key: db.get(key) for key in ("CONN_MAX_AGE",
+                                              "CONN_HEALTH_CHECKS")}
+        db_options = db.setdefault("OPTIONS", {})
+        saved_pool = db_options.get("pool")
+        old_name = db["NAME"]
+        test_settings = db.setdefault("TEST", {})
+        old_test_name = test_settings.get("NAME")
+        path_name = None
+        if connection.vendor == "sqlite":
+            # A file, so that every new connection pays its real cost
+            fd, path_name = tempfile.mkstemp(suffix=".sqlite3")
+            os.close(fd)
+            test_settings["NAME"] = path_name
+        self.close_connections()
+        db_options.pop("pool", None)
+        db["CONN_MAX_AGE"] = 0
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+
+        rows = []
+        try:
+            users, _ = seed_benchmark_data(options['users'], options['weeks'])
+            cookies = []
+            for user in users[:options['threads']]:
+                client = Client()
+                client.force_login(user)
+                cookies.append(
+                    client.cookies[settings.SESSION_COOKIE_NAME].value)
+
+            # Time the requests, not the slow query log's writes or the
+            # over-budget warnings
+            connection_created.disconnect(dispatch_uid="pool_slow_query_log")
+            logging.getLogger("pool.timing").disabled = True
+            with override_settings(ROOT_URLCONF=benchmark_urlconf,
+                                   DEBUG=False):
+                handler = WSGIHandler()
+                for mode in modes:
+                    self.configure(mode, options['pool_size'])
+                    row = self.run_mode(handler, cookies, options)
+                    row["mode"] = mode
+                    row["connections"] = connection_stats()[0]
+                    rows.append(row)
+                    self.close_connections()
+        finally:
+            logging.getLogger("pool.timing").disabled = False
+            install_slow_query_log()
+            self.close_connections()
+            db_options.pop("pool", None)
+            db["CONN_MAX_AGE"] = 0
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            db.update(saved)
+            if saved_pool is not None:
+                db_options["pool"] = saved_pool
+            test_settings["NAME"] = old_test_name
+            if path_name:
+                for suffix in ("-wal", "-shm"):
+                    if os.path.exists(path_name + suffix):
+                        os.remove(path_name + suffix)
+
+        self.stdout.write(
+            f"GET {options['path']} from {options['threads']} threads, "
+            f"{options['seconds']:.0f} s per mode, {connection.vendor}, "
+            f"{options['users']} users")
+        for row in rows:
+            pool = row["connections"].get("pool")
+            waits = (f"  pool waits {pool['queued']} "
+                     f"(avg {pool['wait_ms_avg']:.1f} ms)" if pool else "")
+            self.stdout.write(
+                f"  {row['mode']:<12} {row['rps']:>7.1f} req/s  "
+                f"p50 {row['p50_ms']:>7.1f} ms  p99 {row['p99_ms']:>7.1f} ms  "
+                f"connects {row['connects']:>5}  errors {row['errors']}{waits}")
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump({
+                    "meta": {"created": timezone.now().isoformat(),
+                             "vendor": connection.vendor,
+                             "path": options['path'],
+                             "threads": options['threads'],
+                             "seconds": options['seconds'],
+                             "users": options['users']},
+                    "results": rows,
+                }, f, indent=2, default=str)
+            self.stdout.write(f"\nResults saved to {options['output']}")
+
+    def close_connections(self):
+        connections.close_all()
+        if hasattr(connection, "close_pool"):
+            connection.close_pool()
+
+    def configure(self, mode, pool_size):
+        db = connection.settings_dict
+        db_options = db.setdefault("OPTIONS", {})
+        db_options.pop("pool", None)
+        db["CONN_HEALTH_CHECKS"] = mode == "persistent"
+        db["CONN_MAX_AGE"] = 600 if mode == "persistent" else 0
+        if mode == "pool":
+            db_options["pool"] = {"min_size": min(2, pool_size),
+                                  "max_size": pool_size, "timeout": 10.0}
+
+    def run_mode(self, handler, cookies, options):
+        connects_before = connection_stats()[0]["connects"]
+        start_line = threading.Barrier(options['threads'])
+        results = []
+        threads = [
+            threading.Thread(target=client_thread,
+                             args=(handler, options['path'],
+                                   cookies[i % len(cookies)],
+                                   options['seconds'], start_line, results))
+            for i in range(options['threads'])
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        timings = sorted(t for thread_timings, _ in results
+                         for t in thread_timings)
+        return {
+            "requests": len(timings),
+            "rps": round(len(timings) / options['seconds'], 1),
+            "p50_ms": round(statistics.median(timings), 3) if timings else 0.0,
+            "p99_ms": round(percentile(timings, 99), 3),
+            "errors": sum(errors for _, errors in results),
+            "connects": connection_stats()[0]["connects"] - connects_before,
+        }
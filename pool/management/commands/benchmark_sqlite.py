@@ -0,0 +1,215 @@
+# pool/management/commands/benchmark_sqlite.py
+
+import json
+import multiprocessing
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.utils import timezone
+
+from pool.management.commands.benchmark_pool import seed_benchmark_data
+from pool.models import Game, Season
+from pool.scoring import score_week
+from pool.slow_queries import SlowQueryLogger
+
+
+# Usage
+# python manage.py benchmark_sqlite
+# python manage.py benchmark_sqlite --users 200 --readers 4 --seconds 5 --output sqlite.json
+#
+# Read latency while another process keeps rescoring (flipping winners
+# with Game.save(), which rewrites every pick's points), first with
+# SQLite's defaults (rollback journal) and then with settings.SQLITE_PRAGMAS.
+# Runs on a throwaway database file, so live data is never touched.
+# Each read is one week's picks as the standings load them.
+
+MODES = ("default", "tuned")
+
+
+def pragma_command(mode):
+    if mode == "default":
+        return "PRAGMA journal_mode=DELETE"
+    return ";".join(f"PRAGMA {name}={value}"
+                    for name, value in settings.SQLITE_PRAGMAS.items())
+
+
+def detach_slow_query_log():
+    """Time the database, not the slow query log's own writes."""
+    connection.ensure_connection()
+    connection.execute_wrappers[:] = [
+        w for w in connection.execute_wrappers
+        if not isinstance(w, SlowQueryLogger)
+    ]
+
+
+def reader(season_id, weeks, seconds, start_line, results):
+    detach_slow_query_log()
+    season = Season.objects.get(pk=season_id)
+    games = {week: list(Game.objects.filter(season=season, week=week))
+             for week in weeks}
+    rng = random.Random(os.getpid())
+    timings, errors = [], 0
+    start_line.wait()
+    stop = time.perf_counter() + seconds
+    while time.perf_counter() < stop:
+        week = rng.choice(weeks)
+        start = time.perf_counter()
+        try:
+            score_week(season, week, games[week], backend="rows")
+        except Exception:
+            errors += 1
+        timings.append((time.perf_counter() - start) * 1000)
+    connections.close_all()
+    results.put(("read", timings, errors))
+
+
+def rescorer(season_id, seconds, start_line, results):
+    detach_slow_query_log()
+    games = list(Game.objects.filter(season_id=season_id)
+                 .exclude(winner=None))
+    rng = random.Random(0)
+    timings, errors = [], 0
+    start_line.wait()
+    stop = time.perf_counter() + seconds
+    while time.perf_counter() < stop:
+        game = rng.choice(games)
+        game.winner_id = (game.away_team_id
+                          if game.winner_id == game.home_team_id
+                          else game.home_team_id)
+        start = time.perf_counter()
+        try:
+            game.save()
+        except Exception:
+            errors += 1
+        timings.append((time.perf_counter() - start) * 1000)
+    connections.close_all()
+    results.put(("write", timings, errors))
+
+
+def percentile(timings, pct):
+    return timings[max(int(len(timings) * pct / 100) - 1, 0)] if timings else 0.0
+
+
+class Command(BaseCommand):
+    help = ("Compare SQLite read latency during concurrent rescoring with "
+            "default settings and with SQLITE_PRAGMAS.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100,
+                            help='Users to seed (default 100)')
+        parser.add_argument('--weeks', type=int, default=18,
+                            help='Weeks of games to seed (default 18)')
+        parser.add_argument('--readers', type=int, default=4,
+                            help='Reader processes (default 4)')
+        parser.add_argument('--seconds', type=float, default=5.0,
+                            help='Run time per mode (default 5)')
+        parser.add_argument('--output', type=str, default="",
+                            help='Write JSON results to this file')
+
+    def handle(self, *args, **options):
+        if connection.vendor != "sqlite":
+            raise CommandError("benchmark_sqlite needs a SQLite database.")
+
+        db_options = connection.settings_dict.setdefault("OPTIONS", {})
+        old_name = connection.settings_dict["NAME"]
+        old_init = db_options.get("init_command")
+        test_settings = connection.settings_dict.setdefault("TEST", {})
+        old_test_name = test_settings.get("NAME")
+        fd, path = tempfile.mkstemp(suffix=".sqlite3")
+        os.close(fd)
+        test_settings["NAME"] = path
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+
+        rows = []
+        try:
+            seed_benchmark_data(options['users'], options['weeks'])
+            season = Season.objects.get(is_current=True)
+            weeks = list(Game.objects.filter(season=season)
+                         .values_list("week", flat=True).distinct())
+            for mode in MODES:
+                connections.close_all()
+                db_options["init_command"] = pragma_command(mode)
+                with connection.cursor() as cursor:
+                    cursor.execute("PRAGMA journal_mode")
+                    journal = cursor.fetchone()[0]
+                row = self.run_mode(season.id, weeks, options)
+                row.update(mode=mode, journal_mode=journal)
+                rows.append(row)
+        finally:
+            connections.close_all()
+            db_options["init_command"] = old_init
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            test_settings["NAME"] = old_test_name
+            for suffix in ("-wal", "-shm"):
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+
+        self.stdout.write(
+            f"{options['readers']} readers, 1 rescoring writer, "
+            f"{options['seconds']:.0f} s per mode, {options['users']} users")
+        for row in rows:
+            self.stdout.write(
+                f"  {row['mode']:<8} ({row['journal_mode']:<6}) "
+                f"reads {row['reads']:>6}  p50 {row['read_p50_ms']:>7.1f} ms  "
+                f"p99 {row['read_p99_ms']:>8.1f} ms  max {row['read_max_ms']:>8.1f} ms  "
+                f"read errors {row['read_errors']}  "
+                f"rescores {row['writes']:>4} (p50 {row['write_p50_ms']:.1f} ms)")
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump({
+                    "meta": {"created": timezone.now().isoformat(),
+                             "users": options['users'],
+                             "readers": options['readers'],
+                             "seconds": options['seconds'],
+                             "pragmas": settings.SQLITE_PRAGMAS},
+                    "results": rows,
+                }, f, indent=2)
+            self.stdout.write(f"\nResults saved to {options['output']}")
+
+    def run_mode(self, season_id, weeks, options):
+        ctx = multiprocessing.get_context("fork")
+        results = ctx.Queue()
+        start_line = ctx.Barrier(options['readers'] + 1)
+        connections.close_all()  # never share a connection across fork()
+        pool = [ctx.Process(target=reader,
+                            args=(season_id, weeks, options['seconds'],
+                                  start_line, results))
+                for _ in range(options['readers'])]
+        pool.append(ctx.Process(target=rescorer,
+                                args=(season_id, options['seconds'],
+                                      start_line, results)))
+        for process in pool:
+            process.start()
+
+        reads, writes = [], []
+        read_errors = write_errors = 0
+        for _ in pool:
+            kind, timings, errors = results.get()
+            if kind == "read":
+                reads += timings
+                read_errors += errors
+            else:
+                writes += timings
+                write_errors += errors
+        for process in pool:
+            process.join()
+
+        reads.sort()
+        writes.sort()
+        return {
+            "reads": len(reads),
+            "read_p50_ms": round(statistics.median(reads), 3) if reads else 0.0,
+            "read_p99_ms": round(percentile(reads, 99), 3),
+            "read_max_ms": round(reads[-1], 3) if reads else 0.0,
+            "read_errors": read_errors,
+            "writes": len(writes),
+            "write_p50_ms": round(statistics.median(writes), 3) if writes else 0.0,
+            "write_errors": write_errors,
+        }
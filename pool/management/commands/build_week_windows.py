@@ -0,0 +1,41 @@
+# pool/management/commands/build_week_windows.py
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.timezone import localtime
+
+from pool.models import Season, WeekWindow
+from pool.utils import get_current_season
+
+
+# Usage
+# python manage.py build_week_windows                # current season
+# python manage.py build_week_windows --season 2025
+#
+# The schedule imports run this themselves. Run it after editing game times
+# in the admin or loading games with loaddata. It overwrites hand-edited
+# windows.
+
+class Command(BaseCommand):
+    help = "Rebuild a season's week windows (pick open/close times) from its games."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--season', type=int,
+                            help='Season start year (default: current season)')
+
+    def handle(self, *args, **options):
+        if options['season']:
+            season = Season.objects.filter(year=options['season']).first()
+        else:
+            season = get_current_season()
+        if season is None:
+            raise CommandError("No such season.")
+
+        windows = WeekWindow.generate(season)
+        for window in windows:
+            self.stdout.write(
+                f"  week {window.week:>2} {window.phase:<7} "
+                f"open {localtime(window.opens_at):%a %b %d %H:%M}  "
+                f"close {localtime(window.closes_at):%a %b %d %H:%M}  "
+                f"end {localtime(window.ends_at):%a %b %d %H:%M}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Built {len(windows)} week windows for {season}."))
@@ -0,0 +1,58 @@
+# pool/management/commands/check_pick_sheets.py
+
+from django.core.management.base import BaseCommand, CommandError
+
+from pool.models import Game, PickSheet
+
+
+# Usage
+# python manage.py check_pick_sheets         # report only
+# python manage.py check_pick_sheets --fix   # rebuild mismatched weeks
+#
+# PickSheet rows are bitmask copies of each user's picks for a week, read by
+# the "bitmask" scoring backend. loaddata, bulk_create() and queryset
+# update()/delete() on picks or games bypass the model methods that keep
+# them in step. Run check_pick_weeks first: sheets follow Pick.week.
+
+class Command(BaseCommand):
+    help = "Check that every week's pick sheets match its Pick rows."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix', action='store_true',
+                            help='Rebuild the sheets of every week that does not match')
+
+    def handle(self, *args, **options):
+        weeks = (Game.objects.exclude(season=None)
+                 .values_list("season_id", "week").distinct()
+                 .order_by("season_id", "week"))
+
+        stale = []
+        for season_id, week in weeks:
+            expected = PickSheet.expected(season_id, week)
+            actual = {
+                user_id: (picked, home)
+                for user_id, picked, home in
+                PickSheet.objects.filter(season_id=season_id, week=week)
+                .values_list("user_id", "picked", "home")
+                if picked
+            }
+            if actual != expected:
+                users = {uid for uid in expected.keys() | actual.keys()
+                         if expected.get(uid) != actual.get(uid)}
+                stale.append((season_id, week))
+                self.stdout.write(
+                    f"  season {season_id} week {week}: "
+                    f"{len(users)} users' sheets do not match their picks")
+
+        if not stale:
+            self.stdout.write(self.style.SUCCESS("All pick sheets match their picks."))
+            return
+
+        if not options['fix']:
+            raise CommandError(
+                f"{len(stale)} weeks have stale pick sheets. "
+                f"Run with --fix to rebuild them.")
+
+        for season_id, week in stale:
+            PickSheet.rebuild(season_id, week)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {len(stale)} weeks of pick sheets."))
@@ -0,0 +1,69 @@
+# pool/management/commands/check_pick_weeks.py
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import F, OuterRef, Q, Subquery
+
+from pool.models import Game, Pick, Season
+from pool.utils import get_current_season
+
+
+# Usage
+# python manage.py check_pick_weeks         # report only
+# python manage.py check_pick_weeks --fix   # repair from the games
+#
+# Pick.week and Pick.season are denormalized copies of the pick's game.
+# Rows loaded with loaddata or written with queryset.update()/bulk_create()
+# bypass Pick.save() and Game.save() and can be missing them; games loaded
+# that way can also be missing their season.
+
+class Command(BaseCommand):
+    help = "Check that every game has a season and every pick matches its game."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix', action='store_true',
+                            help='Assign the current season to games without '
+                                 'one and update mismatched picks from their game')
+
+    def handle(self, *args, **options):
+        seasonless = Game.objects.filter(season__isnull=True)
+        stale = Pick.objects.filter(
+            Q(week__isnull=True) | ~Q(week=F("game__week"))
+            | Q(season__isnull=True) | ~Q(season=F("game__season"))
+        )
+        game_count = seasonless.count()
+        pick_count = stale.count()
+
+        if not game_count and not pick_count:
+            self.stdout.write(self.style.SUCCESS("All pick weeks match their games."))
+            return
+
+        if game_count:
+            self.stdout.write(f"  {game_count} games have no season")
+        for pick in stale.select_related("game")[:20]:
+            self.stdout.write(
+                f"  Pick(id={pick.id}) week={pick.week} season={pick.season_id} "
+                f"game week={pick.game.week} season={pick.game.season_id}")
+
+        if not options['fix']:
+            raise CommandError(
+                f"{game_count} games without a season and {pick_count} picks "
+                f"that do not match their game. Run with --fix to repair them.")
+
+        if game_count:
+            season = get_current_season()
+            if season is None:
+                raise CommandError("No current season to assign. Create one first.")
+            seasonless.update(season=season)
+
+        game = Game.objects.filter(pk=OuterRef("game_id"))
+        fixed = Pick.objects.filter(
+            Q(week__isnull=True) | ~Q(week=F("game__week"))
+            | Q(season__isnull=True) | ~Q(season=F("game__season"))
+        ).update(
+            week=Subquery(game.values("week")[:1]),
+            season=Subquery(game.values("season")[:1]),
+        )
+        for season_id in Season.objects.values_list("id", flat=True):
+            Season.record_change(season_id)
+        self.stdout.write(self.style.SUCCESS(
+            f"Assigned a season to {game_count} games and fixed {fixed} picks."))
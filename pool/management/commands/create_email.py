@@ -1,96 +1,61 @@
 from allauth.account.signals import email_added
 from django.core.management.base import BaseCommand
-from django.db.models import Count
 
 from pool.models import *
+from pool.scoring import rank_rows, score_week
+from pool.utils import get_current_season
 
 User = get_user_model()
-from openai import OpenAI
 import os
 
 key = os.getenv('OPENAI_API_KEY')
 
 
-def get_all_weeks_summary():
+def get_all_weeks_summary(season=None):
     users = User.objects.all()
+    season = season or get_current_season()
 
     # Grab all distinct weeks, descending
-    weeks = Game.objects.values_list("week", flat=True).distinct().order_by(
-        "-week")
+    weeks = Game.objects.filter(season=season).values_list(
+        "week", flat=True).distinct().order_by("-week")
 
     all_summaries = []
 
     for week in weeks:
-        games = Game.objects.filter(week=week).select_related(
+        games = Game.objects.filter(season=season, week=week).select_related(
             "home_team", "away_team", "winner"
         ).order_by("game_time")
 
-        if not Pick.objects.filter(game__in=games).exists():
+        picks = list(
+            Pick.objects.filter(season=season, week=week).select_related(
+                "picked_team", "game", "game__winner", "game__home_team",
+                "game__away_team")
+        )
+        if not picks:
             continue
 
-        week_summary = []
-
-        # --- Precompute uniqueness ---
-        unique_map = (
-            Pick.objects.filter(game__in=games)
-            .values("game_id", "picked_team_id")
-            .annotate(count=Count("id"))
-            .filter(count=1)
-        )
-        unique_set = {(u["game_id"], u["picked_team_id"]) for u in
-            unique_map}
+        # Regular season rules: unique correct pick +2, perfect week +3
+        score = score_week(season, week, games, unique_bonus=2,
+                           perfect_bonus=3)
+        # Read only: Pick.bonus_points belongs to the dashboard's scoring,
+        # which would otherwise be overwritten with these email-only bonuses
+        picks_by_user = {}
+        for pick in picks:
+            picks_by_user.setdefault(pick.user_id, {})[pick.game_id] = pick
 
+        week_summary = []
         for user in users:
-            picks = Pick.objects.filter(user=user,
-                                        game__in=games).select_related(
-                "picked_team", "game", "game__winner"
-            )
-            picks_by_game = {pick.game_id: pick for pick in picks}
-
-            # --- Recompute points per pick ---
-            earned_points = 0
-            wins = 0
-
-            for pick in picks:
-                # Base points
-                base = pick.game.points if pick.picked_team_id == pick.game.winner_id else 0
-                if base > 0:
-                    wins += 1
-
-                # Unique bonus (only if pick is correct and unique)
-                unique_bonus = 2 if (pick.game_id,
-                    pick.picked_team_id) in unique_set and base > 0 else 0
-
-                # Update Pick.bonus_points if it differs
-                if pick.bonus_points != unique_bonus:
-                    pick.bonus_points = unique_bonus
-                    pick.save(update_fields=["bonus_points"])
-
-                earned_points += base + unique_bonus
-
-            # Perfect week bonus
-            perfect_week_bonus = 3 if wins and wins == len(games) else 0
-            earned_points += perfect_week_bonus
-
+            picks_by_game = picks_by_user.get(user.id, {})
             week_summary.append({
                 "user_id": user.id,
                 "user": user.fname,
                 "picks": [picks_by_game.get(game.id) for game in games],
-                "points_earned": earned_points,
+                "points_earned": score.points.get(user.id, 0),
                 "week": week,
-                "perfect_week": bool(perfect_week_bonus),
+                "perfect_week": bool(score.perfect_week_bonus(user.id)),
             })
 
-        # Sort & rank
-        week_summary.sort(key=lambda r: r["points_earned"], reverse=True)
-
-        current_rank = 0
-        last_points = None
-        for idx, row in enumerate(week_summary, start=1):
-            if row["points_earned"] != last_points:
-                current_rank = idx
-                last_points = row["points_earned"]
-            row["rank"] = current_rank
+        rank_rows(week_summary, "points_earned")
 
         all_summaries.append({
             "week": week,
@@ -213,6 +178,17 @@ def build_full_results_package(weeks_summary):
     return package
 
 
+def compute_full_results_package(season):
+    return build_full_results_package(
+        serialize_weeks_summary(get_all_weeks_summary(season)))
+
+
+def get_full_results_package(season):
+    """The season's results package, shared through WarmResult."""
+    return WarmResult.get_or_compute(
+        season, "email_package", lambda: compute_full_results_package(season))
+
+
 def trim_full_results_for_llm(full_results):
     """
     Aggressively trims the full results package for LLM input.
@@ -266,10 +242,11 @@ class Command(BaseCommand):
     help = "Quickly generate a past week's games, picks, and winners for testing."
 
     def handle(self, *args, **options):
+        # Imported here: the summary helpers above are used without openai
+        from openai import OpenAI
         client = OpenAI(api_key=key)
-        raw_summaries = get_all_weeks_summary()
-        serialized = serialize_weeks_summary(raw_summaries)
-        full_results_package = build_full_results_package(serialized)
+        season = get_current_season()
+        full_results_package = get_full_results_package(season)
         trimmed_full_results_package = trim_full_results_for_llm(
             full_results_package)
 
@@ -288,7 +265,7 @@ class Command(BaseCommand):
             }
         pool_data = trim_full_results_for_llm(last_three_weeks)
         current_week = pool_data["weeks"][0]["week"] - 1
-        note_obj = WeeklyNote.objects.filter(week=current_week)
+        note_obj = WeeklyNote.objects.filter(season=season, week=current_week)
 
         notes = note_obj.values_list('notes', flat=True)
         total_input_tokens = 0
@@ -371,6 +348,7 @@ class Command(BaseCommand):
         total_combined_tokens = total_input_tokens + total_output_tokens
 
         email = Email(
+            season=season,
             pool_data=pool_data,
             # game_recap_input_tokens=game_recap_input_tokens,
             # game_recap_output_tokens=game_recap_output_tokens,
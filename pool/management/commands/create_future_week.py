@@ -4,7 +4,7 @@ from django.contrib.auth import get_user_model
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 
-from pool.models import Team, Game
+from pool.models import Team, Game, WeekWindow
 
 User = get_user_model()
 
@@ -66,6 +66,9 @@ class Command(BaseCommand):
             )
             games.append(game)
 
+        if games and games[0].season:
+            WeekWindow.generate(games[0].season)
+
         self.stdout.write(self.style.SUCCESS(
             f"Created {num_games} games for week {week_number} without picks "
             f"or winners."
@@ -6,7 +6,7 @@ from django.contrib.auth import get_user_model
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 
-from pool.models import Team, Game, Pick
+from pool.models import Team, Game, Pick, Season, WeekWindow
 
 User = get_user_model()
 
@@ -30,6 +30,11 @@ class Command(BaseCommand):
                             )
 
     def handle(self, *args, **options):
+        # One data_version bump for the whole week, not one per pick
+        with Season.batch_changes():
+            self.create_week(**options)
+
+    def create_week(self, **options):
         week_number = options['week']
         num_games = options['games']
         num_weeks = options['num_weeks']
@@ -68,6 +73,9 @@ class Command(BaseCommand):
             )
             games.append(game)
 
+        if games and games[0].season:
+            WeekWindow.generate(games[0].season)
+
         # Create picks for each user
         for user in users:
             for game in games:
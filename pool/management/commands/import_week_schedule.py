@@ -5,7 +5,8 @@ import json
 from django.core.management.base import BaseCommand, CommandError
 from django.utils.dateparse import parse_datetime
 
-from pool.models import Team, Game
+from pool.models import Team, Game, Season, WeekWindow
+from pool.utils import get_current_season
 
 
 class Command(BaseCommand):
@@ -15,11 +16,18 @@ class Command(BaseCommand):
         parser.add_argument('week', type=int, help='Week number (e.g., 1)')
         parser.add_argument('file_path', type=str,
                             help='Path to the JSON schedule file for the week')
+        parser.add_argument('--season', type=int,
+                            help='Season start year (default: current season)')
 
     def handle(self, *args, **options):
         week = options['week']
         file_path = options['file_path']
 
+        if options['season']:
+            season, _ = Season.objects.get_or_create(year=options['season'])
+        else:
+            season = get_current_season()
+
         try:
             with open(file_path, 'r') as f:
                 games = json.load(f)
@@ -45,6 +53,7 @@ class Command(BaseCommand):
                     raise ValueError(f"Invalid datetime: {game_time_str}")
 
                 Game.objects.create(
+                    season=season,
                     week=week,
                     home_team=home_team,
                     away_team=away_team,
@@ -57,5 +66,8 @@ class Command(BaseCommand):
                 self.stderr.write(
                     self.style.ERROR(f"Error importing game: {e}"))
 
+        if created and season:
+            WeekWindow.generate(season)
+
         self.stdout.write(self.style.SUCCESS(
             f"Successfully imported {created} games for week {week}"))
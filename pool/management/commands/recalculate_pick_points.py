@@ -1,7 +1,7 @@
 # # pool/management/commands/recalculate_pick_points.py
 #
 # from django.core.management.base import BaseCommand
-# from pool.models import Pick
+# from pool.models import Pick, Season
 #
 # class Command(BaseCommand):
 #     help = "Recalculate points_earned and is_correct for all picks."
@@ -25,7 +25,7 @@
 
 from django.core.management.base import BaseCommand
 
-from pool.models import Pick
+from pool.models import Pick, Season
 
 
 class Command(BaseCommand):
@@ -34,11 +34,13 @@ class Command(BaseCommand):
     def handle(self, *args, **options):
         updated = 0
         picks = Pick.objects.select_related('game', 'picked_team')
-        for pick in picks:
-            game = pick.game
-            if game.winner:
-                pick.is_correct = pick.picked_team == game.winner
-                pick.points_earned = game.points if pick.is_correct else 0
-                pick.save(update_fields=['is_correct', 'points_earned'])
-                updated += 1
+        # One data_version bump per season for the whole run
+        with Season.batch_changes():
+            for pick in picks:
+                game = pick.game
+                if game.winner:
+                    pick.is_correct = pick.picked_team == game.winner
+                    pick.points_earned = game.points if pick.is_correct else 0
+                    pick.save(update_fields=['is_correct', 'points_earned'])
+                    updated += 1
         self.stdout.write(self.style.SUCCESS(f"Updated {updated} picks."))
@@ -0,0 +1,79 @@
+# pool/management/commands/run_pool_worker.py
+
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from pool.jobs import require_shared_database, work, worker_name
+from pool.scheduler import Scheduler
+
+
+# Usage
+# python manage.py run_pool_worker
+# python manage.py run_pool_worker --once
+# python manage.py run_pool_worker --same-machine    # SQLite, next to runserver
+#
+# Claims and runs queued PoolJob rows (pool.jobs), such as the admin's
+# Update Points Earned and Create Email, until stopped. SIGTERM or SIGINT
+# lets the running job finish first. Any number of workers can run
+# against the same database; --once drains the queue and exits, e.g. from
+# cron where no long-running process is available. --with-scheduler also
+# runs run_scheduler's loop in a thread.
+#
+# Only needed with POOL_JOB_RUNNER=worker; with inline the web process runs
+# the jobs and the scheduler itself. The worker finds jobs through the
+# database, so it must use the web server's: on SQLite it refuses to start
+# unless --same-machine says the web server uses the same file.
+
+
+def run_scheduler(stop):
+    try:
+        Scheduler().run(stop)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = "Run queued pool jobs."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='Exit once the queue is empty')
+        parser.add_argument('--poll', type=float, default=2.0,
+                            help='Seconds between checks of an empty queue '
+                                 '(default 2)')
+        parser.add_argument('--max-jobs', type=int, default=None,
+                            help='Exit after running this many jobs')
+        parser.add_argument('--with-scheduler', action='store_true',
+                            help='Also fire week transitions (run_scheduler) '
+                                 'in this process')
+        parser.add_argument('--same-machine', action='store_true',
+                            help='Allow SQLite: the web server runs on this '
+                                 'machine and uses the same database file')
+
+    def handle(self, *args, **options):
+        require_shared_database(options['same_machine'], "worker")
+        stop = threading.Event()
+
+        def shut_down(signum, frame):
+            self.stdout.write("Stopping after the current job...")
+            stop.set()
+
+        signal.signal(signal.SIGTERM, shut_down)
+        signal.signal(signal.SIGINT, shut_down)
+
+        scheduler = None
+        if options['with_scheduler']:
+            scheduler = threading.Thread(target=run_scheduler, args=(stop,),
+                                         name="pool-scheduler", daemon=True)
+            scheduler.start()
+
+        self.stdout.write(f"Pool worker {worker_name()} started.")
+        ran = work(once=options['once'], poll_seconds=options['poll'],
+                   max_jobs=options['max_jobs'], stop=stop)
+        if scheduler is not None:
+            stop.set()
+            scheduler.join()
+        self.stdout.write(self.style.SUCCESS(f"Ran {ran} job(s)."))
@@ -0,0 +1,69 @@
+# pool/management/commands/run_scheduler.py
+
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from pool.jobs import require_shared_database
+from pool.scheduler import ACTIONS, Scheduler
+
+
+# Usage
+# python manage.py run_scheduler
+# python manage.py run_scheduler --once
+# python manage.py run_scheduler --list
+# python manage.py run_scheduler --same-machine    # SQLite, next to runserver
+#
+# Fires the registered actions (pool.scheduler) at each week's pick_open,
+# remind, pick_close and week_end, sleeping until the next one. --once fires what
+# is due and exits, for cron; --list prints the transitions still to come.
+# `run_pool_worker --with-scheduler` runs the same loop next to the jobs.
+#
+# With POOL_JOB_RUNNER=inline (the default) every web process already runs
+# this loop. On its own it must share the web server's database: on SQLite
+# it refuses to fire anything unless --same-machine says the web server
+# uses the same file.
+
+
+class Command(BaseCommand):
+    help = "Fire actions at each week's pick open, pick close and week end."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='Fire the transitions that are due and exit')
+        parser.add_argument('--list', action='store_true',
+                            help='List upcoming transitions and their actions')
+        parser.add_argument('--same-machine', action='store_true',
+                            help='Allow SQLite: the web server runs on this '
+                                 'machine and uses the same database file')
+
+    def handle(self, *args, **options):
+        scheduler = Scheduler()
+        if options['list']:
+            now = timezone.now()
+            for event in scheduler.load():
+                if event.at > now:
+                    actions = ", ".join(a.__name__ for a in ACTIONS[event.kind])
+                    self.stdout.write(
+                        f"{timezone.localtime(event.at):%a %Y-%m-%d %H:%M}  "
+                        f"week {event.week:<3} {event.kind:<10} "
+                        f"{actions or '-'}")
+            return
+
+        require_shared_database(options['same_machine'], "scheduler")
+        if options['once']:
+            fired = scheduler.run_due()
+            self.stdout.write(f"Fired {len(fired)} transition(s).")
+            return
+
+        stop = threading.Event()
+
+        def shut_down(signum, frame):
+            stop.set()
+
+        signal.signal(signal.SIGTERM, shut_down)
+        signal.signal(signal.SIGINT, shut_down)
+        self.stdout.write("Scheduler started.")
+        scheduler.run(stop)
@@ -0,0 +1,40 @@
+# pool/management/commands/season_report.py
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from pool.archive import load_season_archive
+
+
+# Usage
+# python manage.py season_report 2025                            # print the report
+# python manage.py season_report 2025 --output season_picks.txt
+#
+# Regenerates the season_picks.txt report from an archive_season file.
+
+class Command(BaseCommand):
+    help = "Write the season picks report for an archived season."
+
+    def add_arguments(self, parser):
+        parser.add_argument('year', type=int, help='Season year, e.g. 2025')
+        parser.add_argument('--archive-dir',
+                            help='Directory holding the archive (default: POOL_ARCHIVE_DIR)')
+        parser.add_argument('--output', help='Write the report to this file')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        try:
+            archive = load_season_archive(options['year'], options['archive_dir'])
+        except FileNotFoundError:
+            raise CommandError(
+                f"No archive for {options['year']}. Run archive_season first.")
+        report = archive.season_report()
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        if options['output']:
+            with open(options['output'], "w") as f:
+                f.write(report)
+            self.stderr.write(f"Wrote {options['output']} in {elapsed_ms:.0f} ms")
+        else:
+            self.stdout.write(report)
+            self.stderr.write(f"Generated in {elapsed_ms:.0f} ms")
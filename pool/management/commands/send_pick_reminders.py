@@ -0,0 +1,48 @@
+# pool/management/commands/send_pick_reminders.py
+
+from django.core.management.base import BaseCommand
+
+from pool.reminders import by_user, missing_picks, send_reminders
+from pool.utils import get_current_season, get_week_info
+
+
+# Usage
+# python manage.py send_pick_reminders
+# python manage.py send_pick_reminders --dry-run
+# python manage.py send_pick_reminders --week 5
+#
+# Emails each active user who has not picked every game of the week that
+# is still open, listing those games (pool.reminders). A user is
+# reminded once per week: sends are recorded as PickReminder rows, so a
+# second run only reaches users it missed. pool.scheduler queues this
+# POOL_REMINDER_LEAD_HOURS before picks close.
+
+
+class Command(BaseCommand):
+    help = "Email users who are missing picks for this week's open games."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--week', type=int, default=None,
+                            help='Week (default: the current week)')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='List who would be reminded without sending')
+
+    def handle(self, *args, **options):
+        season = get_current_season()
+        if season is None:
+            self.stdout.write("No current season; no reminders to send.")
+            return
+        week = options['week'] or get_week_info()['week']
+
+        already = sum(1 for user in by_user(missing_picks(season, week))
+                      if user['reminded_at'] is not None)
+        users = send_reminders(season, week, dry_run=options['dry_run'])
+        for user in users:
+            self.stdout.write(
+                f"  {user['name']:<20} {user['email']:<32} "
+                f"{len(user['games'])} game(s)")
+
+        verb = "Would remind" if options['dry_run'] else "Reminded"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {len(users)} user(s) for {season} week {week}; "
+            f"{already} already reminded."))
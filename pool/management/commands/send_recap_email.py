@@ -0,0 +1,67 @@
+# pool/management/commands/send_recap_email.py
+
+from django.core.management.base import BaseCommand, CommandError
+
+from pool.mailing import recap_recipients, send_recap
+from pool.models import Email
+
+
+# Usage
+# python manage.py send_recap_email --email-id 12
+# python manage.py send_recap_email --email-id 12 --dry-run
+# python manage.py send_recap_email --email-id 12 --batch-size 100 --again
+#
+# Sends a recap Email to every active user, one message each, in batches
+# over one mail connection per batch (pool.mailing). Progress is saved
+# after every batch as an EmailDelivery with its throughput and failures,
+# so a rerun (or a retried job) only sends to addresses not reached yet;
+# --again sends to everyone.
+# "Save and send" in the admin queues this as a job (pool.jobs).
+
+
+class Command(BaseCommand):
+    help = "Send a recap email to every active user in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--email-id', type=int, required=True,
+                            help='The Email to send')
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help='Messages per batch (default: POOL_EMAIL_BATCH_SIZE)')
+        parser.add_argument('--again', action='store_true',
+                            help='Also send to addresses already reached')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='List the recipients without sending')
+
+    def handle(self, *args, **options):
+        try:
+            email = Email.objects.get(pk=options['email_id'])
+        except Email.DoesNotExist:
+            raise CommandError(f"No email {options['email_id']}.")
+
+        if options['dry_run']:
+            addresses = recap_recipients(email, options['again'])
+            for address in addresses:
+                self.stdout.write(f"  {address}")
+            self.stdout.write(self.style.SUCCESS(
+                f"Would send '{email}' to {len(addresses)} recipient(s)."))
+            return
+
+        delivery = send_recap(email, options['batch_size'], options['again'],
+                              progress=self.progress)
+        for failure in delivery.failures:
+            self.stdout.write(f"  FAILED {failure['address']}: {failure['error']}")
+        message = (f"Sent '{email}' to {delivery.sent} of "
+                   f"{delivery.recipients} recipient(s) in "
+                   f"{len(delivery.batches)} batch(es), "
+                   f"{delivery.per_second} messages/s.")
+        if delivery.failed:
+            raise CommandError(f"{message} {delivery.failed} failed; "
+                               f"run again to retry them.")
+        self.stdout.write(self.style.SUCCESS(message))
+
+    def progress(self, delivery, batch):
+        self.stdout.write(
+            f"  batch {batch.number:>3}: {len(batch.sent):>4} sent, "
+            f"{len(batch.failed):>3} failed, {batch.ms:>8.1f} ms "
+            f"({batch.per_second:.1f}/s); {delivery.sent} of "
+            f"{delivery.recipients} sent")
@@ -0,0 +1,78 @@
+# pool/management/commands/sync_replica.py
+
+import sqlite3
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from pool.routers import REPLICA, has_replica
+
+
+# Usage
+# DATABASE_REPLICA_URL=sqlite:///replica.sqlite3 python manage.py sync_replica
+#
+# Stands in for replication when trying the replica router locally: copies
+# the primary database over the replica. Run it again to let the replica
+# catch up. SQLite files are copied with the online backup API; PostgreSQL
+# databases on the same server are dropped and recreated from the primary
+# as a template, which needs the primary to be idle.
+
+
+def close(conn):
+    conn.close()
+    if hasattr(conn, "close_pool"):
+        conn.close_pool()
+
+
+def copy_database(source_alias, target_alias):
+    source, target = connections[source_alias], connections[target_alias]
+    if source.vendor != target.vendor:
+        raise CommandError(
+            f"Cannot copy {source.vendor} into {target.vendor}.")
+    close(target)
+
+    if source.vendor == "sqlite":
+        source.ensure_connection()
+        copy = sqlite3.connect(target.settings_dict["NAME"])
+        try:
+            source.connection.backup(copy)
+        finally:
+            copy.close()
+    elif source.vendor == "postgresql":
+        # A template database cannot have other sessions open
+        close(source)
+        quote = source.ops.quote_name
+        with source._nodb_cursor() as cursor:
+            cursor.execute(
+                f"DROP DATABASE IF EXISTS {quote(target.settings_dict['NAME'])}")
+            cursor.execute(
+                f"CREATE DATABASE {quote(target.settings_dict['NAME'])} "
+                f"TEMPLATE {quote(source.settings_dict['NAME'])}")
+    else:
+        raise CommandError(f"Copying {source.vendor} databases is not supported.")
+
+
+class Command(BaseCommand):
+    help = "Copy the primary database over the local read replica."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--noinput', '--no-input', action='store_false',
+                            dest='interactive',
+                            help='Do not ask before overwriting the replica')
+
+    def handle(self, *args, **options):
+        if not has_replica():
+            raise CommandError("No replica configured; set DATABASE_REPLICA_URL.")
+        primary = connections[DEFAULT_DB_ALIAS].settings_dict["NAME"]
+        replica = connections[REPLICA].settings_dict["NAME"]
+        if primary == replica:
+            raise CommandError("The replica and the primary are the same database.")
+
+        if options['interactive']:
+            answer = input(f"Overwrite {replica} with a copy of {primary}? [y/N] ")
+            if answer.strip().lower() != "y":
+                self.stdout.write("Cancelled.")
+                return
+
+        copy_database(DEFAULT_DB_ALIAS, REPLICA)
+        self.stdout.write(self.style.SUCCESS(f"Copied {primary} to {replica}."))
@@ -1,7 +1,8 @@
 from django.contrib.auth import get_user_model
 from django.core.management.base import BaseCommand
 
-from pool.models import Game, Pick
+from pool.models import Game, Pick, Season
+from pool.utils import get_current_season
 
 User = get_user_model()
 
@@ -15,47 +16,51 @@ class Command(BaseCommand):
         total_updated = 0
         total_bonus_awarded = 0
 
-        games_with_winner = Game.objects.exclude(winner__isnull=True)
+        season = get_current_season()
+        games_with_winner = Game.objects.filter(season=season).exclude(
+            winner__isnull=True)
         weeks_played = set()
-        for game in games_with_winner:
-
-            weeks_played.add(game.week)
-
-            picks = list(Pick.objects.filter(game=game))
-
-            # Identify correct picks
-            correct_picks = [p for p in picks if
-                p.picked_team_id == game.winner_id]
-
-            for pick in picks:
-                if pick.picked_team_id == game.winner_id:
-                    pick.points_earned = game.points
-                else:
-                    pick.points_earned = 0
-                    pick.bonus_points = 0  # <-- clear stale bonus
-                pick.save()
-
-            # Apply bonus if exactly one correct pick exists
-            if len(correct_picks) == 1:
-                unique_pick = correct_picks[0]
-                if unique_pick.bonus_points < UNIQUE_CORRECT_BONUS:
-                    unique_pick.bonus_points = UNIQUE_CORRECT_BONUS
-                    unique_pick.save()
-                    total_bonus_awarded += 1
-                    self.stdout.write(
-                        f"Applied UNIQUE_CORRECT_BONUS to Pick(id={unique_pick.id}, user={unique_pick.user.username})"
-                    )
+        # One data_version bump for the whole run
+        with Season.batch_changes():
+            for game in games_with_winner:
+
+                weeks_played.add(game.week)
+
+                picks = list(Pick.objects.filter(game=game))
+
+                # Identify correct picks
+                correct_picks = [p for p in picks if
+                    p.picked_team_id == game.winner_id]
+
+                for pick in picks:
+                    if pick.picked_team_id == game.winner_id:
+                        pick.points_earned = game.points
+                    else:
+                        pick.points_earned = 0
+                        pick.bonus_points = 0  # <-- clear stale bonus
+                    pick.save()
+
+                # Apply bonus if exactly one correct pick exists
+                if len(correct_picks) == 1:
+                    unique_pick = correct_picks[0]
+                    if unique_pick.bonus_points < UNIQUE_CORRECT_BONUS:
+                        unique_pick.bonus_points = UNIQUE_CORRECT_BONUS
+                        unique_pick.save()
+                        total_bonus_awarded += 1
+                        self.stdout.write(
+                            f"Applied UNIQUE_CORRECT_BONUS to Pick(id={unique_pick.id}, user={unique_pick.user.username})"
+                        )
 
         self.stdout.write(self.style.SUCCESS(
             f"Finished updating {total_updated} picks and awarded {total_bonus_awarded} unique correct bonuses."
         ))
         #############################
         for week in weeks_played:
-            games = Game.objects.filter(week=week)
+            games = Game.objects.filter(season=season, week=week)
             for user in User.objects.all():
                 wins = 0
-                for pick in Pick.objects.filter(game__in=games).filter(
-                        user=user):
+                for pick in Pick.objects.filter(season=season, week=week).filter(
+                        user=user).select_related("game"):
                     if pick.picked_team_id == pick.game.winner_id:
                         wins += 1
 
@@ -0,0 +1,94 @@
+# pool/management/commands/warm_pool_caches.py
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from pool.management.commands.create_email import compute_full_results_package
+from pool.models import Season, WarmResult
+from pool.utils import get_current_season, get_week_info
+from pool.views import DashboardView
+
+
+# Usage
+# python manage.py warm_pool_caches
+# python manage.py warm_pool_caches --season 2025 --force
+#
+# Precomputes the results the dashboard and the recap email read
+# (standings, every week's summary, the email data package) and stores
+# them as WarmResult rows for the season's current data version, so the
+# first visitor after a deploy or after results are entered does not pay
+# for them. Runs after `migrate` in the release command and after
+# update_points_earned in the admin. Results that are still current (same
+# data version and WarmResult.RESULT_FORMAT) are left alone unless --force;
+# concurrent runs upsert the same rows.
+
+
+def items(season):
+    view = DashboardView()
+    # week_summaries first: it fixes up bonus points, which moves the data
+    # version the others are stored under
+    return {
+        "week_summaries": lambda: view.compute_week_summaries(season),
+        "standings": lambda: view.compute_overall_standings(season),
+        "email_package": lambda: compute_full_results_package(season),
+    }
+
+
+class Command(BaseCommand):
+    help = ("Precompute and store the season's standings, week summaries "
+            "and email data package.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--season', type=int, default=None,
+                            help='Season year (default: the current season)')
+        parser.add_argument('--force', action='store_true',
+                            help='Recompute results that are still current')
+        parser.add_argument('--strict', action='store_true',
+                            help='Exit with an error if any item fails')
+
+    def handle(self, *args, **options):
+        if options['season']:
+            season = Season.objects.filter(year=options['season']).first()
+            if season is None:
+                raise CommandError(f"No season {options['season']}.")
+            if season.is_archived:
+                raise CommandError(
+                    f"{season} is archived and served from its archive file.")
+        else:
+            season = get_current_season()
+            if season is None:
+                self.stdout.write("No current season; nothing to warm.")
+                return
+
+        failed = []
+        start = time.perf_counter()
+        self.timed("week_info", get_week_info, failed)
+        for name, compute in items(season).items():
+            if not options['force'] and WarmResult.fetch(season, name) is not None:
+                self.stdout.write(f"  {name:<16} current, skipped")
+                continue
+            self.timed(name, lambda: WarmResult.compute(season, name, compute),
+                       failed)
+
+        total_ms = (time.perf_counter() - start) * 1000
+        if failed:
+            message = (f"{len(failed)} item(s) failed for {season}: "
+                       f"{', '.join(failed)}")
+            if options['strict']:
+                raise CommandError(message)
+            self.stdout.write(self.style.WARNING(message))
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f"Warmed {season} in {total_ms:.0f} ms."))
+
+    def timed(self, name, func, failed):
+        start = time.perf_counter()
+        try:
+            func()
+        except Exception as e:
+            failed.append(name)
+            self.stdout.write(f"  {name:<16} FAILED: {e}")
+            return
+        self.stdout.write(
+            f"  {name:<16} {(time.perf_counter() - start) * 1000:>8.1f} ms")
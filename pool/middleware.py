@@ -1,8 +1,18 @@
 # pool/middleware.py
+import cProfile
+import marshal
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
 from django.shortcuts import render
 from django.urls import resolve
 
-from .models import PoolSettings
+from . import routers
+from .instrumentation import RequestTiming, route_stats, log_request
+from .models import PoolSettings, RequestProfile
 
 class SiteMaintenanceMiddleware:
     """
@@ -34,3 +44,130 @@ class SiteMaintenanceMiddleware:
 
         # Otherwise continue normally
         return self.get_response(request)
+
+
+class PrimaryStickyMiddleware:
+    """
+    Read-your-writes with a read replica. A request that writes gets a
+    short-lived cookie, and requests carrying it read from the primary
+    until the replica has had POOL_REPLICA_STICKY_SECONDS to catch up.
+    """
+
+    cookie_name = "pool_primary"
+
+    def __init__(self, get_response):
+        if not routers.has_replica():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with routers.replica_reads(pinned=self.cookie_name in request.COOKIES):
+            response = self.get_response(request)
+            wrote = routers.wrote()
+        if wrote:
+            response.set_cookie(
+                self.cookie_name, "1",
+                max_age=getattr(settings, "POOL_REPLICA_STICKY_SECONDS", 10),
+                httponly=True, samesite="Lax")
+        return response
+
+
+class RequestTimingMiddleware:
+    """
+    Records query count, DB time, view time and template render time for
+    every request. Writes them as one JSON log line on the "pool.timing"
+    logger and a Server-Timing header, flags requests over
+    POOL_REQUEST_BUDGETS, and feeds the per-route percentiles shown in the
+    pool admin.
+
+    Template time is only split out for TemplateResponse views (e.g.
+    DashboardView); views that call render() report it as view time.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, "POOL_REQUEST_TIMING", True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timing = RequestTiming()
+        request.pool_timing = timing
+
+        with ExitStack() as stack:
+            for conn in connections.all():
+                stack.enter_context(conn.execute_wrapper(timing))
+            response = self.get_response(request)
+
+        now = time.perf_counter()
+        timing.total_ms = (now - timing.start) * 1000
+        if timing.view_start is not None:
+            timing.view_ms = ((now - timing.view_start) * 1000
+                              - timing.template_ms)
+
+        response["Server-Timing"] = timing.server_timing()
+        log_request(request, response, timing)
+        route_stats.record(timing)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        timing = request.pool_timing
+        timing.view_start = time.perf_counter()
+        match = request.resolver_match
+        timing.route = match.view_name if match else None
+
+    def process_template_response(self, request, response):
+        timing = request.pool_timing
+        render = response.render
+
+        def timed_render():
+            start = time.perf_counter()
+            try:
+                return render()
+            finally:
+                timing.template_ms += (time.perf_counter() - start) * 1000
+
+        response.render = timed_render
+        return response
+
+
+class ProfilerMiddleware:
+    """
+    Runs a request under cProfile when a superuser asks for it with
+    ?_profile=1 or an X-Pool-Profile header, and stores the stats dump as a
+    RequestProfile for the pool admin. Requests without the trigger go
+    straight through.
+
+    Must come after AuthenticationMiddleware.
+    """
+
+    query_param = "_profile"
+    header = "HTTP_X_POOL_PROFILE"
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if self.header not in request.META and self.query_param not in request.GET:
+            return self.get_response(request)
+        if not getattr(request.user, "is_superuser", False):
+            return self.get_response(request)
+
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+        response = profiler.runcall(self.get_response, request)
+        duration_ms = (time.perf_counter() - start) * 1000
+        profiler.create_stats()
+
+        profile = RequestProfile.objects.create(
+            user=request.user,
+            method=request.method,
+            path=request.get_full_path()[:500],
+            duration_ms=duration_ms,
+            stats=marshal.dumps(profiler.stats),
+        )
+        response["X-Pool-Profile-Id"] = str(profile.pk)
+
+        keep = getattr(settings, "POOL_PROFILE_KEEP", 50)
+        stale = RequestProfile.objects.values_list("pk", flat=True)[keep:]
+        RequestProfile.objects.filter(pk__in=list(stale)).delete()
+        return response
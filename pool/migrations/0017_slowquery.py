@@ -0,0 +1,34 @@
+# Generated by Django 5.2.5 on 2026-10-19 16:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pool', '0016_requestprofile'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlowQuery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fingerprint', models.CharField(max_length=40, unique=True)),
+                ('normalized_sql', models.TextField()),
+                ('sample_sql', models.TextField()),
+                ('explain', models.TextField(blank=True)),
+                ('vendor', models.CharField(max_length=20)),
+                ('source', models.CharField(blank=True, max_length=255)),
+                ('count', models.PositiveIntegerField(default=1)),
+                ('total_ms', models.FloatField(default=0)),
+                ('max_ms', models.FloatField(default=0)),
+                ('first_seen', models.DateTimeField()),
+                ('last_seen', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name_plural': 'Slow queries',
+                'ordering': ('-total_ms',),
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.5 on 2026-10-19 16:03
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pool', '0017_slowquery'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='game',
+            index=models.Index(fields=['week', 'game_time'], name='pool_game_week_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='game',
+            index=models.Index(fields=['game_time'], name='pool_game_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pick',
+            index=models.Index(fields=['game', 'picked_team'], name='pool_pick_game_team_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.5 on 2026-10-19 16:04
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_pick_week(apps, schema_editor):
+    Game = apps.get_model("pool", "Game")
+    Pick = apps.get_model("pool", "Pick")
+    Pick.objects.update(
+        week=Subquery(Game.objects.filter(pk=OuterRef("game_id")).values("week")[:1])
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pool', '0018_access_pattern_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pick',
+            name='week',
+            field=models.PositiveSmallIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='pick',
+            index=models.Index(fields=['week', 'user'], name='pool_pick_week_user_idx'),
+        ),
+        migrations.RunPython(backfill_pick_week, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,89 @@
+# Generated by Django 5.2.5 on 2026-10-19 16:06
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def create_first_season(apps, schema_editor):
+    """Everything recorded so far belongs to the 2025-26 season."""
+    Season = apps.get_model("pool", "Season")
+    season, _ = Season.objects.get_or_create(
+        year=2025, defaults={"name": "2025-26", "is_current": True})
+    for model_name in ("Game", "Pick", "Score", "Email", "WeeklyNote"):
+        model = apps.get_model("pool", model_name)
+        model.objects.filter(season__isnull=True).update(season=season)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pool', '0019_pick_week'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Season',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveSmallIntegerField(help_text='Year the season starts, e.g. 2025 for 2025-26', unique=True)),
+                ('name', models.CharField(blank=True, max_length=20)),
+                ('is_current', models.BooleanField(default=False, help_text='Only one season is current; the site reads and writes it.')),
+                ('is_archived', models.BooleanField(default=False, help_text='Finished season. Excluded from live queries.')),
+            ],
+            options={
+                'ordering': ('-year',),
+            },
+        ),
+        migrations.RemoveIndex(
+            model_name='game',
+            name='pool_game_week_time_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='pick',
+            name='pool_pick_week_user_idx',
+        ),
+        migrations.AlterUniqueTogether(
+            name='score',
+            unique_together=set(),
+        ),
+        migrations.AddField(
+            model_name='email',
+            name='season',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='pool.season'),
+        ),
+        migrations.AddField(
+            model_name='game',
+            name='season',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='pool.season'),
+        ),
+        migrations.AddField(
+            model_name='pick',
+            name='season',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, to='pool.season'),
+        ),
+        migrations.AddField(
+            model_name='score',
+            name='season',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='pool.season'),
+        ),
+        migrations.AddField(
+            model_name='weeklynote',
+            name='season',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='pool.season'),
+        ),
+        migrations.RunPython(create_first_season, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='score',
+            unique_together={('user', 'season', 'week')},
+        ),
+        migrations.AddIndex(
+            model_name='game',
+            index=models.Index(fields=['season', 'week', 'game_time'], name='pool_game_season_week_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pick',
+            index=models.Index(fields=['season', 'week', 'user'], name='pool_pick_season_week_idx'),
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 5.2.5 on 2026-10-19 16:12
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def build_pick_sheets(apps, schema_editor):
+    Game = apps.get_model("pool", "Game")
+    Pick = apps.get_model("pool", "Pick")
+    PickSheet = apps.get_model("pool", "PickSheet")
+
+    # Bit i of a sheet is the week's i-th game by id
+    slots = {}
+    counters = {}
+    for game_id, season_id, week, home_team_id in (
+            Game.objects.exclude(season=None).order_by("id")
+            .values_list("id", "season_id", "week", "home_team_id")):
+        i = counters.get((season_id, week), 0)
+        counters[(season_id, week)] = i + 1
+        slots[game_id] = (1 << i, home_team_id)
+
+    masks = {}
+    for user_id, season_id, week, game_id, team_id in (
+            Pick.objects.exclude(season=None)
+            .values_list("user_id", "season_id", "week", "game_id",
+                         "picked_team_id")):
+        bit, home_team_id = slots[game_id]
+        picked, home = masks.get((user_id, season_id, week), (0, 0))
+        masks[(user_id, season_id, week)] = (
+            picked | bit, home | bit if team_id == home_team_id else home)
+
+    PickSheet.objects.bulk_create([
+        PickSheet(user_id=user_id, season_id=season_id, week=week,
+                  picked=picked, home=home)
+        for (user_id, season_id, week), (picked, home) in masks.items()
+    ], batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pool', '0020_season'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PickSheet',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('week', models.PositiveSmallIntegerField()),
+                ('picked', models.BigIntegerField(default=0)),
+                ('home', models.BigIntegerField(default=0)),
+                ('season', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='pool.season')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['season', 'week'], name='pool_picksheet_week_idx')],
+                'unique_together': {('user', 'season', 'week')},
+            },
+        ),
+        migrations.RunPython(build_pick_sheets, migrations.RunPython.noop),
+    ]
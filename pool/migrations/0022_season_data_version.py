@@ -0,0 +1,31 @@
+# Generated by Django 5.2.5 on 2026-10-19 16:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pool', '0021_pick_sheets'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='season',
+            name='data_version',
+            field=models.PositiveBigIntegerField(default=0, editable=False),
+        ),
+        migrations.CreateModel(
+            name='GameResultChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveBigIntegerField()),
+                ('game', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='pool.game')),
+                ('season', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='pool.season')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['season', 'version'], name='pool_resultchange_version_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 5.2.5 on 2026-10-19 16:24
+
+from datetime import datetime, time, timedelta
+from zoneinfo import ZoneInfo
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Max, Min
+
+EASTERN = ZoneInfo("America/New_York")
+
+
+def rollover(moment, after=True):
+    # Tuesday 2 AM Eastern, strictly after (or at or before) moment
+    local = moment.astimezone(EASTERN)
+    days = (1 - local.weekday()) % 7
+    candidate = datetime.combine(local.date() + timedelta(days=days),
+                                 time(2, 0), EASTERN)
+    if after:
+        if candidate <= local:
+            candidate += timedelta(days=7)
+    else:
+        while candidate > local:
+            candidate -= timedelta(days=7)
+    return candidate
+
+
+def build_week_windows(apps, schema_editor):
+    Game = apps.get_model("pool", "Game")
+    WeekWindow = apps.get_model("pool", "WeekWindow")
+
+    windows = []
+    opens = {}
+    for season_id, week, first, last in (
+            Game.objects.exclude(season=None).values("season_id", "week")
+            .annotate(first=Min("game_time"), last=Max("game_time"))
+            .order_by("season_id", "week")
+            .values_list("season_id", "week", "first", "last")):
+        start = opens.get(season_id) or rollover(first, after=False)
+        ends = rollover(last)
+        windows.append(WeekWindow(
+            season_id=season_id, week=week,
+            phase="regular" if week <= 18 else "post",
+            opens_at=min(start, first), closes_at=first, ends_at=ends))
+        opens[season_id] = ends
+    WeekWindow.objects.bulk_create(windows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pool', '0022_season_data_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WeekWindow',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('week', models.PositiveSmallIntegerField()),
+                ('phase', models.CharField(choices=[('regular', 'Regular season'), ('post', 'Postseason')], default='regular', max_length=10)),
+                ('opens_at', models.DateTimeField(help_text='Picks open')),
+                ('closes_at', models.DateTimeField(help_text='Picks close (first kickoff)')),
+                ('ends_at', models.DateTimeField(help_text='The next week becomes current')),
+                ('season', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='pool.season')),
+            ],
+            options={
+                'ordering': ('season', 'opens_at'),
+                'unique_together': {('season', 'week')},
+            },
+        ),
+        migrations.RunPython(build_week_windows, migrations.RunPython.noop),
+    ]
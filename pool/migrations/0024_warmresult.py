@@ -0,0 +1,29 @@
+# Generated by Django 5.2.5 on 2026-10-19 16:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pool', '0023_week_windows'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WarmResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50)),
+                ('data_version', models.PositiveBigIntegerField()),
+                ('payload', models.BinaryField()),
+                ('compute_ms', models.FloatField(default=0)),
+                ('computed_at', models.DateTimeField()),
+                ('season', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='pool.season')),
+            ],
+            options={
+                'unique_together': {('season', 'name')},
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-19 16:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pool', '0024_warmresult'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='warmresult',
+            name='refreshing_since',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
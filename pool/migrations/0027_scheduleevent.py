@@ -0,0 +1,30 @@
+# Generated by Django 5.2.5 on 2026-10-19 17:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pool', '0026_pooljob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScheduleEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('week', models.PositiveSmallIntegerField()),
+                ('kind', models.CharField(choices=[('pick_open', 'Picks open'), ('pick_close', 'Picks close'), ('week_end', 'Week ends')], max_length=10)),
+                ('at', models.DateTimeField()),
+                ('fired_at', models.DateTimeField()),
+                ('actions', models.JSONField(default=list)),
+                ('season', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='pool.season')),
+            ],
+            options={
+                'ordering': ('-at',),
+                'unique_together': {('season', 'week', 'kind', 'at')},
+            },
+        ),
+    ]
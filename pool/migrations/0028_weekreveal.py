@@ -0,0 +1,29 @@
+# Generated by Django 5.2.5 on 2026-10-19 17:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pool', '0027_scheduleevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WeekReveal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('week', models.PositiveSmallIntegerField()),
+                ('frozen_at', models.DateTimeField()),
+                ('slots', models.JSONField(default=list)),
+                ('sheets', models.JSONField(default=list)),
+                ('counts', models.JSONField(default=list)),
+                ('season', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='pool.season')),
+            ],
+            options={
+                'unique_together': {('season', 'week')},
+            },
+        ),
+    ]
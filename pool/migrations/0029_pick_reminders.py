@@ -0,0 +1,36 @@
+# Generated by Django 5.2.5 on 2026-10-19 17:07
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pool', '0028_weekreveal'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='scheduleevent',
+            name='kind',
+            field=models.CharField(choices=[('pick_open', 'Picks open'), ('remind', 'Missing-pick reminders, before picks close'), ('pick_close', 'Picks close'), ('week_end', 'Week ends')], max_length=10),
+        ),
+        migrations.CreateModel(
+            name='PickReminder',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('week', models.PositiveSmallIntegerField()),
+                ('sent_at', models.DateTimeField()),
+                ('games', models.JSONField(default=list)),
+                ('season', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='pool.season')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ('-sent_at',),
+                'unique_together': {('season', 'week', 'user')},
+            },
+        ),
+    ]
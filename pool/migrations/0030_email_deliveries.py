@@ -0,0 +1,34 @@
+# Generated by Django 5.2.5 on 2026-10-19 17:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pool', '0029_pick_reminders'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmailDelivery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('batch_size', models.PositiveIntegerField()),
+                ('recipients', models.PositiveIntegerField(default=0)),
+                ('sent', models.PositiveIntegerField(default=0)),
+                ('failed', models.PositiveIntegerField(default=0)),
+                ('sent_to', models.JSONField(default=list)),
+                ('failures', models.JSONField(default=list)),
+                ('batches', models.JSONField(default=list)),
+                ('email', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='deliveries', to='pool.email')),
+            ],
+            options={
+                'verbose_name_plural': 'email deliveries',
+                'ordering': ('-started_at',),
+            },
+        ),
+    ]
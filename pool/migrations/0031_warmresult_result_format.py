@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-19 17:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pool', '0030_email_deliveries'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='warmresult',
+            name='result_format',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -1,10 +1,135 @@
+import io
+import logging
+import marshal
+import pickle
+import pstats
+import random
+import threading
+from collections import namedtuple
+from contextlib import contextmanager
+from datetime import datetime, time, timedelta
+from time import perf_counter, sleep
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db import models
-from django.db.models import TextField
+from django.db import (IntegrityError, OperationalError, connections, models,
+                       transaction)
+from django.db.models import F, Max, Min, TextField
+from django.utils import timezone
 from markdownx.models import MarkdownxField
 
 User = get_user_model()
 
+logger = logging.getLogger("pool.picks")
+
+# Season.batch_changes(): season_id -> result-only game ids, or None
+_batched_changes = threading.local()
+
+
+class Season(models.Model):
+    year = models.PositiveSmallIntegerField(
+        unique=True, help_text="Year the season starts, e.g. 2025 for 2025-26")
+    name = models.CharField(max_length=20, blank=True)
+    is_current = models.BooleanField(
+        default=False,
+        help_text="Only one season is current; the site reads and writes it."
+    )
+    is_archived = models.BooleanField(
+        default=False,
+        help_text="Finished season. Excluded from live queries."
+    )
+    # Bumped by record_change() on every write to the season's games or
+    # picks; pool.snapshot reloads when it moves.
+    data_version = models.PositiveBigIntegerField(default=0, editable=False)
+
+    def save(self, *args, **kwargs):
+        if not self.name:
+            self.name = f"{self.year}-{(self.year + 1) % 100:02d}"
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            # Never write back a stale data_version
+            kwargs["update_fields"] = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.name != "data_version"
+            ]
+        super().save(*args, **kwargs)
+        if self.is_current:
+            # enforce only one current season
+            Season.objects.exclude(pk=self.pk).filter(is_current=True).update(
+                is_current=False)
+        from .utils import clear_current_season_cache
+        clear_current_season_cache()
+
+    @classmethod
+    def record_change(cls, season_id, game_id=None):
+        """
+        Bump a season's data_version after writing its games or picks.
+
+        Pass game_id when only that game's result changed (its winner or
+        points, or its picks' points), so snapshots can patch that game
+        instead of reloading the season. Inside batch_changes() the bump
+        waits for the end of the batch.
+        """
+        if season_id is None:
+            return
+        pending = getattr(_batched_changes, "pending", None)
+        if pending is not None:
+            game_ids = pending.setdefault(season_id, set())
+            if game_id is None:
+                pending[season_id] = None
+            elif game_ids is not None:
+                game_ids.add(game_id)
+            return
+        cls._bump(season_id, None if game_id is None else {game_id})
+
+    @classmethod
+    @contextmanager
+    def batch_changes(cls):
+        """
+        Bump each season written to once, at the end of the block, instead
+        of once per saved row: for loops over Pick.save() and Game.save().
+        Result-only changes still let snapshots patch just those games.
+        """
+        if getattr(_batched_changes, "pending", None) is not None:
+            yield  # the outer batch bumps
+            return
+        _batched_changes.pending = pending = {}
+        try:
+            yield
+        finally:
+            _batched_changes.pending = None
+            for season_id, game_ids in pending.items():
+                cls._bump(season_id, game_ids)
+
+    @classmethod
+    def _bump(cls, season_id, game_ids):
+        """One data_version bump; game_ids (or None) as in record_change()."""
+        bump = cls.objects.filter(pk=season_id)
+        if game_ids is None:
+            bump.update(data_version=F("data_version") + 1)
+        else:
+            with transaction.atomic(savepoint=False):
+                bump.update(data_version=F("data_version") + 1)
+                version = cls.objects.values_list(
+                    "data_version", flat=True).get(pk=season_id)
+                GameResultChange.objects.bulk_create([
+                    GameResultChange(season_id=season_id, version=version,
+                                     game_id=game_id)
+                    for game_id in sorted(game_ids)])
+                if version % GameResultChange.KEEP == 0:
+                    GameResultChange.objects.filter(
+                        season_id=season_id,
+                        version__lte=version - GameResultChange.KEEP).delete()
+
+        from .snapshot import invalidate
+        invalidate(season_id)
+
+    def __str__(self):
+        return self.name
+
+    class Meta:
+        ordering = ("-year",)
+
 
 class Team(models.Model):
     name = models.CharField(max_length=100)
@@ -15,6 +140,8 @@ class Team(models.Model):
 
 
 class Game(models.Model):
+    season = models.ForeignKey(Season, null=True, blank=True,
+                               on_delete=models.CASCADE)
     week = models.PositiveSmallIntegerField()
     home_team = models.ForeignKey(Team, related_name="home_team",
                                   on_delete=models.CASCADE)
@@ -27,18 +154,50 @@ class Game(models.Model):
 
     points = models.PositiveIntegerField(default=1)
 
+    class Meta:
+        indexes = [
+            # Week pages and summaries:
+            # filter(season=..., week=...).order_by("game_time")
+            models.Index(fields=["season", "week", "game_time"],
+                         name="pool_game_season_week_idx"),
+            # past picks: game_time ranges
+            models.Index(fields=["game_time"], name="pool_game_time_idx"),
+        ]
+
     def save(self, *args, **kwargs):
+        if self.season_id is None:
+            from .utils import get_current_season
+            self.season = get_current_season()
+
         winner_changed = False
+        week_changed = False
+        schedule_changed = True
+        old = None
         if self.pk:  # existing game
             old = Game.objects.filter(pk=self.pk).first()
             if old and old.winner != self.winner:
                 winner_changed = True
+            if old and (old.week != self.week
+                        or old.season_id != self.season_id):
+                week_changed = True
+            if old:
+                schedule_changed = week_changed or (
+                    (old.home_team_id, old.away_team_id, old.game_time)
+                    != (self.home_team_id, self.away_team_id, self.game_time))
 
         super().save(*args, **kwargs)  # save game first
 
-        if winner_changed:
-            from .models import Pick
+        if week_changed:
+            # Keep the denormalized Pick.week and Pick.season in step
+            Pick.objects.filter(game=self).update(week=self.week,
+                                                  season=self.season_id)
+        if week_changed or (old and old.home_team_id != self.home_team_id):
+            # Bit positions in both weeks' pick sheets have moved
+            PickSheet.rebuild(self.season_id, self.week)
+            if week_changed and old.season_id:
+                PickSheet.rebuild(old.season_id, old.week)
 
+        if winner_changed:
             if self.winner:
                 # Set correct picks
                 Pick.objects.filter(game=self, picked_team=self.winner).update(
@@ -50,6 +209,20 @@ class Game(models.Model):
                 # Winner cleared — reset all points
                 Pick.objects.filter(game=self).update(points_earned=0)
 
+        if schedule_changed:
+            Season.record_change(self.season_id)
+            if week_changed and old.season_id != self.season_id:
+                Season.record_change(old.season_id)
+        elif winner_changed or old.points != self.points:
+            Season.record_change(self.season_id, game_id=self.pk)
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        if self.season_id:
+            PickSheet.rebuild(self.season_id, self.week)
+            Season.record_change(self.season_id)
+        return result
+
     def __str__(self):
         return f"Week {self.week}: {self.away_team} @ {self.home_team}"
 
@@ -58,21 +231,640 @@ class Pick(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     game = models.ForeignKey(Game, on_delete=models.CASCADE)
     picked_team = models.ForeignKey(Team, on_delete=models.CASCADE)
+    # Copies of game.season and game.week so week queries don't need a
+    # join. Set in save(), kept in step by Game.save(); check with
+    # `manage.py check_pick_weeks`.
+    season = models.ForeignKey(Season, null=True, blank=True, editable=False,
+                               on_delete=models.CASCADE)
+    week = models.PositiveSmallIntegerField(null=True, blank=True,
+                                            editable=False)
     points_earned = models.PositiveIntegerField(default=0)
     bonus_points = models.PositiveIntegerField(default=0)
     is_correct = models.BooleanField(null=True, blank=True)
 
+    # Saving only these is a result change (see Season.record_change)
+    RESULT_FIELDS = {"points_earned", "bonus_points", "is_correct"}
+    # Pick.submit() tries this many times when the database is busy
+    SUBMIT_ATTEMPTS = 5
+
     @property
     def total_points(self):
         return self.points_earned + self.bonus_points
 
+    def save(self, *args, **kwargs):
+        if "game" in self._state.fields_cache:
+            self.week = self.game.week
+            self.season_id = self.game.season_id
+        elif self.week is None or self.season_id is None:
+            self.week, self.season_id = Game.objects.values_list(
+                "week", "season").get(pk=self.game_id)
+        super().save(*args, **kwargs)
+
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and set(update_fields) <= self.RESULT_FIELDS:
+            Season.record_change(self.season_id, game_id=self.game_id)
+        else:
+            if self.season_id:
+                PickSheet.set_pick(self)
+            Season.record_change(self.season_id)
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        if self.season_id:
+            PickSheet.clear_pick(self)
+            Season.record_change(self.season_id)
+        return result
+
+    @classmethod
+    def submit(cls, user, choices):
+        """
+        Save a user's picks for one week from (game, team) pairs and return
+        the picks written. Games that have kicked off are skipped.
+
+        The user's PickSheet row for the week is locked first, so two
+        submissions from the same user (a double click, two tabs) run one
+        after the other. The picks are then written with one upsert.
+        Busy-database errors and lost races to create the sheet are
+        retried with backoff.
+        """
+        choices = list(choices)
+        if not choices:
+            return []
+        weeks = {(game.season_id, game.week) for game, _ in choices}
+        if len(weeks) != 1:
+            raise ValueError("Pick.submit() takes picks for a single week.")
+        (season_id, week), = weeks
+
+        for attempt in range(1, cls.SUBMIT_ATTEMPTS + 1):
+            try:
+                with transaction.atomic():
+                    picks = cls._submit_week(user, season_id, week, choices)
+                break
+            except (OperationalError, IntegrityError) as e:
+                if attempt == cls.SUBMIT_ATTEMPTS:
+                    raise
+                logger.warning("Retrying picks for %s week %s (attempt %d): %s",
+                               user, week, attempt, e)
+                sleep(random.uniform(0, 0.02 * 2 ** attempt))
+
+        if picks:
+            Season.record_change(season_id)
+        return picks
+
+    @classmethod
+    def _submit_week(cls, user, season_id, week, choices):
+        sheet, _ = PickSheet.objects.select_for_update().get_or_create(
+            user=user, season_id=season_id, week=week)
+
+        # Checked inside the transaction, right before the write
+        now = timezone.now()
+        picks = [
+            cls(user=user, game=game, picked_team=team, season_id=season_id,
+                week=week)
+            for game, team in choices if now < game.game_time
+        ]
+        cls.objects.bulk_create(
+            picks, update_conflicts=True, unique_fields=["user", "game"],
+            update_fields=["picked_team"])
+
+        slots = Game.objects.filter(season_id=season_id, week=week).order_by(
+            "id").values_list("id", "home_team_id")
+        rows = cls.objects.filter(
+            user=user, season_id=season_id, week=week).values_list(
+            "user_id", "game_id", "picked_team_id")
+        sheet.picked, sheet.home = PickSheet.build(list(slots), rows).get(
+            user.pk, (0, 0))
+        sheet.save(update_fields=["picked", "home"])
+        if picks:
+            WeekReveal.discard(season_id, week)
+        return picks
+
     class Meta:
         unique_together = ("user", "game")
+        indexes = [
+            # Week scoring and summaries: filter(season=..., week=...),
+            # filter(season=..., week=..., user=...)
+            models.Index(fields=["season", "week", "user"],
+                         name="pool_pick_season_week_idx"),
+            # Uniqueness bonus: values("game_id", "picked_team_id").annotate(...)
+            models.Index(fields=["game", "picked_team"],
+                         name="pool_pick_game_team_idx"),
+        ]
 
     def __str__(self):
         return f"{self.user.username} picked {self.picked_team} for {self.game}"
 
 
+class PickSheet(models.Model):
+    """
+    A user's picks for one week as two bitmasks, for pool.scoring's
+    "bitmask" backend. Bit i is the week's i-th game by id: `picked` is set
+    if the user picked that game, `home` if they picked the home team.
+
+    Kept in step by Pick.save()/delete() and Game.save()/delete(); check
+    with `manage.py check_pick_sheets`.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    season = models.ForeignKey(Season, on_delete=models.CASCADE)
+    week = models.PositiveSmallIntegerField()
+    picked = models.BigIntegerField(default=0)
+    home = models.BigIntegerField(default=0)
+
+    class Meta:
+        unique_together = ("user", "season", "week")
+        indexes = [
+            models.Index(fields=["season", "week"],
+                         name="pool_picksheet_week_idx"),
+        ]
+
+    @staticmethod
+    def slot_order(games):
+        """A week's games in bit order. At most 63 fit in a sheet."""
+        return sorted(games, key=lambda game: game.id)
+
+    @staticmethod
+    def build(slots, picks):
+        """
+        {user_id: (picked, home)} from a week's (game_id, home_team_id)
+        pairs in slot order and (user_id, game_id, picked_team_id) picks.
+        """
+        slot_of = {game_id: (1 << i, home_team_id)
+                   for i, (game_id, home_team_id) in enumerate(slots)}
+        masks = {}
+        for user_id, game_id, team_id in picks:
+            bit, home_team_id = slot_of[game_id]
+            picked, home = masks.get(user_id, (0, 0))
+            masks[user_id] = (picked | bit,
+                              home | bit if team_id == home_team_id else home)
+        return masks
+
+    @classmethod
+    def expected(cls, season_id, week):
+        """The sheets a week's Pick rows call for, as {user_id: (picked, home)}."""
+        slots = Game.objects.filter(season_id=season_id, week=week).order_by(
+            "id").values_list("id", "home_team_id")
+        picks = Pick.objects.filter(season_id=season_id, week=week).values_list(
+            "user_id", "game_id", "picked_team_id")
+        return cls.build(list(slots), picks)
+
+    @classmethod
+    def rebuild(cls, season_id, week):
+        """Rewrite every sheet for a week from its Pick rows."""
+        masks = cls.expected(season_id, week)
+        cls.objects.filter(season_id=season_id, week=week).delete()
+        cls.objects.bulk_create([
+            cls(user_id=user_id, season_id=season_id, week=week,
+                picked=picked, home=home)
+            for user_id, (picked, home) in masks.items()
+        ], batch_size=2000)
+        WeekReveal.discard(season_id, week)
+
+    @classmethod
+    def set_pick(cls, pick):
+        """Set one pick's bits without reading the rest of the week."""
+        homes = list(
+            Game.objects.filter(season_id=pick.season_id, week=pick.week,
+                                id__lte=pick.game_id)
+            .order_by("id").values_list("home_team_id", flat=True)
+        )
+        bit = 1 << (len(homes) - 1)
+        is_home = pick.picked_team_id == homes[-1]
+        sheet = cls.objects.filter(
+            user_id=pick.user_id, season_id=pick.season_id, week=pick.week)
+        updated = sheet.update(
+            picked=F("picked").bitor(bit),
+            home=F("home").bitor(bit) if is_home else F("home").bitand(~bit),
+        )
+        if not updated:
+            sheet.get_or_create(
+                user_id=pick.user_id, season_id=pick.season_id, week=pick.week,
+                defaults={"picked": bit, "home": bit if is_home else 0})
+        WeekReveal.discard(pick.season_id, pick.week)
+
+    @classmethod
+    def clear_pick(cls, pick):
+        slot = Game.objects.filter(season_id=pick.season_id, week=pick.week,
+                                   id__lt=pick.game_id).count()
+        bit = 1 << slot
+        cls.objects.filter(
+            user_id=pick.user_id, season_id=pick.season_id, week=pick.week
+        ).update(picked=F("picked").bitand(~bit), home=F("home").bitand(~bit))
+        WeekReveal.discard(pick.season_id, pick.week)
+
+    def __str__(self):
+        return f"{self.user.username}: {self.season} week {self.week}"
+
+
+class GameResultChange(models.Model):
+    """
+    Log of result-only changes (see Season.record_change), so a snapshot
+    a few versions behind can patch just those games.
+    """
+    KEEP = 500  # versions of history kept per season
+
+    season = models.ForeignKey(Season, on_delete=models.CASCADE)
+    version = models.PositiveBigIntegerField()
+    game = models.ForeignKey(Game, on_delete=models.CASCADE)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["season", "version"],
+                         name="pool_resultchange_version_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.season} v{self.version}: game {self.game_id}"
+
+
+class RevealPick(namedtuple("RevealPick", "game picked_team")):
+    """A frozen pick, shaped like Pick for the week summary template."""
+    total_points = 0
+
+
+class WeekReveal(models.Model):
+    """
+    Everyone's picks for a week, frozen when its picks close: the week's
+    PickSheet masks plus how many picked each side of each game. Until the
+    week has results its summary is built from this row alone, with no
+    scoring. Frozen by pool.scheduler at pick_close, or by the first
+    summary built after close; any later change to the week's pick sheets
+    (a pick on a game that had not kicked off yet) discards it, to be
+    frozen again. It holds every pick, but the dashboard shows only those on
+    games that have kicked off.
+    """
+    season = models.ForeignKey(Season, on_delete=models.CASCADE)
+    week = models.PositiveSmallIntegerField()
+    frozen_at = models.DateTimeField()
+    # [[game_id, home_team_id, away_team_id], ...] in PickSheet bit order
+    slots = models.JSONField(default=list)
+    # [[user_id, picked, home], ...], PickSheet masks
+    sheets = models.JSONField(default=list)
+    # [[home picks, away picks], ...] in slot order
+    counts = models.JSONField(default=list)
+
+    class Meta:
+        unique_together = ("season", "week")
+
+    @classmethod
+    def freeze(cls, season_id, week):
+        """The week's reveal, frozen now if it is not already."""
+        reveal = cls.objects.filter(season_id=season_id, week=week).first()
+        if reveal is not None:
+            return reveal
+        slots = list(Game.objects.filter(season_id=season_id, week=week)
+                     .order_by("id")
+                     .values_list("id", "home_team_id", "away_team_id"))
+        sheets = list(PickSheet.objects.filter(season_id=season_id, week=week)
+                      .order_by("user_id")
+                      .values_list("user_id", "picked", "home"))
+        counts = []
+        for i in range(len(slots)):
+            bit = 1 << i
+            picked = [home for _, mask, home in sheets if mask & bit]
+            home_picks = sum(1 for home in picked if home & bit)
+            counts.append([home_picks, len(picked) - home_picks])
+        try:
+            with transaction.atomic():
+                return cls.objects.create(
+                    season_id=season_id, week=week, frozen_at=timezone.now(),
+                    slots=[list(slot) for slot in slots],
+                    sheets=[list(sheet) for sheet in sheets], counts=counts)
+        except IntegrityError:
+            return cls.objects.get(season_id=season_id, week=week)
+
+    @classmethod
+    def discard(cls, season_id, week):
+        """Drop a week's reveal once the transaction changing its picks commits."""
+        transaction.on_commit(lambda: cls.objects.filter(
+            season_id=season_id, week=week).delete())
+
+    def picks_by_user(self, games):
+        """
+        {user_id: {game_id: RevealPick}}, with teams taken from `games`
+        (the week's Game instances, teams attached).
+        """
+        games_by_id = {game.id: game for game in games}
+        slots = [games_by_id.get(game_id) for game_id, _, _ in self.slots]
+        picks = {}
+        for user_id, picked, home in self.sheets:
+            user_picks = picks[user_id] = {}
+            for i, game in enumerate(slots):
+                bit = 1 << i
+                if game is not None and picked & bit:
+                    team = game.home_team if home & bit else game.away_team
+                    user_picks[game.id] = RevealPick(game, team)
+        return picks
+
+    def pick_counts(self):
+        """{game_id: (away picks, home picks)}, in "away @ home" order."""
+        return {game_id: (away, home) for (game_id, _, _), (home, away)
+                in zip(self.slots, self.counts)}
+
+    def __str__(self):
+        return f"{self.season} week {self.week} reveal"
+
+
+class WarmResult(models.Model):
+    """
+    A computed page result (standings, week summaries, the email data
+    package) for a season, pickled and shared by every worker. It is
+    served while the season's data_version still matches the version it
+    was computed at, or, through get_or_revalidate(), for a short while
+    after. Filled on first use and by `manage.py warm_pool_caches`.
+    """
+    # Bump when the shape of a stored result changes (a new key, a renamed
+    # attribute): rows pickled by the old code are then recomputed instead
+    # of served after the deploy.
+    RESULT_FORMAT = 1
+
+    season = models.ForeignKey(Season, on_delete=models.CASCADE)
+    name = models.CharField(max_length=50)
+    data_version = models.PositiveBigIntegerField()
+    result_format = models.PositiveIntegerField(default=0)
+    payload = models.BinaryField()
+    compute_ms = models.FloatField(default=0)
+    computed_at = models.DateTimeField()
+    # Set when a worker claims the background recompute of a stale result
+    refreshing_since = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        unique_together = ("season", "name")
+
+    @classmethod
+    def fetch(cls, season, name):
+        """The stored result if it is still current, else None."""
+        payload = (cls.objects.filter(season=season, name=name,
+                                      data_version=F("season__data_version"),
+                                      result_format=cls.RESULT_FORMAT)
+                   .values_list("payload", flat=True).first())
+        return None if payload is None else pickle.loads(bytes(payload))
+
+    @classmethod
+    def store(cls, season, name, version, value, compute_ms=0.0):
+        """Upsert, so concurrent writers of the same result never collide."""
+        cls.objects.bulk_create(
+            [cls(season=season, name=name, data_version=version,
+                 result_format=cls.RESULT_FORMAT,
+                 payload=pickle.dumps(value, pickle.HIGHEST_PROTOCOL),
+                 compute_ms=compute_ms, computed_at=timezone.now(),
+                 refreshing_since=None)],
+            update_conflicts=True, unique_fields=["season", "name"],
+            update_fields=["data_version", "result_format", "payload",
+                           "compute_ms", "computed_at", "refreshing_since"])
+
+    @classmethod
+    def current_version(cls, season):
+        return Season.objects.values_list("data_version", flat=True).get(
+            pk=season.pk)
+
+    @classmethod
+    def compute(cls, season, name, compute, attempts=3, background=False):
+        """
+        Run compute() and store its result. compute() may itself write
+        (the summaries fix up bonus points), so it is rerun until the
+        season's data version holds still across a run; a result is only
+        stored under a version it saw from start to finish.
+        """
+        from .instrumentation import warm_stats
+        for _ in range(attempts):
+            version = cls.current_version(season)
+            start = perf_counter()
+            value = compute()
+            compute_ms = (perf_counter() - start) * 1000
+            warm_stats.record_compute(name, compute_ms, background)
+            if cls.current_version(season) == version:
+                cls.store(season, name, version, value, compute_ms)
+                break
+        return value
+
+    @classmethod
+    def get_or_compute(cls, season, name, compute):
+        """The stored result, or compute()'s, stored for the next caller."""
+        value = cls.fetch(season, name)
+        if value is None:
+            value = cls.compute(season, name, compute)
+        return value
+
+    @classmethod
+    def get_or_revalidate(cls, season, name, compute):
+        """
+        Like get_or_compute(), but an out-of-date result keeps being served
+        while one background thread (claimed across all workers through
+        refreshing_since) recomputes it. Once that recompute has run for
+        POOL_STALE_MAX_SECONDS without storing a result, requests compute
+        it themselves again.
+
+        Returns the value and a dict with the data version it was computed
+        at, its age in seconds and whether it is stale.
+        """
+        from .instrumentation import warm_stats
+        row = (cls.objects.filter(season=season, name=name,
+                                  result_format=cls.RESULT_FORMAT)
+               .annotate(current_version=F("season__data_version")).first())
+        now = timezone.now()
+        if row is not None and row.data_version == row.current_version:
+            warm_stats.record_served(name, "fresh")
+            return row.value(), row.freshness(now)
+
+        max_stale = settings.POOL_STALE_MAX_SECONDS
+        if row is not None and max_stale > 0:
+            since = row.refreshing_since
+            if since is None:
+                claimed = cls.objects.filter(
+                    pk=row.pk, refreshing_since__isnull=True).update(
+                    refreshing_since=now)
+                if claimed:
+                    cls.revalidate(season, name, compute, claimed_at=now)
+                since = now
+            if (now - since).total_seconds() <= max_stale:
+                warm_stats.record_served(name, "stale")
+                return row.value(), row.freshness(now, stale=True)
+
+        warm_stats.record_served(name, "computed")
+        value = cls.compute(season, name, compute)
+        return value, {"version": cls.current_version(season), "age": 0.0,
+                       "stale": False}
+
+    @classmethod
+    def revalidate(cls, season, name, compute, claimed_at):
+        """Recompute and store a result in a background thread."""
+        def run():
+            try:
+                cls.refresh(season, name, compute, claimed_at)
+            finally:
+                # This thread's own connections
+                connections.close_all()
+
+        threading.Thread(target=run, name=f"revalidate-{name}",
+                         daemon=True).start()
+
+    @classmethod
+    def refresh(cls, season, name, compute, claimed_at):
+        """
+        The background recompute for the claim taken at `claimed_at`.
+        store() clears the claim; if nothing was stored (compute() failed,
+        or the data kept changing) it is released for the next request.
+        """
+        try:
+            cls.compute(season, name, compute, background=True)
+        except Exception:
+            logger.exception("Recomputing %s for %s failed", name, season)
+        finally:
+            cls.objects.filter(season=season, name=name,
+                               refreshing_since=claimed_at).update(
+                refreshing_since=None)
+
+    def value(self):
+        return pickle.loads(bytes(self.payload))
+
+    def freshness(self, now, stale=False):
+        return {"version": self.data_version,
+                "age": (now - self.computed_at).total_seconds(),
+                "stale": stale}
+
+    def __str__(self):
+        return f"{self.name} for {self.season} v{self.data_version}"
+
+
+# The User fields the stored results show or filter on
+WARM_USER_FIELDS = ("username", "first_name", "last_name", "email",
+                    "is_active")
+
+
+def note_warm_user_changes(sender, instance, raw=False, update_fields=None,
+                           **kwargs):
+    """
+    Before a user is saved, note whether the save changes any of
+    WARM_USER_FIELDS, for discard_warm_results. Logins, password changes
+    and the like leave the stored results alone.
+    """
+    if raw or instance._state.adding:
+        return
+    fields = [name for name in WARM_USER_FIELDS
+              if update_fields is None or name in update_fields]
+    saved = (sender.objects.filter(pk=instance.pk).values_list(*fields).first()
+             if fields else None)
+    instance._changes_warm_results = saved is not None and saved != tuple(
+        getattr(instance, name) for name in fields)
+
+
+def discard_warm_results(sender, instance, created=None, **kwargs):
+    """
+    Users are in every stored result but do not move the data version;
+    drop the results when one is added, removed, renamed or (de)activated.
+    """
+    if created is False and not getattr(instance, "_changes_warm_results",
+                                        True):
+        return
+    WarmResult.objects.all().delete()
+
+
+class WeekWindow(models.Model):
+    """
+    When a week's picks open and close, and when the site moves on to the
+    next week. Built from the schedule by generate(); edit a row in the
+    admin for one-off changes (a re-import overwrites it).
+    """
+    REGULAR = "regular"
+    POSTSEASON = "post"
+    PHASES = [(REGULAR, "Regular season"), (POSTSEASON, "Postseason")]
+    REGULAR_SEASON_WEEKS = 18
+
+    # Weeks roll over at 2 AM Eastern on the Tuesday after their last game
+    ROLLOVER_TZ = ZoneInfo("America/New_York")
+    ROLLOVER_WEEKDAY = 1  # Tuesday
+    ROLLOVER_TIME = time(2, 0)
+
+    season = models.ForeignKey(Season, on_delete=models.CASCADE)
+    week = models.PositiveSmallIntegerField()
+    phase = models.CharField(max_length=10, choices=PHASES, default=REGULAR)
+    opens_at = models.DateTimeField(help_text="Picks open")
+    closes_at = models.DateTimeField(help_text="Picks close (first kickoff)")
+    ends_at = models.DateTimeField(help_text="The next week becomes current")
+
+    class Meta:
+        unique_together = ("season", "week")
+        ordering = ("season", "opens_at")
+
+    @classmethod
+    def rollover(cls, moment, after=True):
+        """The week rollover strictly after (or at or before) `moment`."""
+        local = moment.astimezone(cls.ROLLOVER_TZ)
+        days = (cls.ROLLOVER_WEEKDAY - local.weekday()) % 7
+        candidate = datetime.combine(local.date() + timedelta(days=days),
+                                     cls.ROLLOVER_TIME, cls.ROLLOVER_TZ)
+        if after:
+            if candidate <= local:
+                candidate += timedelta(days=7)
+        else:
+            while candidate > local:
+                candidate -= timedelta(days=7)
+        return candidate
+
+    @classmethod
+    def plan(cls, kickoffs):
+        """
+        Windows for {week: (first_kickoff, last_kickoff)}. A week opens when
+        the previous one ends, so bye weeks stretch the next window.
+        """
+        windows = []
+        opens = None
+        for week in sorted(kickoffs):
+            first, last = kickoffs[week]
+            if opens is None:
+                opens = cls.rollover(first, after=False)
+            ends = cls.rollover(last)
+            windows.append(cls(
+                week=week,
+                phase=(cls.REGULAR if week <= cls.REGULAR_SEASON_WEEKS
+                       else cls.POSTSEASON),
+                opens_at=min(opens, first),
+                closes_at=first,
+                ends_at=ends,
+            ))
+            opens = ends
+        return windows
+
+    @classmethod
+    def generate(cls, season):
+        """Rebuild a season's windows from its games."""
+        kickoffs = {
+            week: (first, last)
+            for week, first, last in
+            Game.objects.filter(season=season).values("week")
+            .annotate(first=Min("game_time"), last=Max("game_time"))
+            .values_list("week", "first", "last")
+        }
+        windows = cls.plan(kickoffs)
+        with transaction.atomic():
+            cls.objects.filter(season=season).exclude(
+                week__in=kickoffs).delete()
+            for window in windows:
+                cls.objects.update_or_create(
+                    season=season, week=window.week,
+                    defaults={"phase": window.phase,
+                              "opens_at": window.opens_at,
+                              "closes_at": window.closes_at,
+                              "ends_at": window.ends_at})
+        from .utils import clear_week_windows_cache
+        clear_week_windows_cache(season.pk)
+        return windows
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        from .utils import clear_week_windows_cache
+        clear_week_windows_cache(self.season_id)
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        from .utils import clear_week_windows_cache
+        clear_week_windows_cache(self.season_id)
+        return result
+
+    def __str__(self):
+        return f"{self.season} week {self.week}"
+
+
 class PoolSettings(models.Model):
     enforce_pick_window = models.BooleanField(default=True)
     site_maintenance = models.BooleanField(
@@ -84,6 +876,8 @@ class PoolSettings(models.Model):
         # enforce only one row
         self.pk = 1
         super().save(*args, **kwargs)
+        from .utils import clear_pool_settings_cache
+        clear_pool_settings_cache()
 
     def delete(self, *args, **kwargs):
         # prevent deletion
@@ -99,14 +893,18 @@ class PoolSettings(models.Model):
 
 class Score(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
+    season = models.ForeignKey(Season, null=True, blank=True,
+                               on_delete=models.CASCADE)
     week = models.PositiveSmallIntegerField()
     points = models.IntegerField(default=0)
 
     class Meta:
-        unique_together = ("user", "week")
+        unique_together = ("user", "season", "week")
 
 
 class Email(models.Model):
+    season = models.ForeignKey(Season, null=True, blank=True,
+                               on_delete=models.CASCADE)
     date = models.DateTimeField(auto_now_add=True)
     pool_data = models.JSONField(null=True, blank=True)
     game_recap_input_tokens = models.IntegerField(default=0)
@@ -128,8 +926,333 @@ class Email(models.Model):
 
 
 class WeeklyNote(models.Model):
+    season = models.ForeignKey(Season, null=True, blank=True,
+                               on_delete=models.CASCADE)
     week = models.PositiveSmallIntegerField()
     notes = TextField()
 
     def __str__(self):
         return f"Week {self.week} Notes"
+
+
+class _StoredStats:
+    """Adapter so pstats.Stats can load a marshalled stats dict."""
+
+    def __init__(self, stats):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+
+class RequestProfile(models.Model):
+    created = models.DateTimeField(auto_now_add=True)
+    user = models.ForeignKey(User, null=True, blank=True,
+                             on_delete=models.SET_NULL)
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=500)
+    duration_ms = models.FloatField(default=0)
+    stats = models.BinaryField()
+
+    class Meta:
+        ordering = ("-created",)
+
+    def get_stats(self):
+        return pstats.Stats(_StoredStats(marshal.loads(bytes(self.stats))))
+
+    def top_functions(self, limit=40, sort="cumulative"):
+        """Text report of the slowest functions, pstats style."""
+        stream = io.StringIO()
+        stats = self.get_stats()
+        stats.stream = stream
+        stats.strip_dirs().sort_stats(sort).print_stats(limit)
+        return stream.getvalue()
+
+    def __str__(self):
+        return f"{self.method} {self.path} ({self.duration_ms:.0f} ms)"
+
+
+class SlowQuery(models.Model):
+    """One row per normalized SQL statement that went over POOL_SLOW_QUERY_MS."""
+    fingerprint = models.CharField(max_length=40, unique=True)
+    normalized_sql = models.TextField()
+    sample_sql = models.TextField()
+    explain = models.TextField(blank=True)
+    vendor = models.CharField(max_length=20)
+    source = models.CharField(max_length=255, blank=True)
+    count = models.PositiveIntegerField(default=1)
+    total_ms = models.FloatField(default=0)
+    max_ms = models.FloatField(default=0)
+    first_seen = models.DateTimeField()
+    last_seen = models.DateTimeField()
+
+    class Meta:
+        verbose_name_plural = "Slow queries"
+        ordering = ("-total_ms",)
+
+    @property
+    def avg_ms(self):
+        return self.total_ms / self.count if self.count else 0
+
+    @property
+    def full_scan(self):
+        from .slow_queries import plan_has_full_scan
+        return plan_has_full_scan(self.explain, self.vendor)
+
+    def __str__(self):
+        return self.normalized_sql[:80]
+
+
+class PoolJob(models.Model):
+    """
+    A queued run of one or more management commands, picked up in the
+    background by pool.jobs (see POOL_JOB_RUNNER). Lets the admin start a
+    slow command and poll for it instead of waiting on it in a request.
+    """
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    STATUSES = [(QUEUED, "Queued"), (RUNNING, "Running"),
+                (SUCCEEDED, "Succeeded"), (FAILED, "Failed")]
+
+    name = models.CharField(max_length=50)
+    # [[command, {option: value}], ...], run in order
+    steps = models.JSONField(default=list)
+    status = models.CharField(max_length=10, choices=STATUSES, default=QUEUED)
+    progress = models.PositiveSmallIntegerField(default=0,
+                                                help_text="Percent done")
+    progress_message = models.CharField(max_length=200, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    output = models.TextField(blank=True)
+    error = models.TextField(blank=True)
+    created_by = models.ForeignKey(User, null=True, blank=True,
+                                   on_delete=models.SET_NULL)
+    created = models.DateTimeField(auto_now_add=True)
+    run_after = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    # Refreshed by the worker while it runs the job; a running job whose
+    # heartbeat is older than POOL_JOB_LEASE_SECONDS is run again
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    worker = models.CharField(max_length=100, blank=True)
+
+    class Meta:
+        ordering = ("-created",)
+        indexes = [
+            # claim(): filter(status=QUEUED, run_after__lte=now)
+            models.Index(fields=["status", "run_after"],
+                         name="pool_job_status_run_after_idx"),
+        ]
+
+    @classmethod
+    def enqueue(cls, name, steps, user=None, max_attempts=3):
+        """
+        Queue a job, or return the same job if it is already queued and
+        has not started, so a double click runs it once.
+        """
+        steps = [[command, options or {}] for command, options in steps]
+        queued = cls.objects.filter(name=name, steps=steps,
+                                    status=cls.QUEUED).first()
+        if queued is not None:
+            return queued
+        job = cls.objects.create(name=name, steps=steps, created_by=user,
+                                 max_attempts=max_attempts)
+        from .jobs import run_inline
+        transaction.on_commit(run_inline)
+        return job
+
+    @classmethod
+    def claim(cls, worker, batch=5):
+        """
+        Take the next due job. The conditional UPDATE is the lock, so any
+        number of workers can share one SQLite or PostgreSQL database.
+        """
+        now = timezone.now()
+        due = (cls.objects.filter(status=cls.QUEUED, run_after__lte=now)
+               .order_by("run_after", "id").values_list("pk", flat=True))
+        for pk in due[:batch]:
+            if cls.objects.filter(pk=pk, status=cls.QUEUED).update(
+                    status=cls.RUNNING, worker=worker, started_at=now,
+                    heartbeat_at=now, attempts=F("attempts") + 1,
+                    progress=0, progress_message=""):
+                return cls.objects.get(pk=pk)
+        return None
+
+    @classmethod
+    def requeue_abandoned(cls, lease_seconds):
+        """
+        Queue running jobs again whose worker stopped sending heartbeats,
+        or fail them once they are out of attempts.
+        """
+        now = timezone.now()
+        abandoned = cls.objects.filter(
+            status=cls.RUNNING,
+            heartbeat_at__lt=now - timedelta(seconds=lease_seconds))
+        abandoned.filter(attempts__gte=F("max_attempts")).update(
+            status=cls.FAILED, worker="", finished_at=now,
+            error="Worker stopped responding.")
+        return abandoned.update(
+            status=cls.QUEUED, worker="",
+            error="Worker stopped responding; queued again.")
+
+    def heartbeat(self, **fields):
+        """Save progress or output without touching the job's status."""
+        fields["heartbeat_at"] = timezone.now()
+        for name, value in fields.items():
+            setattr(self, name, value)
+        PoolJob.objects.filter(pk=self.pk, status=self.RUNNING,
+                               worker=self.worker).update(**fields)
+
+    def finish(self, error=None, retry_delay=0):
+        """Record success, or a failure that is retried while attempts remain."""
+        now = timezone.now()
+        self.heartbeat_at = now
+        if error is None:
+            self.status, self.progress = self.SUCCEEDED, 100
+            self.finished_at, self.error = now, ""
+        elif self.attempts < self.max_attempts:
+            self.status, self.error = self.QUEUED, error
+            self.run_after = now + timedelta(seconds=retry_delay)
+        else:
+            self.status, self.error, self.finished_at = self.FAILED, error, now
+        self.save(update_fields=["status", "progress", "error", "output",
+                                 "run_after", "finished_at", "heartbeat_at"])
+
+    @property
+    def done(self):
+        return self.status in (self.SUCCEEDED, self.FAILED)
+
+    def as_dict(self):
+        return {
+            "id": self.pk,
+            "name": self.name,
+            "status": self.status,
+            "done": self.done,
+            "progress": self.progress,
+            "progress_message": self.progress_message,
+            "attempts": self.attempts,
+            "max_attempts": self.max_attempts,
+            "output": self.output,
+            "error": self.error,
+        }
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
+
+
+class ScheduleEvent(models.Model):
+    """
+    A week transition (pick_open, remind, pick_close, week_end) that
+    pool.scheduler has fired. Claiming the row is what lets the
+    transition's actions run exactly once, however many schedulers run or
+    restart.
+    """
+    PICK_OPEN = "pick_open"
+    REMIND = "remind"
+    PICK_CLOSE = "pick_close"
+    WEEK_END = "week_end"
+    KINDS = [(PICK_OPEN, "Picks open"),
+             (REMIND, "Missing-pick reminders, before picks close"),
+             (PICK_CLOSE, "Picks close"), (WEEK_END, "Week ends")]
+
+    season = models.ForeignKey(Season, on_delete=models.CASCADE)
+    week = models.PositiveSmallIntegerField()
+    kind = models.CharField(max_length=10, choices=KINDS)
+    # When the transition was due; a rescheduled window fires again
+    at = models.DateTimeField()
+    fired_at = models.DateTimeField()
+    actions = models.JSONField(default=list)
+
+    class Meta:
+        unique_together = ("season", "week", "kind", "at")
+        ordering = ("-at",)
+
+    @classmethod
+    def claim(cls, season_id, week, kind, at, now):
+        """The new row, or None if this transition has already fired."""
+        try:
+            with transaction.atomic():
+                return cls.objects.create(season_id=season_id, week=week,
+                                          kind=kind, at=at, fired_at=now)
+        except IntegrityError:
+            return None
+
+    def __str__(self):
+        return f"{self.season} week {self.week} {self.kind}"
+
+
+class PickReminder(models.Model):
+    """A missing-picks reminder sent to a user for a week (pool.reminders)."""
+    season = models.ForeignKey(Season, on_delete=models.CASCADE)
+    week = models.PositiveSmallIntegerField()
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    sent_at = models.DateTimeField()
+    # Ids of the games the user had not picked when reminded
+    games = models.JSONField(default=list)
+
+    class Meta:
+        unique_together = ("season", "week", "user")
+        ordering = ("-sent_at",)
+
+    def __str__(self):
+        return f"{self.user} reminded for {self.season} week {self.week}"
+
+
+class EmailDelivery(models.Model):
+    """
+    One run of `manage.py send_recap_email` for an Email (pool.mailing):
+    who it reached, who failed and how fast each batch went.
+    """
+    email = models.ForeignKey(Email, on_delete=models.CASCADE,
+                              related_name="deliveries")
+    started_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    batch_size = models.PositiveIntegerField()
+    recipients = models.PositiveIntegerField(default=0)
+    sent = models.PositiveIntegerField(default=0)
+    failed = models.PositiveIntegerField(default=0)
+    # Addresses delivered to, so a rerun for the same email skips them
+    sent_to = models.JSONField(default=list)
+    # [{"address", "error"}]
+    failures = models.JSONField(default=list)
+    # [{"size", "sent", "failed", "ms", "per_second"}], in send order
+    batches = models.JSONField(default=list)
+
+    class Meta:
+        ordering = ("-started_at",)
+        verbose_name_plural = "email deliveries"
+
+    @classmethod
+    def delivered(cls, email):
+        """Every address any delivery of the email has reached."""
+        addresses = set()
+        for sent_to in cls.objects.filter(email=email).values_list(
+                "sent_to", flat=True):
+            addresses.update(sent_to)
+        return addresses
+
+    def record(self, batch):
+        """Add a finished batch (pool.mailing.Batch) and save."""
+        self.sent += len(batch.sent)
+        self.failed += len(batch.failed)
+        self.sent_to += batch.sent
+        self.failures += [{"address": address, "error": error}
+                          for address, error in batch.failed]
+        self.batches.append({
+            "size": len(batch.sent) + len(batch.failed),
+            "sent": len(batch.sent),
+            "failed": len(batch.failed),
+            "ms": round(batch.ms, 1),
+            "per_second": round(batch.per_second, 1),
+        })
+        self.save()
+
+    @property
+    def per_second(self):
+        ms = sum(batch["ms"] for batch in self.batches)
+        return round(1000 * self.sent / ms, 1) if ms else 0.0
+
+    def __str__(self):
+        return f"{self.email} to {self.recipients} recipients"
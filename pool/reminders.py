@@ -0,0 +1,138 @@
+# pool/reminders.py
+"""
+Missing-picks reminders: which active users have not picked every game of
+the week that is still open, and one email each, sent in batches by
+pool.mailing.deliver(). A PickReminder row per user and
+week keeps a later run from sending the same reminder again. Used by
+`manage.py send_pick_reminders` and the admin's missing-picks page.
+"""
+from collections import namedtuple
+from datetime import timezone as dt_timezone
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.mail import EmailMessage
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .mailing import deliver
+from .models import Game, Pick, PickReminder, Team
+
+MissingPick = namedtuple(
+    "MissingPick", "user_id email first_name username game_id game_time "
+                   "away_team home_team reminded_at")
+
+MISSING_PICKS_SQL = """
+    SELECT u.id, u.email, u.first_name, u.username,
+           g.id, g.game_time, a.name, h.name, r.sent_at
+    FROM {users} u
+    CROSS JOIN {games} g
+    JOIN {teams} a ON a.id = g.away_team_id
+    JOIN {teams} h ON h.id = g.home_team_id
+    LEFT JOIN {reminders} r
+        ON r.user_id = u.id AND r.season_id = g.season_id AND r.week = g.week
+    WHERE u.is_active AND u.email <> ''
+      AND g.season_id = %s AND g.week = %s AND g.game_time > %s
+      AND NOT EXISTS (
+          SELECT 1 FROM {picks} p WHERE p.user_id = u.id AND p.game_id = g.id)
+    ORDER BY u.id, g.game_time, g.id
+"""
+
+
+def missing_picks(season, week, now=None):
+    """
+    Every (user, game) pair where an active user with an email address has
+    not picked a game of the week that has not kicked off, with when the
+    user was reminded for the week (or None). One anti-join query.
+    """
+    now = now or timezone.now()
+    connection = connections[DEFAULT_DB_ALIAS]
+    sql = MISSING_PICKS_SQL.format(**{
+        name: connection.ops.quote_name(model._meta.db_table)
+        for name, model in (("users", get_user_model()), ("games", Game),
+                            ("teams", Team), ("picks", Pick),
+                            ("reminders", PickReminder))
+    })
+    params = [season.pk, week, connection.ops.adapt_datetimefield_value(now)]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+
+    return [MissingPick(*row[:5], aware(row[5]), *row[6:8], aware(row[8]))
+            for row in rows]
+
+
+def aware(value):
+    """A datetime column read by raw SQL (SQLite gives naive UTC or text)."""
+    if isinstance(value, str):
+        value = parse_datetime(value)
+    if value is not None and timezone.is_naive(value):
+        value = timezone.make_aware(value, dt_timezone.utc)
+    return value
+
+
+def by_user(missing):
+    """The missing picks grouped per user, in user order."""
+    users = {}
+    for pick in missing:
+        user = users.setdefault(pick.user_id, {
+            "user_id": pick.user_id,
+            "email": pick.email,
+            "name": pick.first_name or pick.username,
+            "reminded_at": pick.reminded_at,
+            "games": [],
+        })
+        user["games"].append(pick)
+    return list(users.values())
+
+
+def matrix(missing):
+    """
+    The games still open that someone has not picked (kickoff order), and a
+    row per user with one missing/picked flag per game, for the admin.
+    """
+    games = {}
+    for pick in sorted(missing, key=lambda p: (p.game_time, p.game_id)):
+        games.setdefault(pick.game_id, pick)
+    rows = []
+    for user in by_user(missing):
+        missed = {pick.game_id for pick in user["games"]}
+        rows.append({**user, "cells": [game_id in missed for game_id in games]})
+    return list(games.values()), rows
+
+
+def reminder_message(user, season, week):
+    context = {"user": user, "season": season, "week": week,
+               "games": user["games"], "site_url": settings.POOL_SITE_URL}
+    subject = render_to_string("pool/email/pick_reminder_subject.txt",
+                               context).strip()
+    body = render_to_string("pool/email/pick_reminder.txt", context)
+    return EmailMessage(subject, body, settings.DEFAULT_FROM_EMAIL,
+                        [user["email"]])
+
+
+def send_reminders(season, week, now=None, dry_run=False):
+    """
+    Email every user missing picks who has not been reminded for the week
+    yet. Returns the users reminded (or, with dry_run, who would be).
+    """
+    now = now or timezone.now()
+    users = [user for user in by_user(missing_picks(season, week, now))
+             if user["reminded_at"] is None]
+    if dry_run or not users:
+        return users
+
+    messages = ((user, reminder_message(user, season, week)) for user in users)
+    sent = []
+    # Each batch is recorded as it finishes
+    for batch in deliver(messages):
+        PickReminder.objects.bulk_create([
+            PickReminder(season=season, week=week, user_id=user["user_id"],
+                         sent_at=now,
+                         games=[pick.game_id for pick in user["games"]])
+            for user in batch.sent
+        ], ignore_conflicts=True)
+        sent += batch.sent
+    return sent
@@ -0,0 +1,119 @@
+# pool/routers.py
+"""
+Sends reads of the pool's tables to the "replica" database when one is
+configured, and all writes to the primary ("default").
+
+Only requests read from the replica (PrimaryStickyMiddleware opens a
+replica_reads() scope for each one); management commands and anything
+else outside a request read the primary. Inside a request, reads go back
+to the primary inside a transaction, once the request has written to the
+pool's tables, and for POOL_REPLICA_STICKY_SECONDS after the client's last
+write, so users always see their own picks.
+"""
+import contextvars
+import re
+from contextlib import contextmanager
+from functools import cache
+
+from django.apps import apps
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.backends.signals import connection_created
+
+REPLICA = "replica"
+REPLICA_APPS = {"pool"}
+# Diagnostics, result-cache and job tables, written mid-request and polled
+# for fresh status; never pin a request for them
+PRIMARY_ONLY = {"requestprofile", "slowquery", "warmresult", "weekreveal",
+                "pooljob", "pickreminder", "emaildelivery"}
+
+WRITE_SQL = re.compile(
+    r'\s*(?:INSERT(?:\s+OR\s+\w+)?\s+INTO|UPDATE|DELETE\s+FROM)\s+["`]?(\w+)',
+    re.IGNORECASE)
+
+_pinned = contextvars.ContextVar("pool_primary_pinned", default=True)
+_wrote = contextvars.ContextVar("pool_primary_wrote", default=False)
+
+
+@contextmanager
+def replica_reads(pinned=False):
+    """
+    One unit of work (a request) that reads from the replica until it
+    writes. pinned=True keeps every read on the primary.
+    """
+    pinned_token = _pinned.set(pinned)
+    wrote_token = _wrote.set(False)
+    try:
+        yield
+    finally:
+        _pinned.reset(pinned_token)
+        _wrote.reset(wrote_token)
+
+
+def pin_primary():
+    """Send the rest of this unit of work's reads to the primary."""
+    _pinned.set(True)
+
+
+def wrote():
+    """Whether replicated tables were written since replica_reads() started."""
+    return _wrote.get()
+
+
+def has_replica():
+    return (getattr(settings, "POOL_READ_REPLICA", True)
+            and REPLICA in settings.DATABASES)
+
+
+def replicated(model):
+    return (model._meta.app_label in REPLICA_APPS
+            and model._meta.model_name not in PRIMARY_ONLY)
+
+
+@cache
+def replicated_tables():
+    return frozenset(model._meta.db_table for model in apps.get_models()
+                     if replicated(model))
+
+
+def watch_writes(execute, sql, params, many, context):
+    """Execute wrapper on the primary that pins after a replicated write."""
+    if not _wrote.get() and sql[:6].upper() != "SELECT":
+        match = WRITE_SQL.match(sql)
+        if match and match.group(1) in replicated_tables():
+            _pinned.set(True)
+            _wrote.set(True)
+    return execute(sql, params, many, context)
+
+
+def install_write_watch():
+    """Attach watch_writes to every primary connection as it is opened."""
+    if not has_replica():
+        return
+
+    def attach(sender, connection, **kwargs):
+        if (connection.alias == DEFAULT_DB_ALIAS
+                and watch_writes not in connection.execute_wrappers):
+            connection.execute_wrappers.append(watch_writes)
+
+    connection_created.connect(attach, weak=False,
+                               dispatch_uid="pool_replica_write_watch")
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if (not has_replica() or not replicated(model) or _pinned.get()
+                or connections[DEFAULT_DB_ALIAS].in_atomic_block):
+            return DEFAULT_DB_ALIAS
+        return REPLICA
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica is a copy of the primary, never migrated directly
+        return db != REPLICA
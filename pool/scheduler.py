@@ -0,0 +1,241 @@
+# pool/scheduler.py
+"""
+Fires actions at each week's transitions (picks open, the missing-picks
+reminder, picks close, the week ends), read from the current season's
+WeekWindow rows. An archived season fires nothing.
+
+The scheduler sleeps until the next transition rather than polling. It
+re-reads the windows every POOL_SCHEDULER_RESYNC_SECONDS so edits made in
+the admin are picked up. A transition missed while no scheduler was
+running still fires if it is less than POOL_SCHEDULER_CATCH_UP_SECONDS
+old. ScheduleEvent rows make each one fire once.
+
+Actions are registered with @on(kind, ...) and take the Transition. They
+should be quick: the built-in ones freeze a few rows or queue PoolJobs.
+
+With POOL_JOB_RUNNER="inline" (the default) each web process runs the
+scheduler in a thread, started by its first request (InProcessScheduler).
+Nothing else has to be deployed, but a machine scaled to zero fires the
+transitions it slept through on its next request. `manage.py
+run_scheduler` runs it on its own instead.
+"""
+import logging
+import os
+import threading
+from collections import namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connections
+from django.utils import timezone
+
+from .models import PoolJob, ScheduleEvent, Season, WeekReveal, WeekWindow
+
+logger = logging.getLogger("pool.scheduler")
+
+PICK_OPEN = ScheduleEvent.PICK_OPEN
+REMIND = ScheduleEvent.REMIND
+PICK_CLOSE = ScheduleEvent.PICK_CLOSE
+WEEK_END = ScheduleEvent.WEEK_END
+
+Transition = namedtuple("Transition", "at kind season_id week")
+
+# kind -> actions, in registration order
+ACTIONS = {PICK_OPEN: [], REMIND: [], PICK_CLOSE: [], WEEK_END: []}
+
+
+def on(*kinds):
+    """Register the decorated function as an action for these transitions."""
+    def register(action):
+        for kind in kinds:
+            if action not in ACTIONS[kind]:
+                ACTIONS[kind].append(action)
+        return action
+    return register
+
+
+class Clock:
+    """Wall time, and a sleep that wakes early when `stop` is set."""
+
+    def now(self):
+        return timezone.now()
+
+    def sleep(self, seconds, stop):
+        stop.wait(seconds)
+
+
+class FakeClock(Clock):
+    """A clock that only moves when slept on, for tests."""
+
+    def __init__(self, now):
+        self.current = now
+        self.sleeps = []
+
+    def now(self):
+        return self.current
+
+    def sleep(self, seconds, stop):
+        self.sleeps.append(seconds)
+        self.current += timedelta(seconds=seconds)
+
+
+def transitions(season):
+    """
+    Every transition of a season's week windows, in time order. The
+    reminder comes POOL_REMINDER_LEAD_HOURS before picks close, if that is
+    after they open.
+    """
+    lead = timedelta(hours=settings.POOL_REMINDER_LEAD_HOURS)
+    rows = WeekWindow.objects.filter(season=season).values_list(
+        "week", "opens_at", "closes_at", "ends_at")
+    events = []
+    for week, opens_at, closes_at, ends_at in rows:
+        events += [Transition(opens_at, PICK_OPEN, season.pk, week),
+                   Transition(closes_at, PICK_CLOSE, season.pk, week),
+                   Transition(ends_at, WEEK_END, season.pk, week)]
+        if lead and closes_at - lead > opens_at:
+            events.append(Transition(closes_at - lead, REMIND, season.pk, week))
+    # At equal times a week ends before the next one opens
+    order = {WEEK_END: 0, PICK_OPEN: 1, REMIND: 2, PICK_CLOSE: 3}
+    events.sort(key=lambda event: (event.at, order[event.kind], event.week))
+    return events
+
+
+class Scheduler:
+    def __init__(self, clock=None, catch_up_seconds=None, resync_seconds=None):
+        self.clock = clock or Clock()
+        self.catch_up = timedelta(seconds=(
+            settings.POOL_SCHEDULER_CATCH_UP_SECONDS
+            if catch_up_seconds is None else catch_up_seconds))
+        self.resync_seconds = (settings.POOL_SCHEDULER_RESYNC_SECONDS
+                               if resync_seconds is None else resync_seconds)
+
+    def load(self):
+        season = Season.objects.filter(is_current=True,
+                                       is_archived=False).first()
+        return transitions(season) if season else []
+
+    def run_due(self, events=None):
+        """Fire the transitions that are due and not yet fired; return them."""
+        now = self.clock.now()
+        fired = []
+        for event in self.load() if events is None else events:
+            if event.at > now:
+                break
+            if event.at < now - self.catch_up:
+                continue
+            claimed = ScheduleEvent.claim(event.season_id, event.week,
+                                          event.kind, event.at, now)
+            if claimed is None:
+                continue
+            claimed.actions = self.fire(event)
+            claimed.save(update_fields=["actions"])
+            fired.append(event)
+        return fired
+
+    def fire(self, event):
+        """Run each action for the transition; one failing does not stop the rest."""
+        ran = []
+        for action in ACTIONS[event.kind]:
+            name = action.__name__
+            try:
+                action(event)
+                ran.append(name)
+            except Exception:
+                logger.exception("Action %s for %s failed", name, event)
+                ran.append(f"{name} (failed)")
+        logger.info("Week %s %s: %s", event.week, event.kind,
+                    ", ".join(ran) or "no actions")
+        return ran
+
+    def seconds_until_next(self, events):
+        """Time to sleep: until the next transition, at most resync_seconds."""
+        now = self.clock.now()
+        upcoming = [event.at for event in events if event.at > now]
+        if not upcoming:
+            return self.resync_seconds
+        return min((upcoming[0] - now).total_seconds(), self.resync_seconds)
+
+    def run(self, stop=None, until=None):
+        """Fire transitions as they come due until stop is set (or `until`)."""
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            close_old_connections()
+            events = self.load()
+            self.run_due(events)
+            if until is not None and self.clock.now() >= until:
+                break
+            seconds = self.seconds_until_next(events)
+            if until is not None:
+                seconds = min(seconds,
+                              (until - self.clock.now()).total_seconds())
+            self.clock.sleep(max(seconds, 0), stop)
+
+
+class InProcessScheduler:
+    """
+    Runs the scheduler in a daemon thread of this process, once per
+    process (gunicorn forks after preloading). Every web process runs one;
+    ScheduleEvent claims keep each transition to one firing.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pid = None
+        self.thread = None
+        self.stop = threading.Event()
+
+    def start(self):
+        with self.lock:
+            if self.pid == os.getpid():
+                return
+            self.pid = os.getpid()
+            self.stop = threading.Event()
+            self.thread = threading.Thread(target=self.run,
+                                           name="pool-scheduler", daemon=True)
+            self.thread.start()
+        # Jobs queued or abandoned while the process was down
+        from .jobs import run_inline
+        run_inline()
+
+    def run(self):
+        try:
+            while not self.stop.is_set():
+                try:
+                    Scheduler().run(self.stop)
+                except Exception:
+                    logger.exception("Scheduler failed; restarting in a minute")
+                    self.stop.wait(60)
+        finally:
+            connections.close_all()
+
+
+in_process = InProcessScheduler()
+
+
+def start_in_process(**kwargs):
+    """request_started receiver: run the scheduler here if jobs run inline."""
+    if settings.POOL_JOB_RUNNER == "inline":
+        in_process.start()
+
+
+# Built-in actions
+
+@on(REMIND)
+def queue_reminders(event):
+    """Email everyone still missing picks for the week."""
+    PoolJob.enqueue("pick_reminders",
+                    [["send_pick_reminders", {"week": event.week}]])
+
+
+@on(PICK_CLOSE)
+def freeze_reveal(event):
+    """Freeze everyone's picks for the week the summaries now reveal."""
+    WeekReveal.freeze(event.season_id, event.week)
+
+
+@on(PICK_CLOSE, WEEK_END)
+def warm_caches(event):
+    """Precompute the standings and week summaries before visitors ask."""
+    from .jobs import enqueue
+    enqueue("warm_caches")
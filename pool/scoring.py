@@ -0,0 +1,217 @@
+# pool/scoring.py
+"""
+Weekly scoring rules shared by the standings and the weekly summaries.
+
+A correct pick earns the game's points, plus UNIQUE_BONUS if nobody else
+picked that team for that game. Getting every game of the week right adds
+PERFECT_WEEK_BONUS.
+
+Backends (settings.POOL_SCORING_BACKEND) read the picks differently and
+must give identical results:
+  "snapshot" this process's in-memory copy of the season (pool.snapshot)
+  "rows"     one Pick row per user per game
+  "bitmask"  one PickSheet row per user per week, scored with bit operations
+  "numpy"    Pick rows as a users x games array, scored with array operations
+"""
+from collections import Counter
+from itertools import chain
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+from .models import Pick, PickSheet
+from .snapshot import get_snapshot
+
+# Regular season: 2 and 3. Playoffs: no bonuses.
+UNIQUE_BONUS = 0
+PERFECT_WEEK_BONUS = 0
+
+BACKENDS = ("snapshot", "rows", "bitmask", "numpy")
+
+
+class WeekScore:
+    """Points, correct picks, perfect weeks and unique picks for one week."""
+
+    def __init__(self, week, games, unique_bonus, perfect_bonus):
+        self.week = week
+        self.games = games
+        self.unique_bonus = unique_bonus
+        self.perfect_bonus = perfect_bonus
+        self.points = {}    # user_id -> points including bonuses
+        self.wins = {}      # user_id -> correct picks
+        self.perfect = set()  # user_ids who got every game right
+        self.unique = set()   # (game_id, team_id) picked by exactly one user
+
+    def pick_bonus(self, game, picked_team_id):
+        """Unique-pick bonus earned by one pick."""
+        if (game.winner_id is not None and picked_team_id == game.winner_id
+                and (game.id, picked_team_id) in self.unique):
+            return self.unique_bonus
+        return 0
+
+    def perfect_week_bonus(self, user_id):
+        return self.perfect_bonus if user_id in self.perfect else 0
+
+    def _finish(self):
+        if not self.games:
+            return
+        for user_id, wins in self.wins.items():
+            if wins == len(self.games):
+                self.perfect.add(user_id)
+                self.points[user_id] += self.perfect_bonus
+
+
+def rank_rows(rows, key):
+    """Sort rows by `key`, highest first, and give ties the same rank (1224)."""
+    rows.sort(key=lambda r: r[key], reverse=True)
+    rank = 0
+    last = None
+    for i, row in enumerate(rows, start=1):
+        if row[key] != last:
+            rank = i
+            last = row[key]
+        row["rank"] = rank
+    return rows
+
+
+def score_week(season, week, games, backend=None,
+               unique_bonus=UNIQUE_BONUS, perfect_bonus=PERFECT_WEEK_BONUS):
+    """
+    Score every user's picks for a week.
+
+    `games` is every game in the week; only id, home_team_id, away_team_id,
+    winner_id and points are read.
+    """
+    backend = backend or getattr(settings, "POOL_SCORING_BACKEND", "snapshot")
+    score = WeekScore(week, list(games), unique_bonus, perfect_bonus)
+    if backend == "snapshot":
+        _score_picks(score, get_snapshot(season).pick_rows(week))
+    elif backend == "rows":
+        _score_picks(score, Pick.objects.filter(season=season, week=week)
+                     .values_list("user_id", "game_id", "picked_team_id"))
+    elif backend == "bitmask":
+        _score_bitmask(score, season)
+    elif backend == "numpy":
+        _score_numpy(score, season)
+    else:
+        raise ValueError(f"Unknown scoring backend {backend!r}; "
+                         f"expected one of {', '.join(BACKENDS)}")
+    score._finish()
+    return score
+
+
+def _score_picks(score, picks):
+    picks = list(picks)
+    counts = Counter((game_id, team_id) for _, game_id, team_id in picks)
+    score.unique = {key for key, n in counts.items() if n == 1}
+
+    games_by_id = {g.id: g for g in score.games}
+    for user_id, game_id, team_id in picks:
+        score.points.setdefault(user_id, 0)
+        score.wins.setdefault(user_id, 0)
+        game = games_by_id[game_id]
+        if game.winner_id is None or team_id != game.winner_id:
+            continue
+        score.wins[user_id] += 1
+        score.points[user_id] += game.points
+        if (game_id, team_id) in score.unique:
+            score.points[user_id] += score.unique_bonus
+
+
+def _score_bitmask(score, season):
+    games = PickSheet.slot_order(score.games)
+
+    # Masks over the week's game slots
+    decided = home_won = 0
+    weights = {}  # points -> slots worth that many
+    for slot, game in enumerate(games):
+        bit = 1 << slot
+        if game.winner_id is not None:
+            decided |= bit
+            if game.winner_id == game.home_team_id:
+                home_won |= bit
+        weights[game.points] = weights.get(game.points, 0) | bit
+
+    sheets = list(
+        PickSheet.objects.filter(season=season, week=score.week)
+        .values_list("user_id", "picked", "home")
+    )
+
+    # Slots where exactly one user picked home (or away): bit-sliced
+    # counters that saturate at "more than one".
+    once_home = many_home = once_away = many_away = 0
+    for _, picked, home in sheets:
+        home_picks = picked & home
+        away_picks = picked & ~home
+        many_home |= once_home & home_picks
+        once_home |= home_picks
+        many_away |= once_away & away_picks
+        once_away |= away_picks
+    unique_home = once_home & ~many_home
+    unique_away = once_away & ~many_away
+
+    for slot, game in enumerate(games):
+        bit = 1 << slot
+        if unique_home & bit:
+            score.unique.add((game.id, game.home_team_id))
+        if unique_away & bit:
+            score.unique.add((game.id, game.away_team_id))
+
+    for user_id, picked, home in sheets:
+        correct = picked & decided & ~(home ^ home_won)
+        points = sum(value * (correct & mask).bit_count()
+                     for value, mask in weights.items())
+        unique = correct & ((home & unique_home) | (~home & unique_away))
+        score.wins[user_id] = correct.bit_count()
+        score.points[user_id] = points + score.unique_bonus * unique.bit_count()
+
+
+def _score_numpy(score, season):
+    # Imported here so workers on the other backends never load numpy
+    try:
+        import numpy as np
+    except ImportError:
+        raise ImproperlyConfigured(
+            'POOL_SCORING_BACKEND = "numpy" needs numpy installed.')
+
+    picks = np.fromiter(
+        chain.from_iterable(
+            Pick.objects.filter(season=season, week=score.week)
+            .values_list("user_id", "game_id", "picked_team_id")),
+        dtype=np.int64,
+    ).reshape(-1, 3)
+    if not len(picks) or not score.games:
+        return
+
+    game_ids = np.array([g.id for g in score.games], dtype=np.int64)
+    order = np.argsort(game_ids)
+    game_ids = game_ids[order]
+    games = [score.games[i] for i in order]
+    home = np.array([g.home_team_id for g in games], dtype=np.int64)
+    away = np.array([g.away_team_id for g in games], dtype=np.int64)
+    winner = np.array([g.winner_id or 0 for g in games], dtype=np.int64)
+    points = np.array([g.points for g in games], dtype=np.int64)
+
+    # users x games matrix of picked team ids, 0 where there is no pick
+    user_ids, rows = np.unique(picks[:, 0], return_inverse=True)
+    cols = np.searchsorted(game_ids, picks[:, 1])
+    picked = np.zeros((len(user_ids), len(games)), dtype=np.int64)
+    picked[rows, cols] = picks[:, 2]
+
+    correct = (picked == winner) & (winner != 0)
+    picked_home = picked == home
+    picked_away = picked == away
+    home_unique = picked_home.sum(axis=0) == 1
+    away_unique = picked_away.sum(axis=0) == 1
+    unique = (picked_home & home_unique) | (picked_away & away_unique)
+
+    wins = correct.sum(axis=1)
+    totals = (correct * points).sum(axis=1)
+    totals += score.unique_bonus * (correct & unique).sum(axis=1)
+
+    score.wins = dict(zip(user_ids.tolist(), wins.tolist()))
+    score.points = dict(zip(user_ids.tolist(), totals.tolist()))
+    for i in np.flatnonzero(home_unique).tolist():
+        score.unique.add((games[i].id, games[i].home_team_id))
+    for i in np.flatnonzero(away_unique).tolist():
+        score.unique.add((games[i].id, games[i].away_team_id))
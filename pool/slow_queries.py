@@ -0,0 +1,191 @@
+# pool/slow_queries.py
+import hashlib
+import logging
+import re
+import sys
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, router, transaction
+from django.db.backends.signals import connection_created
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+logger = logging.getLogger("pool.slow_queries")
+
+# Set while a slow query is being explained and saved, so the bookkeeping
+# queries are not themselves logged.
+_recording = ContextVar("pool_slow_query_recording", default=False)
+
+# Project code we attribute a query to when walking the stack
+PROJECT_PACKAGES = ("pool", "accounts", "pages")
+
+IN_LIST_RE = re.compile(r"IN \((?:%s(?:, )?)+\)")
+STRING_RE = re.compile(r"'(?:[^']|'')*'")
+NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+WHITESPACE_RE = re.compile(r"\s+")
+# BEGIN/SAVEPOINT/etc. run while the connection is changing transaction
+# state, when recording (which takes its own savepoint) is not safe
+TRANSACTION_SQL_RE = re.compile(
+    r"\s*(BEGIN|COMMIT|ROLLBACK|SAVEPOINT|RELEASE)\b", re.IGNORECASE)
+
+
+def normalize_sql(sql):
+    """Collapse literals and IN lists so repeats of a query share one entry."""
+    sql = IN_LIST_RE.sub("IN (...)", sql)
+    sql = STRING_RE.sub("?", sql)
+    sql = NUMBER_RE.sub("?", sql)
+    return WHITESPACE_RE.sub(" ", sql).strip()
+
+
+def fingerprint(normalized_sql):
+    return hashlib.sha1(normalized_sql.encode("utf-8")).hexdigest()
+
+
+def explain(connection, sql, params):
+    """EXPLAIN plan text for a SELECT on SQLite or Postgres."""
+    if not sql.lstrip().upper().startswith("SELECT"):
+        return ""
+    if connection.vendor == "sqlite":
+        prefix = "EXPLAIN QUERY PLAN "
+    elif connection.vendor == "postgresql":
+        prefix = "EXPLAIN "
+    else:
+        return ""
+
+    with connection.cursor() as cursor:
+        cursor.execute(prefix + sql, params)
+        rows = cursor.fetchall()
+
+    if connection.vendor == "sqlite":
+        # (id, parent, notused, detail) -- indent children under parents
+        depth = {0: 0}
+        lines = []
+        for node_id, parent, _, detail in rows:
+            depth[node_id] = depth.get(parent, 0) + 1
+            lines.append("  " * (depth[node_id] - 1) + detail)
+        return "\n".join(lines)
+    return "\n".join(row[0] for row in rows)
+
+
+def plan_has_full_scan(plan, vendor):
+    """True if an EXPLAIN plan reads a whole table instead of an index."""
+    for line in plan.splitlines():
+        line = line.strip()
+        if vendor == "sqlite":
+            if line.startswith("SCAN ") and " USING " not in line:
+                return True
+        elif "Seq Scan" in line:
+            return True
+    return False
+
+
+def query_source():
+    """The innermost project frame that issued the query, plus any command."""
+    frame = sys._getframe(1)
+    source = ""
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if (module.split(".")[0] in PROJECT_PACKAGES
+                and module != __name__):
+            source = (f"{module}.{frame.f_code.co_qualname}"
+                      f":{frame.f_lineno}")
+            break
+        frame = frame.f_back
+
+    argv = sys.argv
+    if len(argv) > 1 and argv[0].endswith("manage.py"):
+        command = f"manage.py {argv[1]}"
+        source = f"{source} ({command})" if source else command
+    return source[:255]
+
+
+def record_slow_query(connection, sql, params, duration_ms):
+    from .models import SlowQuery
+
+    normalized = normalize_sql(sql)
+    key = fingerprint(normalized)
+    source = query_source()
+    now = timezone.now()
+
+    token = _recording.set(True)
+    # Each step runs in its own savepoint: the query ran inside the caller's
+    # transaction, and on PostgreSQL a failed EXPLAIN or a duplicate insert
+    # would otherwise abort it for every query that follows
+    alias = router.db_for_write(SlowQuery)
+    try:
+        with transaction.atomic(using=alias):
+            updated = SlowQuery.objects.filter(fingerprint=key).update(
+                count=F("count") + 1,
+                total_ms=F("total_ms") + duration_ms,
+                max_ms=Greatest("max_ms", duration_ms),
+                last_seen=now,
+                source=source,
+            )
+        if not updated:
+            try:
+                with transaction.atomic(using=connection.alias):
+                    plan = explain(connection, sql, params)
+            except DatabaseError as e:
+                plan = f"EXPLAIN failed: {e}"
+            try:
+                with transaction.atomic(using=alias):
+                    SlowQuery.objects.create(
+                        fingerprint=key,
+                        normalized_sql=normalized,
+                        sample_sql=f"{sql}\n-- params: {params!r}",
+                        explain=plan,
+                        vendor=connection.vendor,
+                        source=source,
+                        total_ms=duration_ms,
+                        max_ms=duration_ms,
+                        first_seen=now,
+                        last_seen=now,
+                    )
+            except IntegrityError:
+                # Another worker logged the same query first
+                pass
+    except DatabaseError:
+        logger.exception("Could not record slow query")
+    finally:
+        _recording.reset(token)
+
+    logger.warning("Slow query (%.1f ms) from %s: %s", duration_ms, source,
+                   normalized[:500])
+
+
+class SlowQueryLogger:
+    """Execute wrapper that records queries slower than threshold_ms."""
+
+    def __init__(self, threshold_ms):
+        self.threshold_ms = threshold_ms
+
+    def __call__(self, execute, sql, params, many, context):
+        if _recording.get():
+            return execute(sql, params, many, context)
+
+        start = time.perf_counter()
+        result = execute(sql, params, many, context)
+        duration_ms = (time.perf_counter() - start) * 1000
+        if (duration_ms >= self.threshold_ms and not many
+                and not TRANSACTION_SQL_RE.match(sql)):
+            record_slow_query(context["connection"], sql, params, duration_ms)
+        return result
+
+
+def install_slow_query_log():
+    """Attach the logger to every database connection as it is opened."""
+    threshold = getattr(settings, "POOL_SLOW_QUERY_MS", None)
+    if threshold is None:
+        return
+    wrapper = SlowQueryLogger(threshold)
+
+    def attach(sender, connection, **kwargs):
+        if not any(isinstance(w, SlowQueryLogger)
+                   for w in connection.execute_wrappers):
+            connection.execute_wrappers.append(wrapper)
+
+    connection_created.connect(attach, weak=False,
+                               dispatch_uid="pool_slow_query_log")
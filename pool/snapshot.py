@@ -0,0 +1,306 @@
+# pool/snapshot.py
+"""
+Per-process, read-only columnar copy of a season's games and picks.
+
+The standings and weekly summaries read the season from here instead of
+building thousands of Pick instances on every request. Writes to games and
+picks bump Season.data_version (Season.record_change). A worker re-reads
+that counter at most every POOL_SNAPSHOT_MAX_AGE seconds and reloads when
+it has moved. If every change since was a game result, only those games
+are patched.
+
+Writes that bypass the models (loaddata, queryset.update()) must call
+Season.record_change() themselves.
+"""
+import logging
+import sys
+import threading
+import time
+from array import array
+from bisect import bisect_right
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+
+from .models import Game, GameResultChange, Pick, Season, Team
+
+logger = logging.getLogger("pool.snapshot")
+
+_snapshots = {}  # season_id -> SeasonSnapshot
+_lock = threading.Lock()
+
+
+class SnapshotPick:
+    """Stands in for a Pick in the weekly summary templates."""
+
+    __slots__ = ("id", "user_id", "game", "game_id", "picked_team",
+                 "picked_team_id", "points_earned", "bonus_points")
+
+    def __init__(self, pick_id, user_id, game, picked_team, points_earned,
+                 bonus_points):
+        self.id = pick_id
+        self.user_id = user_id
+        self.game = game
+        self.game_id = game.id
+        self.picked_team = picked_team
+        self.picked_team_id = picked_team.id
+        self.points_earned = points_earned
+        self.bonus_points = bonus_points
+
+    @property
+    def total_points(self):
+        return self.points_earned + self.bonus_points
+
+    def save(self, update_fields):
+        """Write the given result fields back to the Pick row."""
+        Pick.objects.filter(pk=self.id).update(
+            **{field: getattr(self, field) for field in update_fields})
+        Season.record_change(self.game.season_id, game_id=self.game_id)
+
+
+class SeasonSnapshot:
+    """
+    One season as parallel arrays. Games are ordered by (week, game_time,
+    id) and picks by (game, id), so a week or a game is a contiguous slice.
+    Never modified after it is built; patch() returns a new snapshot.
+    """
+
+    def __init__(self, season_id, version):
+        self.season_id = season_id
+        self.version = version
+        self.loaded_at = time.time()
+        self.load_ms = 0.0
+        self.patches = 0
+        self.checked = time.monotonic()
+
+    @classmethod
+    def load(cls, season_id):
+        start = time.perf_counter()
+        version = Season.objects.values_list(
+            "data_version", flat=True).get(pk=season_id)
+        snap = cls(season_id, version)
+        snap.teams = Team.objects.in_bulk()
+
+        snap.game_id = array("q")
+        snap.week = array("H")
+        snap.home = array("q")
+        snap.away = array("q")
+        snap.winner = array("q")  # 0 while undecided
+        snap.points = array("H")
+        snap.kickoff = array("d")  # POSIX timestamps
+        for row in (Game.objects.filter(season_id=season_id)
+                    .order_by("week", "game_time", "id")
+                    .values_list("id", "week", "home_team_id", "away_team_id",
+                                 "winner_id", "points", "game_time")):
+            snap.game_id.append(row[0])
+            snap.week.append(row[1])
+            snap.home.append(row[2])
+            snap.away.append(row[3])
+            snap.winner.append(row[4] or 0)
+            snap.points.append(row[5])
+            snap.kickoff.append(row[6].timestamp())
+        snap.game_index = {gid: i for i, gid in enumerate(snap.game_id)}
+
+        # Kickoff index for pick locking: game ids sorted by kickoff
+        order = sorted(range(len(snap.kickoff)), key=snap.kickoff.__getitem__)
+        snap.kickoff_sorted = array("d", [snap.kickoff[i] for i in order])
+        snap.kickoff_game = array("q", [snap.game_id[i] for i in order])
+
+        snap.week_games = {}
+        for i, week in enumerate(snap.week):
+            first, _ = snap.week_games.get(week, (i, i))
+            snap.week_games[week] = (first, i + 1)
+
+        picks = sorted(
+            Pick.objects.filter(season_id=season_id).values_list(
+                "game_id", "id", "user_id", "picked_team_id", "points_earned",
+                "bonus_points"),
+            key=lambda row: (snap.game_index[row[0]], row[1]),
+        )
+        snap.pick_id = array("q", [row[1] for row in picks])
+        snap.pick_user = array("q", [row[2] for row in picks])
+        snap.pick_game = array("q", [row[0] for row in picks])
+        snap.pick_team = array("q", [row[3] for row in picks])
+        snap.pick_points = array("H", [row[4] for row in picks])
+        snap.pick_bonus = array("H", [row[5] for row in picks])
+
+        snap.game_picks = {}
+        for i, game_id in enumerate(snap.pick_game):
+            first, _ = snap.game_picks.get(game_id, (i, i))
+            snap.game_picks[game_id] = (first, i + 1)
+        snap.week_picks = {}
+        for week, (first, last) in snap.week_games.items():
+            spans = [snap.game_picks[gid] for gid in snap.game_id[first:last]
+                     if gid in snap.game_picks]
+            if spans:
+                snap.week_picks[week] = (spans[0][0], spans[-1][1])
+
+        snap.load_ms = (time.perf_counter() - start) * 1000
+        logger.info("Loaded season %s snapshot v%s: %d games, %d picks, "
+                    "%.0f KB in %.0f ms", season_id, version, len(snap.game_id),
+                    len(snap.pick_id), snap.memory_bytes() / 1024, snap.load_ms)
+        return snap
+
+    def patch(self, version):
+        """
+        A copy updated to `version`, or None if something other than game
+        results changed since this snapshot was built.
+        """
+        changes = list(
+            GameResultChange.objects.filter(
+                season_id=self.season_id, version__gt=self.version,
+                version__lte=version)
+            .values_list("version", "game_id")
+        )
+        if len({v for v, _ in changes}) != version - self.version:
+            return None
+        game_ids = {game_id for _, game_id in changes}
+
+        snap = SeasonSnapshot(self.season_id, version)
+        snap.__dict__.update({
+            key: value for key, value in self.__dict__.items()
+            if key not in ("version", "loaded_at", "checked")
+        })
+        snap.loaded_at = self.loaded_at
+        snap.patches = self.patches + 1
+        snap.winner = array("q", self.winner)
+        snap.points = array("H", self.points)
+        snap.pick_points = array("H", self.pick_points)
+        snap.pick_bonus = array("H", self.pick_bonus)
+
+        for game_id, week, home, away, winner, points in (
+                Game.objects.filter(pk__in=game_ids).values_list(
+                    "id", "week", "home_team_id", "away_team_id", "winner_id",
+                    "points")):
+            i = self.game_index.get(game_id)
+            if i is None or (week, home, away) != (
+                    self.week[i], self.home[i], self.away[i]):
+                return None
+            snap.winner[i] = winner or 0
+            snap.points[i] = points
+
+        picks = (Pick.objects.filter(game_id__in=game_ids)
+                 .order_by("game_id", "id")
+                 .values_list("game_id", "id", "points_earned", "bonus_points"))
+        seen = {game_id: 0 for game_id in game_ids}
+        for game_id, pick_id, points_earned, bonus in picks:
+            first, last = self.game_picks.get(game_id, (0, 0))
+            i = first + seen[game_id]
+            if i >= last or self.pick_id[i] != pick_id:
+                return None
+            snap.pick_points[i] = points_earned
+            snap.pick_bonus[i] = bonus
+            seen[game_id] += 1
+        for game_id in game_ids:
+            first, last = self.game_picks.get(game_id, (0, 0))
+            if seen[game_id] != last - first:
+                return None
+        return snap
+
+    # ------------------------
+    # Read API
+    # ------------------------
+    def weeks(self):
+        return sorted(self.week_games)
+
+    def games_for_week(self, week):
+        """The week's games as unsaved Game instances with teams attached."""
+        first, last = self.week_games.get(week, (0, 0))
+        games = []
+        for i in range(first, last):
+            game = Game(
+                id=self.game_id[i],
+                season_id=self.season_id,
+                week=self.week[i],
+                home_team=self.teams[self.home[i]],
+                away_team=self.teams[self.away[i]],
+                winner=self.teams.get(self.winner[i]),
+                points=self.points[i],
+                game_time=datetime.fromtimestamp(self.kickoff[i], dt_timezone.utc),
+            )
+            game._state.adding = False
+            games.append(game)
+        return games
+
+    def pick_rows(self, week):
+        """(user_id, game_id, picked_team_id) for every pick in a week."""
+        first, last = self.week_picks.get(week, (0, 0))
+        return zip(self.pick_user[first:last], self.pick_game[first:last],
+                   self.pick_team[first:last])
+
+    def picks_for_week(self, week, games):
+        """SnapshotPicks for a week, attached to games_for_week() instances."""
+        first, last = self.week_picks.get(week, (0, 0))
+        games_by_id = {game.id: game for game in games}
+        return [
+            SnapshotPick(self.pick_id[i], self.pick_user[i],
+                         games_by_id[self.pick_game[i]],
+                         self.teams[self.pick_team[i]],
+                         self.pick_points[i], self.pick_bonus[i])
+            for i in range(first, last)
+        ]
+
+    def started_games(self, now):
+        """Ids of the games that have kicked off by `now`."""
+        started = bisect_right(self.kickoff_sorted, now.timestamp())
+        return frozenset(self.kickoff_game[:started])
+
+    def memory_bytes(self):
+        """Approximate size of the arrays and indexes this snapshot holds."""
+        arrays = [value for value in self.__dict__.values()
+                  if isinstance(value, array)]
+        indexes = [self.game_index, self.week_games, self.game_picks,
+                   self.week_picks]
+        return (sum(sys.getsizeof(a) for a in arrays)
+                + sum(sys.getsizeof(d) for d in indexes)
+                + sum(sys.getsizeof(t) for t in self.teams.values()))
+
+    def stats(self):
+        return {
+            "season_id": self.season_id,
+            "version": self.version,
+            "games": len(self.game_id),
+            "picks": len(self.pick_id),
+            "kb": round(self.memory_bytes() / 1024, 1),
+            "load_ms": round(self.load_ms, 1),
+            "patches": self.patches,
+            "loaded_at": datetime.fromtimestamp(self.loaded_at, dt_timezone.utc),
+        }
+
+
+def get_snapshot(season):
+    """This process's snapshot of a season, reloaded or patched if stale."""
+    max_age = getattr(settings, "POOL_SNAPSHOT_MAX_AGE", 1.0)
+    snap = _snapshots.get(season.pk)
+    if snap is not None and time.monotonic() - snap.checked < max_age:
+        return snap
+
+    with _lock:
+        snap = _snapshots.get(season.pk)
+        if snap is not None and time.monotonic() - snap.checked < max_age:
+            return snap
+        version = Season.objects.values_list(
+            "data_version", flat=True).get(pk=season.pk)
+        if snap is None:
+            snap = SeasonSnapshot.load(season.pk)
+        elif version != snap.version:
+            snap = snap.patch(version) or SeasonSnapshot.load(season.pk)
+        snap.checked = time.monotonic()
+        _snapshots[season.pk] = snap
+    return snap
+
+
+def invalidate(season_id):
+    """Make the next read check the data version (after a local write)."""
+    snap = _snapshots.get(season_id)
+    if snap is not None:
+        snap.checked = float("-inf")
+
+
+def snapshot_stats():
+    return [snap.stats() for snap in list(_snapshots.values())]
+
+
+def clear_snapshots():
+    with _lock:
+        _snapshots.clear()
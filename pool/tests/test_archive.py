@@ -0,0 +1,92 @@
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from pool.archive import load_season_archive
+from pool.management.commands.archive_season import season_rows
+from pool.management.commands.benchmark_pool import seed_benchmark_data
+from pool.models import Email, Game, Pick, Score, Season, WeeklyNote
+from pool.views import DashboardView
+
+
+class ArchiveSeasonTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # Two decided weeks and one still to play
+        cls.users, _ = seed_benchmark_data(3, 3)
+        cls.season = Season.objects.get()
+        Score.objects.create(user=cls.users[0], season=cls.season, week=1,
+                             points=3)
+        Email.objects.create(season=cls.season, email_text="Week 1 recap")
+        WeeklyNote.objects.create(season=cls.season, week=1, notes="Upsets")
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.enterContext(override_settings(POOL_ARCHIVE_DIR=self.directory))
+
+    def archive(self, **options):
+        call_command("archive_season", self.season.year, force=True,
+                     stdout=StringIO(), **options)
+        return load_season_archive(self.season.year)
+
+    def test_the_archive_reads_back_as_the_dashboard_showed_it(self):
+        view = DashboardView()
+        standings = view.get_overall_standings(season=self.season)
+        summaries = view.get_all_weeks_game_picks_summary(season=self.season)
+
+        archive = self.archive()
+        self.assertEqual(set(archive.games), set(
+            Game.objects.filter(season=self.season).values_list("id", flat=True)))
+        self.assertEqual(
+            sorted((p["user"]["id"], p["game"]["id"], p["picked_team"]["id"])
+                   for p in archive.picks),
+            sorted(Pick.objects.filter(season=self.season).values_list(
+                "user_id", "game_id", "picked_team_id")))
+        self.assertEqual(
+            [(row["user"]["id"], row["total_points"], row["rank"])
+             for row in archive.standings()["standings"]],
+            [(row["user"].id, row["total_points"], row["rank"])
+             for row in standings["standings"]])
+        self.assertEqual(
+            [(entry["week"], [(row["user"]["id"], row["points_earned"])
+                              for row in entry["summary"]])
+             for entry in archive.week_summaries()],
+            [(entry["week"], [(row["user"].id, row["points_earned"])
+                              for row in entry["summary"]])
+             for entry in summaries])
+
+    def test_archiving_keeps_the_live_rows_unless_asked(self):
+        self.archive()
+        self.season.refresh_from_db()
+        self.assertTrue(self.season.is_archived)
+        self.assertTrue(Pick.objects.filter(season=self.season).exists())
+
+    def test_delete_leaves_no_rows_for_the_season(self):
+        self.assertGreater(
+            len([rows for rows in season_rows(self.season) if rows.exists()]),
+            5)
+        archive = self.archive(delete=True)
+
+        for rows in season_rows(self.season):
+            self.assertFalse(rows.exists(), rows.model.__name__)
+        self.season.refresh_from_db()
+        self.assertTrue(self.season.is_archived)
+        self.assertTrue(archive.picks)
+
+    def test_undecided_picks_are_not_counted_wrong(self):
+        report = self.archive().season_report()
+        decided = Pick.objects.filter(season=self.season,
+                                      game__winner__isnull=False)
+        correct = decided.filter(is_correct=True).count()
+        self.assertIn(f"Record: {correct} / {decided.count() - correct}\n",
+                      report)
+        self.assertIn(f"Pool Accuracy: {100 * correct / decided.count():.1f}%",
+                      report)
+        undecided = Pick.objects.filter(season=self.season,
+                                        game__winner__isnull=True).count()
+        self.assertTrue(undecided)
+        self.assertIn(f"Undecided Picks: {undecided}\n", report)
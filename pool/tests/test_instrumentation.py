@@ -0,0 +1,140 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from pool.instrumentation import RequestTiming, RouteStats, percentile
+from pool.models import PoolSettings, RequestProfile
+
+User = get_user_model()
+
+
+class RequestTimingTests(TestCase):
+    def test_every_query_is_counted_and_timed(self):
+        timing = RequestTiming()
+        with connection.execute_wrapper(timing):
+            PoolSettings.objects.count()
+            PoolSettings.objects.exists()
+        self.assertEqual(timing.queries, 2)
+        self.assertGreater(timing.db_ms, 0)
+
+    @override_settings(POOL_REQUEST_BUDGETS={"queries": 1, "db_ms": None})
+    def test_over_budget_names_the_budgets_exceeded(self):
+        timing = RequestTiming()
+        timing.queries = 2
+        timing.db_ms = 10_000
+        self.assertEqual(timing.over_budget(), ["queries"])
+
+
+@override_settings(POOL_REQUEST_TIMING=True)
+class RequestTimingMiddlewareTests(TestCase):
+    def get(self):
+        with self.assertLogs("pool.timing", "INFO") as logs:
+            response = self.client.get("/")
+        self.assertEqual(len(logs.records), 1)
+        return response, logs.records[0]
+
+    def test_each_request_logs_one_json_line(self):
+        response, record = self.get()
+        data = json.loads(record.getMessage())
+        self.assertEqual(record.levelname, "INFO")
+        self.assertEqual((data["method"], data["path"], data["status"]),
+                         ("GET", "/", response.status_code))
+        self.assertIsNotNone(data["route"])
+        self.assertNotIn("over_budget", data)
+
+    def test_the_server_timing_header(self):
+        response, _ = self.get()
+        self.assertRegex(
+            response["Server-Timing"],
+            r'^db;dur=[\d.]+;desc="\d+ queries", view;dur=[\d.]+, '
+            r'tpl;dur=[\d.]+, total;dur=[\d.]+$')
+
+    @override_settings(POOL_REQUEST_BUDGETS={"total_ms": 0})
+    def test_a_request_over_budget_is_a_warning(self):
+        _, record = self.get()
+        self.assertEqual(record.levelname, "WARNING")
+        self.assertEqual(json.loads(record.getMessage())["over_budget"],
+                         ["total_ms"])
+
+    def test_requests_are_off_with_the_setting(self):
+        with override_settings(POOL_REQUEST_TIMING=False):
+            response = self.client.get("/")
+        self.assertNotIn("Server-Timing", response)
+
+
+class RouteStatsTests(SimpleTestCase):
+    def timing(self, route, total_ms, queries=1):
+        timing = RequestTiming()
+        timing.route, timing.total_ms, timing.queries = route, total_ms, queries
+        return timing
+
+    def test_percentiles_are_nearest_rank(self):
+        values = [float(n) for n in range(1, 101)]
+        self.assertEqual(percentile(values, 50), 50.0)
+        self.assertEqual(percentile(values, 99), 99.0)
+        self.assertEqual(percentile([7.0], 90), 7.0)
+        self.assertEqual(percentile([], 90), 0.0)
+
+    def test_the_slowest_route_comes_first(self):
+        stats = RouteStats()
+        for ms in (10, 20, 30):
+            stats.record(self.timing("dashboard", ms))
+        stats.record(self.timing("make_picks", 500, queries=9))
+        rows = stats.summary()
+        self.assertEqual([row["route"] for row in rows],
+                         ["make_picks", "dashboard"])
+        self.assertEqual((rows[1]["count"], rows[1]["total_p50"]), (3, 20.0))
+        self.assertEqual(rows[0]["queries_max"], 9)
+
+    def test_samples_and_routes_are_bounded(self):
+        stats = RouteStats(max_samples=2, max_routes=1)
+        for ms in (1, 2, 3):
+            stats.record(self.timing("dashboard", ms))
+        stats.record(self.timing("make_picks", 1))
+        row, = stats.summary()
+        self.assertEqual((row["route"], row["count"]), ("dashboard", 2))
+
+
+@override_settings(POOL_REQUEST_TIMING=False)
+class ProfilerMiddlewareTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser("profiler", "p@example.com",
+                                                  "x")
+        cls.player = User.objects.create_user("player", "q@example.com")
+
+    def test_a_superuser_can_profile_a_request(self):
+        self.client.force_login(self.admin)
+        response = self.client.get("/", {"_profile": "1"})
+        profile = RequestProfile.objects.get()
+        self.assertEqual(response["X-Pool-Profile-Id"], str(profile.pk))
+        self.assertEqual((profile.method, profile.path, profile.user),
+                         ("GET", "/?_profile=1", self.admin))
+        self.assertIn("function calls", profile.top_functions(limit=5))
+
+    def test_the_header_asks_for_a_profile_too(self):
+        self.client.force_login(self.admin)
+        self.client.get("/", HTTP_X_POOL_PROFILE="1")
+        self.assertEqual(RequestProfile.objects.count(), 1)
+
+    def test_other_users_are_not_profiled(self):
+        self.client.force_login(self.player)
+        response = self.client.get("/", {"_profile": "1"})
+        self.assertNotIn("X-Pool-Profile-Id", response)
+        self.assertFalse(RequestProfile.objects.exists())
+
+    def test_requests_without_the_trigger_are_not_profiled(self):
+        self.client.force_login(self.admin)
+        self.client.get("/")
+        self.assertFalse(RequestProfile.objects.exists())
+
+    @override_settings(POOL_PROFILE_KEEP=2)
+    def test_only_the_newest_profiles_are_kept(self):
+        self.client.force_login(self.admin)
+        ids = [self.client.get("/", {"_profile": "1"})["X-Pool-Profile-Id"]
+               for _ in range(3)]
+        self.assertEqual(
+            sorted(RequestProfile.objects.values_list("pk", flat=True)),
+            sorted(int(pk) for pk in ids[1:]))
@@ -0,0 +1,95 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import skipUnless
+
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from pool.jobs import enqueue, inline_runner
+from pool.models import PoolJob
+
+CHECK = [["check", {}]]
+
+
+class InlineRunnerTests(TransactionTestCase):
+    """Jobs run in the process that queued them, with no worker."""
+
+    def wait_for_jobs(self):
+        thread = inline_runner.thread
+        if thread is not None:
+            thread.join(10)
+            self.assertFalse(thread.is_alive())
+
+    @override_settings(POOL_JOB_RUNNER="inline")
+    def test_a_queued_job_runs_in_this_process(self):
+        job = PoolJob.enqueue("check", CHECK)
+        self.wait_for_jobs()
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, PoolJob.SUCCEEDED)
+        self.assertEqual(job.attempts, 1)
+        self.assertIn("System check identified", job.output)
+
+    @override_settings(POOL_JOB_RUNNER="inline")
+    def test_jobs_queued_together_all_run(self):
+        jobs = [PoolJob.enqueue(f"check{i}", CHECK) for i in range(3)]
+        self.wait_for_jobs()
+        self.assertEqual(
+            set(PoolJob.objects.filter(pk__in=[job.pk for job in jobs])
+                .values_list("status", flat=True)),
+            {PoolJob.SUCCEEDED})
+
+    @override_settings(POOL_JOB_RUNNER="worker")
+    def test_jobs_wait_for_the_worker(self):
+        job = PoolJob.enqueue("check", CHECK)
+        self.assertIsNone(inline_runner.thread)
+        job.refresh_from_db()
+        self.assertEqual(job.status, PoolJob.QUEUED)
+
+
+@skipUnless(connection.vendor == "sqlite", "SQLite only")
+class WorkerDatabaseTests(TransactionTestCase):
+    def test_the_worker_refuses_a_sqlite_database_of_its_own(self):
+        with self.assertRaisesMessage(CommandError, "--same-machine"):
+            call_command("run_pool_worker", once=True)
+
+    def test_the_worker_runs_next_to_the_web_server(self):
+        job = PoolJob.enqueue("check", CHECK)
+        call_command("run_pool_worker", once=True, same_machine=True,
+                     stdout=StringIO())
+        job.refresh_from_db()
+        self.assertEqual(job.status, PoolJob.SUCCEEDED)
+
+
+class JobAttemptsTests(TestCase):
+    """create_email costs money and saves an Email: it never runs twice."""
+
+    def run_and_fail(self, name):
+        job = enqueue(name)
+        self.assertEqual(PoolJob.claim("test").pk, job.pk)
+        job.refresh_from_db()
+        job.finish("Traceback: boom")
+        return job
+
+    def test_a_failed_create_email_is_not_retried(self):
+        job = self.run_and_fail("create_email")
+        self.assertEqual((job.max_attempts, job.status), (1, PoolJob.FAILED))
+        self.assertIsNone(PoolJob.claim("test"))
+
+    def test_other_jobs_are_retried(self):
+        job = self.run_and_fail("warm_caches")
+        self.assertEqual(job.status, PoolJob.QUEUED)
+
+    def test_an_abandoned_job_is_only_queued_again_with_attempts_left(self):
+        jobs = [enqueue("create_email"), enqueue("warm_caches")]
+        for _ in jobs:
+            PoolJob.claim("test")
+        PoolJob.objects.update(heartbeat_at=timezone.now() - timedelta(hours=1))
+
+        PoolJob.requeue_abandoned(60)
+
+        self.assertEqual(
+            [PoolJob.objects.get(pk=job.pk).status for job in jobs],
+            [PoolJob.FAILED, PoolJob.QUEUED])
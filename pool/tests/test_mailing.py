@@ -0,0 +1,176 @@
+from smtplib import SMTPConnectError, SMTPRecipientsRefused
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from pool.mailing import send_recap
+from pool.models import Email, EmailDelivery, PoolJob
+
+User = get_user_model()
+
+RECAP = """Subject: Week 1 recap
+
+## Standings
+
+**Bench0** leads after week 1. See you next week.
+"""
+
+USERS = 7
+BATCH_SIZE = 3
+BATCHES = 3
+
+
+class RecordingBackend(EmailBackend):
+    """
+    The locmem backend, counting connections, refusing some addresses and
+    failing to connect from the fail_from'th open() on.
+    """
+    opened = 0
+    refuse = set()
+    fail_from = None
+
+    def open(self):
+        RecordingBackend.opened += 1
+        if self.fail_from is not None and self.opened >= self.fail_from:
+            raise SMTPConnectError(421, b"service not available")
+        return super().open()
+
+    def send_messages(self, messages):
+        for message in messages:
+            refused = self.refuse.intersection(message.to)
+            if refused:
+                raise SMTPRecipientsRefused(
+                    {address: (550, b"mailbox unavailable")
+                     for address in refused})
+        return super().send_messages(messages)
+
+
+@override_settings(EMAIL_BACKEND=f"{__name__}.RecordingBackend",
+                   POOL_EMAIL_BATCH_PAUSE_SECONDS=0,
+                   POOL_REQUEST_TIMING=False)
+class RecapEmailTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.addresses = [f"player{i}@example.com" for i in range(USERS)]
+        for i, address in enumerate(cls.addresses):
+            User.objects.create_user(f"player{i}", address)
+        User.objects.create_user("no-email", "")
+        User.objects.create_user("left", "left@example.com", is_active=False)
+        cls.email = Email.objects.create(email_text=RECAP)
+
+    def setUp(self):
+        RecordingBackend.opened = 0
+        RecordingBackend.refuse = set()
+        RecordingBackend.fail_from = None
+
+    def send(self, email=None, **kwargs):
+        mail.outbox = []
+        RecordingBackend.opened = 0
+        return send_recap(email or self.email, BATCH_SIZE, **kwargs)
+
+    def test_one_message_per_active_user(self):
+        self.send()
+        self.assertEqual([message.to for message in mail.outbox],
+                         [[address] for address in self.addresses])
+        self.assertFalse(any(message.cc or message.bcc
+                             for message in mail.outbox))
+
+    def test_one_connection_per_batch(self):
+        self.send()
+        self.assertEqual(RecordingBackend.opened, BATCHES)
+
+    def test_the_subject_and_html_come_from_the_markdown(self):
+        self.send()
+        message = mail.outbox[0]
+        self.assertEqual(message.subject, "Week 1 recap")
+        self.assertIn("<strong>Bench0</strong>", message.alternatives[0][0])
+        self.assertNotIn("**", message.body)
+
+    def test_each_batch_is_recorded(self):
+        batches = []
+        delivery = self.send(
+            progress=lambda delivery, batch: batches.append(batch.number))
+        self.assertEqual(batches, [1, 2, 3])
+        self.assertEqual([batch["sent"] for batch in delivery.batches],
+                         [3, 3, 1])
+        self.assertEqual((delivery.recipients, delivery.sent, delivery.failed),
+                         (USERS, USERS, 0))
+        self.assertIsNotNone(delivery.finished_at)
+
+    def test_a_rerun_sends_to_nobody_already_reached(self):
+        self.send()
+        delivery = self.send()
+        self.assertEqual(mail.outbox, [])
+        self.assertEqual(delivery.recipients, 0)
+        self.assertEqual(RecordingBackend.opened, 0)
+
+    def test_again_sends_to_everyone(self):
+        self.send()
+        self.send(again=True)
+        self.assertEqual(len(mail.outbox), USERS)
+
+    def test_refused_recipients_are_recorded_and_retried_alone(self):
+        refused = {self.addresses[1], self.addresses[-1]}
+        RecordingBackend.refuse = refused
+        with self.assertLogs("pool.mailing", "WARNING"):
+            delivery = self.send()
+        self.assertEqual({failure["address"] for failure in delivery.failures},
+                         refused)
+        self.assertEqual(delivery.sent, USERS - len(refused))
+        self.assertEqual(len(mail.outbox), USERS - len(refused))
+        # A failure reopens its batch's connection
+        self.assertEqual(RecordingBackend.opened, BATCHES + len(refused))
+
+        RecordingBackend.refuse = set()
+        delivery = self.send()
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox),
+                         sorted(refused))
+        self.assertEqual(delivery.sent, len(refused))
+        self.assertEqual(EmailDelivery.objects.filter(email=self.email).count(),
+                         2)
+
+    def test_batches_sent_before_a_connection_failure_are_kept(self):
+        RecordingBackend.fail_from = 2
+        with self.assertRaises(SMTPConnectError):
+            self.send()
+        delivery = EmailDelivery.objects.get()
+        self.assertEqual(delivery.sent_to, self.addresses[:BATCH_SIZE])
+        self.assertIsNone(delivery.finished_at)
+
+        RecordingBackend.fail_from = None
+        delivery = self.send()
+        self.assertEqual([message.to[0] for message in mail.outbox],
+                         self.addresses[BATCH_SIZE:])
+        self.assertEqual(delivery.recipients, USERS - BATCH_SIZE)
+
+    def test_a_failed_reconnect_keeps_what_its_batch_sent(self):
+        # The second message is refused and the connection cannot reopen
+        RecordingBackend.refuse = {self.addresses[1]}
+        RecordingBackend.fail_from = 2
+        with self.assertLogs("pool.mailing", "WARNING"), \
+                self.assertRaises(SMTPConnectError):
+            self.send()
+        delivery = EmailDelivery.objects.get()
+        self.assertEqual(delivery.sent_to, self.addresses[:1])
+        self.assertEqual([failure["address"] for failure in delivery.failures],
+                         self.addresses[1:2])
+
+        RecordingBackend.refuse, RecordingBackend.fail_from = set(), None
+        self.send()
+        self.assertEqual([message.to[0] for message in mail.outbox],
+                         self.addresses[1:])
+
+    def test_the_admin_queues_the_send(self):
+        admin = User.objects.create_superuser("recap-admin",
+                                              "admin@example.com", "x")
+        self.client.force_login(admin)
+        response = self.client.get(reverse("pooladmin:send_email"),
+                                   {"id": self.email.pk})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(mail.outbox, [])
+        job = PoolJob.objects.get(name="send_email")
+        self.assertEqual(job.steps,
+                         [["send_recap_email", {"email_id": self.email.pk}]])
@@ -0,0 +1,342 @@
+import threading
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import update_last_login
+from django.core.management import CommandError, call_command
+from django.db import connections
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from pool import snapshot
+from pool.management.commands.benchmark_pool import seed_benchmark_data
+from pool.models import Game, GameResultChange, Pick, Season, WarmResult
+from pool.scheduler import Scheduler
+from pool.utils import get_current_season
+
+User = get_user_model()
+
+
+class GameSaveTests(TestCase):
+    def setUp(self):
+        users, _ = seed_benchmark_data(2, 2)
+        self.game = Game.objects.filter(week=2).order_by("game_time").first()
+        # One user on each side
+        Pick.objects.filter(game=self.game, user=users[0]).update(
+            picked_team=self.game.home_team)
+        Pick.objects.filter(game=self.game, user=users[1]).update(
+            picked_team=self.game.away_team)
+
+    def points(self):
+        return dict(Pick.objects.filter(game=self.game)
+                    .values_list("picked_team_id", "points_earned"))
+
+    def test_week_change_moves_the_picks(self):
+        self.game.week = 1
+        self.game.save()
+        self.assertEqual(set(Pick.objects.filter(game=self.game)
+                             .values_list("week", flat=True)), {1})
+
+    def test_winner_change_scores_the_picks(self):
+        self.game.winner = self.game.home_team
+        self.game.save()
+        self.assertEqual(self.points(), {self.game.home_team_id: self.game.points,
+                                         self.game.away_team_id: 0})
+
+        self.game.winner = None
+        self.game.save()
+        self.assertEqual(set(self.points().values()), {0})
+
+    def test_week_and_winner_change_in_one_save(self):
+        self.game.week = 1
+        self.game.winner = self.game.away_team
+        self.game.save()
+        self.assertEqual(set(Pick.objects.filter(game=self.game)
+                             .values_list("week", flat=True)), {1})
+        self.assertEqual(self.points(), {self.game.home_team_id: 0,
+                                         self.game.away_team_id: self.game.points})
+
+
+class DataVersionTests(TestCase):
+    def setUp(self):
+        self.users, _ = seed_benchmark_data(2, 2)
+        self.season = Season.objects.get()
+        self.picks = list(Pick.objects.filter(week=1).order_by("id")[:4])
+
+    def version(self):
+        return Season.objects.get(pk=self.season.pk).data_version
+
+    def test_each_save_bumps_outside_a_batch(self):
+        before = self.version()
+        for pick in self.picks:
+            pick.save(update_fields=["bonus_points"])
+        self.assertEqual(self.version(), before + len(self.picks))
+
+    def test_a_batch_bumps_once(self):
+        before = self.version()
+        with Season.batch_changes():
+            for pick in self.picks:
+                pick.bonus_points = 2
+                pick.save(update_fields=["bonus_points"])
+            with Season.batch_changes():  # nested: still one bump
+                self.picks[0].save(update_fields=["bonus_points"])
+            self.assertEqual(self.version(), before)
+        self.assertEqual(self.version(), before + 1)
+
+        # Result-only changes are logged for every game, at that version
+        self.assertEqual(
+            set(GameResultChange.objects.filter(version=before + 1)
+                .values_list("game_id", flat=True)),
+            {pick.game_id for pick in self.picks})
+
+    def test_a_full_change_in_a_batch_logs_no_games(self):
+        before = self.version()
+        with Season.batch_changes():
+            self.picks[0].save(update_fields=["bonus_points"])
+            self.picks[1].save()
+        self.assertEqual(self.version(), before + 1)
+        self.assertFalse(GameResultChange.objects.filter(
+            version=before + 1).exists())
+
+    def test_submit_bumps_once(self):
+        games = list(Game.objects.filter(week=2).select_related("home_team"))
+        before = self.version()
+        Pick.submit(self.users[0], [(game, game.home_team) for game in games])
+        self.assertEqual(self.version(), before + 1)
+
+
+class SnapshotPatchTests(TestCase):
+    def setUp(self):
+        snapshot._snapshots.clear()
+        seed_benchmark_data(2, 2)
+        self.season = Season.objects.get()
+        self.snap = self.reread()
+
+    def reread(self):
+        snapshot.invalidate(self.season.pk)
+        return snapshot.get_snapshot(self.season)
+
+    def test_a_result_is_patched_in_place(self):
+        game = Game.objects.filter(week=2).order_by("game_time", "id").first()
+        game.winner = game.home_team
+        game.save()
+
+        snap = self.reread()
+        self.assertEqual(snap.patches, 1)
+        self.assertEqual(snap.loaded_at, self.snap.loaded_at)
+        self.assertGreater(snap.version, self.snap.version)
+        i = snap.game_index[game.pk]
+        self.assertEqual(snap.winner[i], game.home_team_id)
+        self.assertEqual(self.snap.winner[i], 0)  # the old copy is untouched
+        first, last = snap.game_picks[game.pk]
+        self.assertEqual(
+            {pick_id: points for pick_id, points in
+             zip(snap.pick_id[first:last], snap.pick_points[first:last])},
+            dict(Pick.objects.filter(game=game)
+                 .values_list("id", "points_earned")))
+
+    def test_a_pick_change_reloads_the_season(self):
+        pick = Pick.objects.filter(week=2).select_related("game").first()
+        game = pick.game
+        pick.picked_team_id = (game.away_team_id
+                               if pick.picked_team_id == game.home_team_id
+                               else game.home_team_id)
+        pick.save()
+
+        snap = self.reread()
+        self.assertEqual(snap.patches, 0)
+        self.assertGreater(snap.version, self.snap.version)
+        i = list(snap.pick_id).index(pick.pk)
+        self.assertEqual(snap.pick_team[i], pick.picked_team_id)
+
+    def test_a_result_then_a_pick_change_reloads_the_season(self):
+        game = Game.objects.filter(week=2).order_by("game_time", "id").first()
+        game.winner = game.away_team
+        game.save()
+        Pick.objects.filter(game=game).first().save()
+
+        snap = self.reread()
+        self.assertEqual(snap.patches, 0)
+        self.assertEqual(snap.winner[snap.game_index[game.pk]],
+                         game.away_team_id)
+
+
+class WarmResultUserTests(TestCase):
+    """Stored results name every user; only changes they show drop them."""
+
+    def setUp(self):
+        self.users, _ = seed_benchmark_data(2, 1)
+        self.user = User.objects.get(pk=self.users[0].pk)
+        self.season = Season.objects.get()
+        WarmResult.store(self.season, "standings", self.season.data_version,
+                         {"standings": []})
+
+    def assertKept(self):
+        self.assertTrue(WarmResult.objects.exists())
+
+    def assertDiscarded(self):
+        self.assertFalse(WarmResult.objects.exists())
+
+    def test_a_login_keeps_them(self):
+        update_last_login(None, self.user)
+        self.assertKept()
+
+    def test_a_full_save_without_changes_keeps_them(self):
+        self.user.set_password("new password")
+        self.user.save()
+        self.assertKept()
+
+    def test_a_name_change_discards_them(self):
+        self.user.first_name = "Renamed"
+        self.user.save()
+        self.assertDiscarded()
+
+    def test_a_change_outside_update_fields_keeps_them(self):
+        self.user.first_name = "Renamed"
+        self.user.save(update_fields=["password"])
+        self.assertKept()
+
+    def test_deactivating_discards_them(self):
+        self.user.is_active = False
+        self.user.save(update_fields=["is_active"])
+        self.assertDiscarded()
+
+    def test_a_new_user_discards_them(self):
+        User.objects.create_user("newcomer", "newcomer@example.com")
+        self.assertDiscarded()
+
+    def test_a_deleted_user_discards_them(self):
+        self.user.delete()
+        self.assertDiscarded()
+
+
+class WarmResultFormatTests(TestCase):
+    """Results pickled by an older RESULT_FORMAT are never served."""
+
+    def setUp(self):
+        seed_benchmark_data(2, 1)
+        self.season = Season.objects.get()
+        WarmResult.store(self.season, "standings", self.season.data_version,
+                         {"standings": "old"})
+        WarmResult.objects.update(result_format=WarmResult.RESULT_FORMAT - 1)
+
+    def test_fetch_ignores_another_format(self):
+        self.assertIsNone(WarmResult.fetch(self.season, "standings"))
+
+    def test_revalidate_recomputes_instead_of_serving_it(self):
+        value, freshness = WarmResult.get_or_revalidate(
+            self.season, "standings", lambda: {"standings": "new"})
+        self.assertEqual(value, {"standings": "new"})
+        self.assertFalse(freshness["stale"])
+        self.assertEqual(WarmResult.fetch(self.season, "standings"),
+                         {"standings": "new"})
+
+    def test_warming_without_force_replaces_it(self):
+        out = StringIO()
+        call_command("warm_pool_caches", stdout=out)
+        self.assertNotIn("standings        current, skipped", out.getvalue())
+        self.assertEqual(
+            WarmResult.objects.get(name="standings").result_format,
+            WarmResult.RESULT_FORMAT)
+        self.assertNotEqual(WarmResult.fetch(self.season, "standings"),
+                            {"standings": "old"})
+
+
+@override_settings(POOL_STALE_MAX_SECONDS=30)
+class WarmResultRevalidateTests(TransactionTestCase):
+    """The refreshing_since claim on a stale result."""
+
+    def setUp(self):
+        self.season, _ = Season.objects.get_or_create(year=2025)
+        WarmResult.store(self.season, "standings", self.season.data_version,
+                         "old")
+        Season.record_change(self.season.pk)
+        # The background thread is started by hand in these tests
+        self.revalidate = self.enterContext(
+            mock.patch.object(WarmResult, "revalidate"))
+
+    def get(self, compute=lambda: "new"):
+        return WarmResult.get_or_revalidate(self.season, "standings", compute)
+
+    def claim(self):
+        return WarmResult.objects.values_list(
+            "refreshing_since", flat=True).get()
+
+    def test_the_stale_row_is_served_while_one_caller_claims_it(self):
+        callers = 8
+        start_line = threading.Barrier(callers)
+        results = []
+
+        def get():
+            try:
+                start_line.wait()
+                results.append(self.get())
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=get) for _ in range(callers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual([(value, freshness["stale"])
+                          for value, freshness in results],
+                         [("old", True)] * callers)
+        self.assertEqual(self.revalidate.call_count, 1)
+        self.assertEqual(self.revalidate.call_args.kwargs["claimed_at"],
+                         self.claim())
+
+    def test_an_expired_claim_is_taken_over(self):
+        WarmResult.objects.update(
+            refreshing_since=timezone.now() - timedelta(seconds=31))
+        value, freshness = self.get()
+        self.assertEqual((value, freshness["stale"]), ("new", False))
+        self.revalidate.assert_not_called()
+        self.assertIsNone(self.claim())
+        self.assertEqual(WarmResult.fetch(self.season, "standings"), "new")
+
+    def test_the_refresh_stores_the_result_and_clears_the_claim(self):
+        self.get()
+        WarmResult.refresh(*self.revalidate.call_args.args,
+                           **self.revalidate.call_args.kwargs)
+        self.assertIsNone(self.claim())
+        self.assertEqual(self.get(), ("new", mock.ANY))
+
+    def test_a_failed_recompute_releases_the_claim(self):
+        def fail():
+            raise ValueError("no standings")
+
+        self.get(fail)
+        with self.assertLogs("pool.picks", "ERROR"):
+            WarmResult.refresh(*self.revalidate.call_args.args,
+                               **self.revalidate.call_args.kwargs)
+        self.assertIsNone(self.claim())
+
+        # The next request serves the stale row and claims it again
+        value, freshness = self.get()
+        self.assertEqual((value, freshness["stale"]), ("old", True))
+        self.assertEqual(self.revalidate.call_count, 2)
+
+
+class ArchivedSeasonTests(TestCase):
+    def setUp(self):
+        seed_benchmark_data(2, 2)
+        self.season = Season.objects.get()
+        self.season.is_archived = True
+        self.season.save()
+
+    def test_an_archived_season_is_never_current(self):
+        self.assertTrue(Season.objects.get().is_current)
+        self.assertIsNone(get_current_season())
+
+    def test_the_scheduler_skips_it(self):
+        self.assertEqual(Scheduler().load(), [])
+
+    def test_the_warmer_refuses_it(self):
+        with self.assertRaisesMessage(CommandError, "archived"):
+            call_command("warm_pool_caches", season=self.season.year,
+                         stdout=StringIO())
+        self.assertFalse(WarmResult.objects.exists())
@@ -0,0 +1,139 @@
+import random
+import threading
+from datetime import timedelta
+
+from django.db import connections
+from django.db.models import Count
+from django.test import TransactionTestCase, tag
+from django.utils import timezone
+
+from pool.management.commands.benchmark_pool import (clear_benchmark_data,
+                                                     seed_benchmark_data)
+from pool.models import Game, Pick, PickSheet
+
+
+class PickSubmitTests(TransactionTestCase):
+    """Pick.submit as the pick form calls it, committing for real."""
+
+    def setUp(self):
+        self.seed(4)
+
+    def seed(self, num_users):
+        self.users, _ = seed_benchmark_data(num_users, 1)
+        self.games = list(Game.objects.select_related("home_team", "away_team")
+                          .order_by("id"))
+        self.season_id = self.games[0].season_id
+        Pick.objects.all().delete()
+        PickSheet.rebuild(self.season_id, 1)
+
+    def choices(self, rng):
+        return [(game, rng.choice([game.home_team, game.away_team]))
+                for game in self.games]
+
+    def final_picks(self, user):
+        return dict(Pick.objects.filter(user=user)
+                    .values_list("game_id", "picked_team_id"))
+
+    def submit_concurrently(self, submissions, threads=None):
+        """
+        Run Pick.submit for each (user, choices), from `threads` threads
+        started at once (one per submission by default).
+        """
+        pending = iter(submissions)
+        take = threading.Lock()
+        threads = threads or len(submissions)
+        start_line = threading.Barrier(threads)
+        errors = []
+
+        def submit():
+            try:
+                start_line.wait()
+                while True:
+                    with take:
+                        submission = next(pending, None)
+                    if submission is None:
+                        break
+                    try:
+                        Pick.submit(*submission)
+                    except Exception as e:
+                        errors.append(e)
+            finally:
+                connections.close_all()
+
+        workers = [threading.Thread(target=submit) for _ in range(threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        return errors
+
+    def check_concurrent_submits(self, distinct, threads=None, seed=0):
+        """
+        Every user sends `distinct` different submissions, each twice like a
+        double click, all at once. Each user ends with exactly one of them,
+        one row per game, and a sheet that matches the rows.
+        """
+        rng = random.Random(seed)
+        submissions = []
+        for user in self.users:
+            for _ in range(distinct):
+                choices = self.choices(rng)
+                submissions += [(user, choices), (user, choices)]
+        rng.shuffle(submissions)
+
+        self.assertEqual(self.submit_concurrently(submissions, threads), [])
+
+        self.assertFalse(Pick.objects.values("user_id", "game_id")
+                         .annotate(n=Count("id")).filter(n__gt=1).exists())
+        self.assertEqual(Pick.objects.count(),
+                         len(self.users) * len(self.games))
+        for user in self.users:
+            submitted = [{game.id: team.id for game, team in choices}
+                         for who, choices in submissions if who == user]
+            self.assertIn(self.final_picks(user), submitted)
+        self.assertEqual(
+            PickSheet.expected(self.season_id, 1),
+            {user_id: (picked, home) for user_id, picked, home in
+             PickSheet.objects.values_list("user_id", "picked", "home")})
+        self.assertEqual(PickSheet.objects.count(), len(self.users))
+
+    def test_concurrent_submits(self):
+        self.check_concurrent_submits(2)
+
+    @tag("slow")
+    def test_hundreds_of_concurrent_submits(self):
+        clear_benchmark_data()
+        self.seed(40)
+        # 400 submissions, 100 in flight at a time. SQLite's busy handler
+        # polls, so with a few hundred writers waiting at once the last in
+        # line outwait busy_timeout and every retry.
+        self.check_concurrent_submits(5, threads=100)
+
+    def test_a_locked_game_is_rejected(self):
+        started = self.games[0]
+        Game.objects.filter(pk=started.pk).update(
+            game_time=timezone.now() - timedelta(minutes=1))
+        started.refresh_from_db()
+        user = self.users[0]
+
+        picks = Pick.submit(user, self.choices(random.Random(0)))
+
+        self.assertNotIn(started.pk, {pick.game_id for pick in picks})
+        self.assertEqual(len(picks), len(self.games) - 1)
+        self.assertNotIn(started.pk, self.final_picks(user))
+
+    def test_the_upsert_updates_in_place(self):
+        user = self.users[0]
+        Pick.submit(user, [(game, game.home_team) for game in self.games])
+        ids = dict(Pick.objects.filter(user=user).values_list("game_id", "id"))
+
+        Pick.submit(user, [(game, game.away_team) for game in self.games])
+
+        self.assertEqual(
+            dict(Pick.objects.filter(user=user).values_list("game_id", "id")),
+            ids)
+        self.assertEqual(self.final_picks(user),
+                         {game.id: game.away_team_id for game in self.games})
+        sheet = PickSheet.objects.get(user=user, week=1)
+        self.assertEqual((sheet.picked, sheet.home),
+                         ((1 << len(self.games)) - 1, 0))
@@ -0,0 +1,75 @@
+from django.db import connection
+from django.db.models import Count
+from django.test import TestCase
+from django.utils import timezone
+
+from pool.models import Game, Pick, PickSheet, WeekWindow
+from pool.slow_queries import explain, plan_has_full_scan
+
+
+def hot_queries():
+    """
+    (name, queryset, index) for the queries the indexes are designed for;
+    index is the one the plan must use, or None for any index.
+    """
+    season = 1
+    week = 1
+    game_ids = [1, 2, 3]
+    return [
+        ("games for a week",
+         Game.objects.filter(season=season, week=week).order_by("game_time"),
+         "pool_game_season_week_idx"),
+        ("week windows for a season (get_week_windows)",
+         WeekWindow.objects.filter(season=season).order_by("opens_at"),
+         None),
+        ("distinct weeks",
+         Game.objects.filter(season=season).values_list("week", flat=True)
+         .distinct().order_by("week"),
+         "pool_game_season_week_idx"),
+        ("picks for a week's games",
+         Pick.objects.filter(game_id__in=game_ids)
+         .select_related("user", "game", "game__winner"),
+         None),
+        ("unique (game, picked_team) counts",
+         Pick.objects.filter(game_id__in=game_ids)
+         .values("game_id", "picked_team_id")
+         .annotate(cnt=Count("id")).filter(cnt=1),
+         "pool_pick_game_team_idx"),
+        ("a user's past picks",
+         Pick.objects.filter(user_id=1, season=season,
+                             game__game_time__lt=timezone.now())
+         .select_related("game", "picked_team"),
+         None),
+        ("picks for a week (Pick.week)",
+         Pick.objects.filter(season=season, week=week)
+         .select_related("user", "picked_team", "game"),
+         "pool_pick_season_week_idx"),
+        ("a user's picks for a week",
+         Pick.objects.filter(user_id=1, season=season, week=week),
+         "pool_pick_season_week_idx"),
+        ("pick sheets for a week (bitmask scoring)",
+         PickSheet.objects.filter(season=season, week=week)
+         .values_list("user_id", "picked", "home"),
+         None),
+    ]
+
+
+class HotQueryPlanTests(TestCase):
+    """The pool's hot queries use the indexes added for them."""
+
+    def setUp(self):
+        if connection.vendor == "postgresql":
+            # Tiny tables make a seq scan look cheaper than any index; we
+            # want to know whether the index *can* be used
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+
+    def test_hot_queries_use_their_indexes(self):
+        for name, queryset, index in hot_queries():
+            with self.subTest(name):
+                sql, params = queryset.query.sql_with_params()
+                plan = explain(connection, sql, params)
+                self.assertFalse(plan_has_full_scan(plan, connection.vendor),
+                                 f"full table scan:\n{plan}")
+                if index:
+                    self.assertIn(index, plan)
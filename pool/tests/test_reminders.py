@@ -0,0 +1,148 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from pool.management.commands.benchmark_pool import seed_benchmark_data
+from pool.models import Game, Pick, PickReminder, Season
+from pool.reminders import by_user, missing_picks, send_reminders
+
+User = get_user_model()
+
+WEEK = 2
+
+
+@override_settings(POOL_SITE_URL="https://pool.example.com",
+                   POOL_REQUEST_TIMING=False)
+class PickReminderTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # The last seeded week is still open: its first game is in an hour
+        cls.users, _ = seed_benchmark_data(4, WEEK)
+        cls.season = Season.objects.get(is_current=True)
+        cls.games = list(Game.objects.filter(season=cls.season, week=WEEK)
+                         .order_by("game_time", "id"))
+
+    def drop_picks(self):
+        # users[0] picks nothing, users[1] is three games short and
+        # users[3] has no email address
+        Pick.objects.filter(user=self.users[0], week=WEEK).delete()
+        Pick.objects.filter(user=self.users[1],
+                            game__in=self.games[:3]).delete()
+        User.objects.filter(pk=self.users[3].pk).update(email="")
+        Pick.objects.filter(user=self.users[3], week=WEEK).delete()
+
+    def expected_missing(self, now):
+        """The missing picks the slow way, one query per user."""
+        games = [game.pk for game in self.games if game.game_time > now]
+        missing = set()
+        for user in User.objects.filter(is_active=True).exclude(email=""):
+            picked = set(Pick.objects.filter(user=user, game_id__in=games)
+                         .values_list("game_id", flat=True))
+            missing |= {(user.pk, game_id) for game_id in games
+                        if game_id not in picked}
+        return missing
+
+    def found(self, now=None):
+        return {(pick.user_id, pick.game_id)
+                for pick in missing_picks(self.season, WEEK, now)}
+
+    def test_nobody_is_missing_picks_who_picked_every_game(self):
+        self.assertEqual(missing_picks(self.season, WEEK), [])
+        self.assertEqual(send_reminders(self.season, WEEK), [])
+        self.assertEqual(mail.outbox, [])
+
+    def test_the_anti_join_finds_exactly_the_missing_picks(self):
+        self.drop_picks()
+        now = self.games[0].game_time - timedelta(hours=1)
+        self.assertEqual(self.found(now), self.expected_missing(now))
+        self.assertEqual(len(self.found(now)), len(self.games) + 3)
+
+    def test_games_that_have_kicked_off_are_left_out(self):
+        self.drop_picks()
+        later = self.games[1].game_time + timedelta(minutes=1)
+        self.assertEqual(self.found(later), self.expected_missing(later))
+        self.assertNotIn(self.games[0].pk,
+                         {game_id for _, game_id in self.found(later)})
+
+    def test_nobody_is_reminded_once_every_game_has_kicked_off(self):
+        self.drop_picks()
+        closed = self.games[-1].game_time + timedelta(minutes=1)
+        self.assertEqual(send_reminders(self.season, WEEK, now=closed), [])
+        self.assertEqual(mail.outbox, [])
+
+    def test_one_email_per_user_missing_picks(self):
+        self.drop_picks()
+        sent = send_reminders(self.season, WEEK)
+        self.assertEqual([user["user_id"] for user in sent],
+                         [self.users[0].pk, self.users[1].pk])
+        self.assertEqual([message.to for message in mail.outbox],
+                         [[self.users[0].email], [self.users[1].email]])
+
+    def test_the_email_lists_the_missing_games_and_the_picks_link(self):
+        self.drop_picks()
+        send_reminders(self.season, WEEK)
+        body = mail.outbox[1].body
+        for game in self.games[:3]:
+            self.assertIn(f"{game.away_team.name} @ {game.home_team.name}",
+                          body)
+        game = self.games[3]
+        self.assertNotIn(f"{game.away_team.name} @ {game.home_team.name}",
+                         body)
+        self.assertIn(f"https://pool.example.com/picks/week/{WEEK}/", body)
+
+    def test_each_send_is_recorded(self):
+        self.drop_picks()
+        send_reminders(self.season, WEEK)
+        reminders = PickReminder.objects.filter(season=self.season, week=WEEK)
+        self.assertEqual(
+            {reminder.user_id: len(reminder.games) for reminder in reminders},
+            {self.users[0].pk: len(self.games), self.users[1].pk: 3})
+
+    def test_nobody_is_reminded_twice(self):
+        self.drop_picks()
+        send_reminders(self.season, WEEK)
+        mail.outbox = []
+        self.assertEqual(send_reminders(self.season, WEEK), [])
+        self.assertEqual(mail.outbox, [])
+
+    def test_a_user_who_drops_a_pick_later_is_reminded_alone(self):
+        self.drop_picks()
+        send_reminders(self.season, WEEK)
+        mail.outbox = []
+        Pick.objects.filter(user=self.users[2], game=self.games[5]).delete()
+        sent = send_reminders(self.season, WEEK)
+        self.assertEqual([user["user_id"] for user in sent], [self.users[2].pk])
+        self.assertEqual([message.to for message in mail.outbox],
+                         [[self.users[2].email]])
+
+    def test_a_dry_run_sends_and_records_nothing(self):
+        self.drop_picks()
+        out = StringIO()
+        call_command("send_pick_reminders", week=WEEK, dry_run=True,
+                     stdout=out)
+        self.assertIn("Would remind 2 user(s)", out.getvalue())
+        self.assertEqual(mail.outbox, [])
+        self.assertFalse(PickReminder.objects.exists())
+
+    def test_the_admin_shows_the_same_missing_picks(self):
+        self.drop_picks()
+        admin = User.objects.create_superuser("reminder-admin",
+                                              "admin@example.com", "x")
+        self.client.force_login(admin)
+        response = self.client.get(reverse("pooladmin:missing_picks"),
+                                   {"week": WEEK})
+        self.assertEqual(response.status_code, 200)
+
+        game_ids = [game.game_id for game in response.context_data["games"]]
+        shown = {(row["user_id"], game_id)
+                 for row in response.context_data["rows"]
+                 for game_id, cell in zip(game_ids, row["cells"]) if cell}
+        expected = {(user["user_id"], pick.game_id)
+                    for user in by_user(missing_picks(self.season, WEEK))
+                    for pick in user["games"]}
+        self.assertEqual(shown, expected)
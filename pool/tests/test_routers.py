@@ -0,0 +1,164 @@
+from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS, connection, connections, router, transaction
+from django.test import Client, TransactionTestCase, override_settings
+
+from pool.management.commands.benchmark_pool import seed_benchmark_data
+from pool.middleware import PrimaryStickyMiddleware
+from pool.models import Game, Pick, WarmResult
+from pool.routers import REPLICA, replica_reads, watch_writes, wrote
+
+User = get_user_model()
+
+
+class QueryCounter:
+    """Execute wrapper counting queries on one connection."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+@override_settings(POOL_READ_REPLICA=True)
+class ReplicaTestCase(TransactionTestCase):
+    """
+    Reads routed to the "replica" alias, which in tests is a second
+    connection to the test database.
+    """
+    databases = {DEFAULT_DB_ALIAS, REPLICA}
+
+    def setUp(self):
+        self.users, _ = seed_benchmark_data(2, 1)
+        self.user = self.users[0]
+        self.games = list(Game.objects.order_by("game_time"))
+
+    def flip_picks(self):
+        """(game, team) choices against the user's current picks."""
+        picked = dict(Pick.objects.filter(user=self.user)
+                      .values_list("game_id", "picked_team_id"))
+        return [(game, game.away_team if picked[game.id] == game.home_team_id
+                 else game.home_team) for game in self.games]
+
+
+class PrimaryReplicaRouterTests(ReplicaTestCase):
+    def test_pool_reads_go_to_the_replica(self):
+        with replica_reads():
+            self.assertEqual(Pick.objects.all().db, REPLICA)
+            self.assertEqual(Game.objects.all().db, REPLICA)
+            self.assertEqual(User.objects.all().db, DEFAULT_DB_ALIAS)
+            self.assertEqual(WarmResult.objects.all().db, DEFAULT_DB_ALIAS)
+
+    def test_reads_outside_a_request_use_the_primary(self):
+        self.assertEqual(Pick.objects.all().db, DEFAULT_DB_ALIAS)
+
+    def test_pinned_reads_use_the_primary(self):
+        with replica_reads(pinned=True):
+            self.assertEqual(Pick.objects.all().db, DEFAULT_DB_ALIAS)
+
+    def test_reads_in_a_transaction_use_the_primary(self):
+        with replica_reads(), transaction.atomic():
+            self.assertEqual(Pick.objects.all().db, DEFAULT_DB_ALIAS)
+
+    def test_writes_go_to_the_primary(self):
+        with replica_reads():
+            self.assertEqual(router.db_for_write(Pick), DEFAULT_DB_ALIAS)
+
+    def test_the_replica_is_never_migrated(self):
+        self.assertFalse(router.allow_migrate(REPLICA, "pool"))
+        self.assertTrue(router.allow_migrate(DEFAULT_DB_ALIAS, "pool"))
+
+    @override_settings(POOL_READ_REPLICA=False)
+    def test_reads_use_the_primary_with_the_replica_off(self):
+        with replica_reads():
+            self.assertEqual(Pick.objects.all().db, DEFAULT_DB_ALIAS)
+
+    def test_replica_reads_see_committed_picks(self):
+        with replica_reads():
+            replica_rows = list(Pick.objects.order_by("id")
+                                .values_list("id", "picked_team_id"))
+        self.assertEqual(replica_rows,
+                         list(Pick.objects.using(DEFAULT_DB_ALIAS).order_by("id")
+                              .values_list("id", "picked_team_id")))
+
+
+class WatchWritesTests(ReplicaTestCase):
+    def execute(self, sql):
+        watch_writes(lambda *args: None, sql, (), False, {})
+
+    def test_a_pool_write_pins_the_rest_of_the_request(self):
+        with replica_reads(), connection.execute_wrapper(watch_writes):
+            self.assertEqual(Pick.objects.all().db, REPLICA)
+            Pick.submit(self.user, self.flip_picks())
+            self.assertTrue(wrote())
+            self.assertEqual(Pick.objects.all().db, DEFAULT_DB_ALIAS)
+
+    def test_writes_to_primary_only_tables_do_not_pin(self):
+        with replica_reads():
+            self.execute('INSERT INTO "pool_warmresult" ("name") VALUES (%s)')
+            self.execute('UPDATE "auth_user" SET "last_login" = %s')
+            self.execute('SELECT * FROM "pool_pick"')
+            self.assertFalse(wrote())
+            self.assertEqual(Pick.objects.all().db, REPLICA)
+
+    def test_each_request_starts_unpinned(self):
+        with replica_reads():
+            self.execute('DELETE FROM "pool_pick" WHERE "id" = %s')
+            self.assertTrue(wrote())
+        with replica_reads():
+            self.assertFalse(wrote())
+            self.assertEqual(Pick.objects.all().db, REPLICA)
+
+
+@override_settings(ROOT_URLCONF="pool.tests.urls", ALLOWED_HOSTS=["testserver"],
+                   POOL_REQUEST_TIMING=False)
+class PrimaryStickyMiddlewareTests(ReplicaTestCase):
+    cookie = PrimaryStickyMiddleware.cookie_name
+
+    def setUp(self):
+        super().setUp()
+        # Installed at startup when a replica is configured
+        self.enterContext(connection.execute_wrapper(watch_writes))
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def count_queries(self, method, *args):
+        """{alias: queries} for one request, which must succeed."""
+        counters = {alias: QueryCounter() for alias in self.databases}
+        with connections[DEFAULT_DB_ALIAS].execute_wrapper(counters[DEFAULT_DB_ALIAS]), \
+                connections[REPLICA].execute_wrapper(counters[REPLICA]):
+            response = method(*args)
+        self.assertIn(response.status_code, (200, 302))
+        return {alias: counter.count for alias, counter in counters.items()}
+
+    def post_picks(self):
+        data = {"form-TOTAL_FORMS": len(self.games), "form-INITIAL_FORMS": 0}
+        for i, (game, team) in enumerate(self.flip_picks()):
+            data[f"form-{i}-picked_team"] = team.id
+        return self.count_queries(
+            self.client.post, f"/picks/week/{self.games[0].week}/", data)
+
+    def test_a_read_only_request_reads_the_replica(self):
+        counts = self.count_queries(self.client.get, "/")
+        self.assertGreater(counts[REPLICA], 0)
+        self.assertNotIn(self.cookie, self.client.cookies)
+
+    def test_a_pick_post_pins_the_client_to_the_primary(self):
+        self.post_picks()
+        self.assertEqual(self.client.cookies[self.cookie]["max-age"], 10)
+
+        counts = self.count_queries(self.client.get, "/")
+        self.assertEqual(counts[REPLICA], 0)
+        self.assertGreater(counts[DEFAULT_DB_ALIAS], 0)
+
+    @override_settings(POOL_REPLICA_STICKY_SECONDS=30)
+    def test_the_pin_lasts_the_sticky_seconds(self):
+        self.post_picks()
+        self.assertEqual(self.client.cookies[self.cookie]["max-age"], 30)
+
+    def test_reads_return_to_the_replica_when_the_pin_expires(self):
+        self.post_picks()
+        self.client.cookies.pop(self.cookie)
+        counts = self.count_queries(self.client.get, "/")
+        self.assertGreater(counts[REPLICA], 0)
@@ -0,0 +1,370 @@
+import time as walltime
+from datetime import datetime, timedelta, timezone as dt_timezone
+from unittest import skipUnless
+from zoneinfo import ZoneInfo
+
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import (SimpleTestCase, TestCase, TransactionTestCase,
+                         override_settings)
+from django.utils import timezone
+
+from pool.jobs import inline_runner
+from pool.management.commands.benchmark_pool import seed_benchmark_data
+from pool.models import (Game, PoolJob, ScheduleEvent, Season, Team, WeekReveal,
+                         WeekWindow)
+from pool.scheduler import (ACTIONS, PICK_CLOSE, PICK_OPEN, REMIND, WEEK_END,
+                            FakeClock, Scheduler, in_process, transitions)
+from pool.utils import get_week_info
+
+EASTERN = ZoneInfo("America/New_York")
+
+
+def eastern(*args):
+    return datetime(*args, tzinfo=EASTERN)
+
+
+class WeekWindowRolloverTests(SimpleTestCase):
+    def test_a_sunday_game_rolls_over_at_2am_tuesday_eastern(self):
+        rollover = WeekWindow.rollover(eastern(2025, 9, 7, 13, 0))
+        self.assertEqual(rollover, eastern(2025, 9, 9, 2, 0))
+        self.assertEqual(rollover.utcoffset(), timedelta(hours=-4))
+
+    def test_monday_night_games_belong_to_the_same_week(self):
+        self.assertEqual(WeekWindow.rollover(eastern(2025, 9, 8, 23, 59)),
+                         eastern(2025, 9, 9, 2, 0))
+
+    def test_the_rollover_itself_moves_on_a_week(self):
+        self.assertEqual(WeekWindow.rollover(eastern(2025, 9, 9, 2, 0)),
+                         eastern(2025, 9, 16, 2, 0))
+
+    def test_rollovers_stay_at_2am_across_the_dst_change(self):
+        # Clocks fall back on Sunday 2025-11-02
+        rollover = WeekWindow.rollover(
+            datetime(2025, 11, 2, 18, 0, tzinfo=dt_timezone.utc))
+        self.assertEqual(rollover, eastern(2025, 11, 4, 2, 0))
+        self.assertEqual(rollover.astimezone(dt_timezone.utc),
+                         datetime(2025, 11, 4, 7, 0, tzinfo=dt_timezone.utc))
+
+    def test_the_rollover_before_a_moment(self):
+        self.assertEqual(
+            WeekWindow.rollover(eastern(2025, 9, 4, 20, 20), after=False),
+            eastern(2025, 9, 2, 2, 0))
+        self.assertEqual(
+            WeekWindow.rollover(eastern(2025, 9, 9, 2, 0), after=False),
+            eastern(2025, 9, 9, 2, 0))
+
+
+class WeekWindowPlanTests(SimpleTestCase):
+    def test_windows_run_from_rollover_to_rollover(self):
+        week1, week2 = WeekWindow.plan({
+            1: (eastern(2025, 9, 4, 20, 20), eastern(2025, 9, 8, 20, 15)),
+            2: (eastern(2025, 9, 11, 20, 15), eastern(2025, 9, 15, 19, 0)),
+        })
+        self.assertEqual((week1.opens_at, week1.closes_at, week1.ends_at),
+                         (eastern(2025, 9, 2, 2, 0), eastern(2025, 9, 4, 20, 20),
+                          eastern(2025, 9, 9, 2, 0)))
+        self.assertEqual((week2.opens_at, week2.closes_at, week2.ends_at),
+                         (week1.ends_at, eastern(2025, 9, 11, 20, 15),
+                          eastern(2025, 9, 16, 2, 0)))
+
+    def test_a_gap_in_the_schedule_stretches_the_next_window(self):
+        # No games for the week after week 18
+        week18, week19 = WeekWindow.plan({
+            18: (eastern(2026, 1, 3, 16, 30), eastern(2026, 1, 4, 20, 20)),
+            19: (eastern(2026, 1, 17, 16, 30), eastern(2026, 1, 18, 18, 30)),
+        })
+        self.assertEqual(week19.opens_at, week18.ends_at)
+        self.assertEqual(week19.opens_at, eastern(2026, 1, 6, 2, 0))
+        self.assertEqual(week19.ends_at, eastern(2026, 1, 20, 2, 0))
+
+    def test_weeks_after_the_regular_season_are_postseason(self):
+        windows = WeekWindow.plan({
+            18: (eastern(2026, 1, 3, 16, 30), eastern(2026, 1, 4, 20, 20)),
+            19: (eastern(2026, 1, 10, 16, 30), eastern(2026, 1, 12, 20, 15)),
+        })
+        self.assertEqual([window.phase for window in windows],
+                         [WeekWindow.REGULAR, WeekWindow.POSTSEASON])
+
+    def test_a_week_never_opens_after_its_first_kickoff(self):
+        # Week 2 kicks off before week 1's rollover
+        week1, week2 = WeekWindow.plan({
+            1: (eastern(2025, 9, 4, 20, 20), eastern(2025, 9, 8, 20, 15)),
+            2: (eastern(2025, 9, 9, 1, 0), eastern(2025, 9, 14, 20, 20)),
+        })
+        self.assertEqual(week2.opens_at, week2.closes_at)
+
+    def test_a_week_across_the_dst_change_is_an_hour_longer(self):
+        # Week 9 of 2025: clocks fall back on the Sunday
+        week9, = WeekWindow.plan({
+            9: (eastern(2025, 10, 30, 20, 15), eastern(2025, 11, 3, 20, 15)),
+        })
+        utc = dt_timezone.utc
+        self.assertEqual(week9.opens_at.astimezone(utc),
+                         datetime(2025, 10, 28, 6, 0, tzinfo=utc))
+        self.assertEqual(week9.ends_at.astimezone(utc),
+                         datetime(2025, 11, 4, 7, 0, tzinfo=utc))
+        # Same-zone subtraction is wall-clock time, so compare in UTC
+        self.assertEqual(
+            week9.ends_at.astimezone(utc) - week9.opens_at.astimezone(utc),
+            timedelta(days=7, hours=1))
+
+    def test_a_game_at_the_rollover_ends_the_week_a_week_later(self):
+        week1, = WeekWindow.plan({
+            1: (eastern(2025, 9, 4, 20, 20), eastern(2025, 9, 9, 2, 0)),
+        })
+        self.assertEqual(week1.opens_at, eastern(2025, 9, 2, 2, 0))
+        self.assertEqual(week1.ends_at, eastern(2025, 9, 16, 2, 0))
+
+
+class WeekWindowGenerateTests(TestCase):
+    """generate() from the schedule, then get_week_info() at the edges."""
+
+    KICKOFFS = {
+        8: [eastern(2025, 10, 23, 20, 15), eastern(2025, 10, 27, 20, 15)],
+        9: [eastern(2025, 10, 30, 20, 15), eastern(2025, 11, 2, 13, 0),
+            eastern(2025, 11, 3, 20, 15)],
+        10: [eastern(2025, 11, 6, 20, 15), eastern(2025, 11, 10, 20, 15)],
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.season, _ = Season.objects.update_or_create(
+            year=2025, defaults={"is_current": True})
+        home = Team.objects.create(name="Home", alias="HOM")
+        away = Team.objects.create(name="Away", alias="AWY")
+        for week, kickoffs in cls.KICKOFFS.items():
+            for kickoff in kickoffs:
+                Game.objects.create(season=cls.season, week=week,
+                                    home_team=home, away_team=away,
+                                    game_time=kickoff)
+
+    def setUp(self):
+        self.windows = {window.week: window
+                        for window in WeekWindow.generate(self.season)}
+
+    def info(self, now):
+        info = get_week_info(now)
+        return info["week"], info["is_pick_open"], info["is_pick_closed"]
+
+    def test_the_rows_match_the_plan(self):
+        self.assertEqual(
+            list(WeekWindow.objects.filter(season=self.season).values_list(
+                "week", "opens_at", "closes_at", "ends_at")),
+            [(week, window.opens_at, window.closes_at, window.ends_at)
+             for week, window in sorted(self.windows.items())])
+        self.assertEqual(self.windows[9].opens_at, eastern(2025, 10, 28, 2, 0))
+        self.assertEqual(self.windows[9].ends_at, eastern(2025, 11, 4, 2, 0))
+
+    def test_a_week_without_games_loses_its_window(self):
+        Game.objects.filter(week=10).delete()
+        WeekWindow.generate(self.season)
+        self.assertEqual(
+            list(WeekWindow.objects.values_list("week", flat=True)), [8, 9])
+        self.assertEqual(self.info(eastern(2025, 11, 5, 12, 0))[0], 9)
+
+    def test_a_week_starts_exactly_at_its_opens_at(self):
+        opens = self.windows[9].opens_at
+        self.assertEqual(self.info(opens), (9, True, False))
+        self.assertEqual(self.info(opens - timedelta(microseconds=1)),
+                         (8, False, True))
+
+    def test_picks_close_exactly_at_the_first_kickoff(self):
+        closes = self.windows[9].closes_at
+        self.assertEqual(self.info(closes - timedelta(microseconds=1)),
+                         (9, True, False))
+        self.assertEqual(self.info(closes), (9, False, True))
+
+    def test_the_rollover_after_the_dst_change(self):
+        # 2 AM EST is 07:00 UTC, an hour later than before the change
+        ends = self.windows[9].ends_at
+        self.assertEqual(self.info(ends - timedelta(hours=1)),
+                         (9, False, True))
+        self.assertEqual(self.info(ends), (10, True, False))
+
+    def test_before_and_after_the_season(self):
+        self.assertEqual(self.info(eastern(2025, 10, 1, 12, 0)),
+                         (8, False, False))
+        self.assertEqual(self.info(self.windows[10].ends_at + timedelta(days=30)),
+                         (10, False, True))
+
+
+class SchedulerTestCase(TransactionTestCase):
+    # Scheduler.run() closes old connections, as a long-running process
+    # must, which would end a TestCase's transaction
+
+    def setUp(self):
+        seed_benchmark_data(2, 3)
+        self.season = Season.objects.get(is_current=True)
+        self.fired = []
+        saved = {kind: list(actions) for kind, actions in ACTIONS.items()}
+        self.addCleanup(ACTIONS.update, saved)
+
+    def record(self, event):
+        self.fired.append((event, self.clock.now()))
+
+    def record_all(self):
+        for actions in ACTIONS.values():
+            actions.append(self.record)
+
+
+class TransitionTests(SchedulerTestCase):
+    def test_every_window_has_its_transitions_in_time_order(self):
+        events = transitions(self.season)
+        self.assertEqual(events, sorted(events, key=lambda event: event.at))
+        windows = WeekWindow.objects.filter(season=self.season)
+        for window in windows:
+            self.assertIn((window.opens_at, PICK_OPEN, window.week),
+                          [(e.at, e.kind, e.week) for e in events])
+            self.assertIn((window.closes_at, PICK_CLOSE, window.week),
+                          [(e.at, e.kind, e.week) for e in events])
+            self.assertIn((window.ends_at, WEEK_END, window.week),
+                          [(e.at, e.kind, e.week) for e in events])
+
+    def test_a_week_ends_before_the_next_one_opens(self):
+        events = transitions(self.season)
+        for first, second in zip(events, events[1:]):
+            if (first.at == second.at
+                    and {first.kind, second.kind} == {WEEK_END, PICK_OPEN}):
+                self.assertEqual(first.kind, WEEK_END)
+
+    @override_settings(POOL_REMINDER_LEAD_HOURS=2)
+    def test_the_reminder_comes_its_lead_before_picks_close(self):
+        windows = {window.week: window for window in
+                   WeekWindow.objects.filter(season=self.season)}
+        reminders = [e for e in transitions(self.season) if e.kind == REMIND]
+        self.assertTrue(reminders)
+        for event in reminders:
+            self.assertEqual(event.at, windows[event.week].closes_at
+                             - timedelta(hours=2))
+
+    @override_settings(POOL_REMINDER_LEAD_HOURS=0)
+    def test_no_reminders_without_a_lead(self):
+        self.assertNotIn(REMIND, [e.kind for e in transitions(self.season)])
+
+    @override_settings(POOL_REMINDER_LEAD_HOURS=24 * 365)
+    def test_no_reminder_before_picks_open(self):
+        self.assertNotIn(REMIND, [e.kind for e in transitions(self.season)])
+
+
+@override_settings(POOL_REMINDER_LEAD_HOURS=2)
+class SchedulerTests(SchedulerTestCase):
+    def setUp(self):
+        super().setUp()
+        self.events = transitions(self.season)
+        self.start = self.events[0].at - timedelta(hours=1)
+        self.end = self.events[-1].at + timedelta(hours=1)
+
+    def run_season(self):
+        # Resync far apart, so every wake-up is for a transition
+        self.clock = FakeClock(self.start)
+        Scheduler(self.clock, catch_up_seconds=3600,
+                  resync_seconds=30 * 86400).run(until=self.end)
+
+    def test_each_transition_fires_once_at_its_time(self):
+        self.record_all()
+        self.run_season()
+        self.assertEqual([event for event, _ in self.fired], self.events)
+        self.assertTrue(all(at == event.at for event, at in self.fired))
+        self.assertEqual(ScheduleEvent.objects.count(), len(self.events))
+
+    def test_the_scheduler_sleeps_until_the_next_transition(self):
+        self.run_season()
+        distinct = len({event.at for event in self.events})
+        self.assertLessEqual(len(self.clock.sleeps), distinct + 1)
+
+    def test_a_failing_action_does_not_stop_the_others(self):
+        def fail(event):
+            raise RuntimeError("failing action")
+
+        ACTIONS[WEEK_END][:0] = [fail]
+        self.record_all()
+        with self.assertLogs("pool.scheduler", "ERROR"):
+            self.run_season()
+        self.assertEqual([event for event, _ in self.fired], self.events)
+        for row in ScheduleEvent.objects.filter(kind=WEEK_END):
+            self.assertIn("fail (failed)", row.actions)
+            self.assertIn("record", row.actions)
+
+    def test_a_second_scheduler_fires_nothing_again(self):
+        self.run_season()
+        self.record_all()
+        self.run_season()
+        self.assertEqual(self.fired, [])
+
+    def test_missed_transitions_fire_within_the_catch_up_window_only(self):
+        self.record_all()
+        late = self.events[1].at + timedelta(minutes=30)
+        self.clock = FakeClock(late)
+        Scheduler(self.clock, catch_up_seconds=3600).run_due()
+        self.assertEqual(
+            [event for event, _ in self.fired],
+            [event for event in self.events
+             if late - timedelta(hours=1) <= event.at <= late])
+
+    def test_waits_are_capped_at_the_resync_interval(self):
+        self.record_all()
+        self.clock = FakeClock(self.start)
+        Scheduler(self.clock, resync_seconds=600).run(
+            until=self.events[0].at + timedelta(minutes=1))
+        self.assertLessEqual(max(self.clock.sleeps), 600)
+        self.assertEqual([event for event, _ in self.fired], [self.events[0]])
+
+    def test_the_built_in_actions(self):
+        self.run_season()
+        self.assertTrue(PoolJob.objects.filter(name="warm_caches").exists())
+        self.assertEqual(
+            PoolJob.objects.filter(name="pick_reminders").count(),
+            len([event for event in self.events if event.kind == REMIND]))
+        self.assertEqual(WeekReveal.objects.count(),
+                         len({event.week for event in self.events}))
+
+
+class InProcessSchedulerTests(TransactionTestCase):
+    """With jobs run inline, the web process fires the week transitions."""
+
+    def setUp(self):
+        seed_benchmark_data(2, 2)
+        self.addCleanup(self.stop_scheduler)
+
+    def stop_scheduler(self):
+        in_process.stop.set()
+        if in_process.thread is not None:
+            in_process.thread.join(10)
+            self.assertFalse(in_process.thread.is_alive())
+        in_process.pid = in_process.thread = None
+        if inline_runner.thread is not None:
+            inline_runner.thread.join(10)
+
+    def open_last_week_now(self):
+        window = WeekWindow.objects.order_by("week").last()
+        WeekWindow.objects.filter(pk=window.pk).update(
+            opens_at=timezone.now() - timedelta(minutes=1))
+        return window.week
+
+    @override_settings(POOL_JOB_RUNNER="inline", POOL_REQUEST_TIMING=False)
+    def test_the_first_request_starts_the_scheduler_once(self):
+        week = self.open_last_week_now()
+        self.client.get("/")
+        thread = in_process.thread
+        self.assertTrue(thread.is_alive())
+        self.client.get("/")
+        self.assertIs(in_process.thread, thread)
+
+        deadline = walltime.monotonic() + 10
+        while not ScheduleEvent.objects.filter(kind=PICK_OPEN,
+                                               week=week).exists():
+            self.assertLess(walltime.monotonic(), deadline)
+            walltime.sleep(0.05)
+
+    @override_settings(POOL_JOB_RUNNER="worker", POOL_REQUEST_TIMING=False)
+    def test_requests_leave_the_scheduler_to_its_own_process(self):
+        self.client.get("/")
+        self.assertIsNone(in_process.thread)
+
+
+@skipUnless(connection.vendor == "sqlite", "SQLite only")
+class SchedulerDatabaseTests(SimpleTestCase):
+    def test_the_scheduler_refuses_a_sqlite_database_of_its_own(self):
+        with self.assertRaisesMessage(CommandError, "--same-machine"):
+            call_command("run_scheduler", once=True)
@@ -0,0 +1,83 @@
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from pool import snapshot
+from pool.management.commands.benchmark_pool import (clear_benchmark_data,
+                                                     seed_benchmark_data)
+from pool.management.commands.create_email import compute_full_results_package
+from pool.models import Game, Pick, PickSheet, Season
+from pool.scoring import BACKENDS, score_week
+
+
+class ScoringBackendTests(TestCase):
+    """Every backend scores the same, bonuses included."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users, _ = seed_benchmark_data(5, 3)
+        cls.season = Season.objects.get()
+        games = list(Game.objects.filter(week=1).order_by("game_time", "id"))
+        # users[0] gets week 1 perfect, and is alone on the first winner
+        for game in games:
+            Pick.objects.filter(user=cls.users[0], game=game).update(
+                picked_team=game.winner_id)
+        loser = (games[0].away_team_id if games[0].winner_id
+                 == games[0].home_team_id else games[0].home_team_id)
+        Pick.objects.filter(game=games[0]).exclude(user=cls.users[0]).update(
+            picked_team=loser)
+        PickSheet.rebuild(cls.season.id, 1)
+        Season.record_change(cls.season.id)
+
+    def setUp(self):
+        snapshot._snapshots.clear()
+
+    def scores(self, week):
+        games = list(Game.objects.filter(season=self.season, week=week))
+        return {
+            backend: score_week(self.season, week, games, backend=backend,
+                                unique_bonus=2, perfect_bonus=3)
+            for backend in BACKENDS
+        }
+
+    def test_the_backends_agree_with_bonuses(self):
+        for week in (1, 2, 3):
+            scores = self.scores(week)
+            rows = scores["rows"]
+            for backend, score in scores.items():
+                with self.subTest(week=week, backend=backend):
+                    self.assertEqual(score.points, rows.points)
+                    self.assertEqual(score.wins, rows.wins)
+                    self.assertEqual(score.unique, rows.unique)
+                    self.assertEqual(score.perfect, rows.perfect)
+
+    def test_the_bonuses_are_exercised(self):
+        score = self.scores(1)["rows"]
+        user = self.users[0].pk
+        self.assertEqual(score.perfect, {user})
+        games = Game.objects.filter(week=1)
+        unique = [game for game in games
+                  if (game.pk, game.winner_id) in score.unique]
+        self.assertIn(min(games, key=lambda game: (game.game_time, game.pk)),
+                      unique)
+        self.assertEqual(score.points[user],
+                         sum(game.points for game in games)
+                         + 2 * len(unique) + 3)
+
+
+@override_settings(POOL_SCORING_BACKEND="rows")
+class EmailPackageQueryTests(TestCase):
+    def queries(self, num_users):
+        clear_benchmark_data()
+        seed_benchmark_data(num_users, 3)
+        season = Season.objects.get()
+        with CaptureQueriesContext(connection) as queries:
+            compute_full_results_package(season)
+        return len(queries)
+
+    def test_queries_do_not_grow_with_users(self):
+        few = self.queries(2)
+        many = self.queries(6)
+        self.assertEqual(few, many)
+        # Users and weeks, then games, picks and scores per week
+        self.assertLessEqual(many, 2 + 3 * 3)
@@ -0,0 +1,92 @@
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+
+from pool.models import Pick, SlowQuery
+from pool.slow_queries import (SlowQueryLogger, explain, normalize_sql,
+                               plan_has_full_scan)
+
+
+class NormalizeSqlTests(SimpleTestCase):
+    def test_in_lists_collapse_whatever_their_length(self):
+        for params in ("%s", "%s, %s", "%s, %s, %s, %s"):
+            self.assertEqual(
+                normalize_sql(f'SELECT * FROM t WHERE "id" IN ({params})'),
+                'SELECT * FROM t WHERE "id" IN (...)')
+
+    def test_quoted_strings_become_placeholders(self):
+        self.assertEqual(
+            normalize_sql("SELECT 1 FROM t WHERE name = 'O''Brien' AND x = ''"),
+            "SELECT ? FROM t WHERE name = ? AND x = ?")
+
+    def test_an_escaped_quote_does_not_end_the_string(self):
+        self.assertEqual(normalize_sql("WHERE a = 'it''s' OR b = 'x'"),
+                         "WHERE a = ? OR b = ?")
+
+    def test_numbers_become_placeholders(self):
+        self.assertEqual(
+            normalize_sql("SELECT * FROM t WHERE w = 12 AND p > 0.5 LIMIT 21"),
+            "SELECT * FROM t WHERE w = ? AND p > ? LIMIT ?")
+
+    def test_digits_inside_names_are_kept(self):
+        self.assertEqual(normalize_sql('SELECT "t1"."col2" FROM t1'),
+                         'SELECT "t1"."col2" FROM t1')
+
+    def test_whitespace_is_collapsed(self):
+        self.assertEqual(normalize_sql("  SELECT *\n   FROM t\t WHERE a = 1 "),
+                         "SELECT * FROM t WHERE a = ?")
+
+
+class FullScanTests(SimpleTestCase):
+    def test_sqlite_plans(self):
+        self.assertTrue(plan_has_full_scan("SCAN pool_pick", "sqlite"))
+        self.assertFalse(plan_has_full_scan(
+            "SCAN pool_pick USING INDEX pool_pick_week_idx", "sqlite"))
+        self.assertFalse(plan_has_full_scan(
+            "SEARCH pool_pick USING INDEX pool_pick_user_game (user_id=?)",
+            "sqlite"))
+
+    def test_postgres_plans(self):
+        self.assertTrue(plan_has_full_scan(
+            "Seq Scan on pool_pick  (cost=0.00..1.10 rows=10 width=8)",
+            "postgresql"))
+        self.assertFalse(plan_has_full_scan(
+            "Index Scan using pool_pick_pkey on pool_pick", "postgresql"))
+
+
+class SlowQueryLogTests(TestCase):
+    def run_slow(self, *querysets):
+        with self.assertLogs("pool.slow_queries", "WARNING") as logs, \
+                connection.execute_wrapper(SlowQueryLogger(threshold_ms=0)):
+            for queryset in querysets:
+                list(queryset)
+        return logs
+
+    @skipUnless(connection.vendor == "sqlite", "SQLite plan text")
+    def test_explain_indents_the_plan(self):
+        sql, params = Pick.objects.filter(week=3).query.sql_with_params()
+        self.assertIn("pool_pick", explain(connection, sql, params))
+        self.assertEqual(explain(connection, "DELETE FROM pool_pick", ()), "")
+
+    def test_a_slow_query_is_recorded_once_and_then_counted(self):
+        logs = self.run_slow(Pick.objects.filter(week=3),
+                             Pick.objects.filter(week=4))
+        self.assertEqual(len(logs.records), 2)
+        slow = SlowQuery.objects.get()
+        self.assertEqual(slow.count, 2)
+        self.assertTrue(
+            slow.normalized_sql.endswith('"pool_pick"."week" = %s'))
+        self.assertIn("params: (3,)", slow.sample_sql)
+        self.assertTrue(slow.explain)
+        self.assertGreaterEqual(slow.total_ms, slow.max_ms)
+
+    def test_different_queries_get_their_own_rows(self):
+        self.run_slow(Pick.objects.filter(week=3),
+                      Pick.objects.filter(user_id=1))
+        self.assertEqual(SlowQuery.objects.count(), 2)
+
+    def test_the_bookkeeping_queries_are_not_logged(self):
+        self.run_slow(Pick.objects.filter(week=3))
+        self.assertFalse(SlowQuery.objects.filter(
+            normalized_sql__contains="pool_slowquery").exists())
@@ -0,0 +1,62 @@
+import json
+import os
+import re
+import subprocess
+import sys
+
+from django.conf import settings
+from django.test import SimpleTestCase
+
+# Loads the WSGI application the way a gunicorn worker does, in a fresh
+# interpreter, and lists the heavy modules it imported
+PROBE = """
+import json, sys
+from django_project.wsgi import application
+from django.urls import get_resolver
+get_resolver().url_patterns
+heavy = %r
+sys.stdout.write(json.dumps(sorted(name for name in heavy if name in sys.modules)))
+"""
+
+# Only needed by the pages, commands or settings that use them. markdown is
+# not among them: the markdownx preview view imports it with the URLconf.
+DEFERRED = ["debug_toolbar", "django.test", "jinja2", "numpy", "openai"]
+
+# `python -X importtime` lines: self and cumulative microseconds, module
+IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+
+class ColdStartTests(SimpleTestCase):
+    """A cold start on Fly is paid by a visitor; keep it to what serving needs."""
+
+    def run_python(self, *args):
+        env = {**os.environ, "DEBUG": "False", "POOL_WARM_UP": "False",
+               "POOL_SCORING_BACKEND": "snapshot",
+               "DJANGO_SETTINGS_MODULE": "django_project.settings"}
+        result = subprocess.run(
+            [sys.executable, *args], cwd=settings.BASE_DIR, env=env,
+            capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        return result
+
+    def test_loading_the_application_defers_heavy_imports(self):
+        result = self.run_python("-c", PROBE % DEFERRED)
+        self.assertEqual(json.loads(result.stdout), [])
+
+    def test_imports_stay_within_the_budget(self):
+        result = self.run_python(
+            "-X", "importtime", "-c",
+            "import django; django.setup(); import django_project.wsgi")
+        packages = {}
+        for line in result.stderr.splitlines():
+            match = IMPORT_LINE.match(line)
+            if match:
+                package = match.group(4).split(".")[0]
+                packages[package] = (packages.get(package, 0)
+                                     + int(match.group(1)) / 1000)
+        self.assertIn("django", packages)
+        slowest = sorted(packages.items(), key=lambda item: -item[1])[:10]
+        self.assertLessEqual(
+            sum(packages.values()), settings.POOL_STARTUP_BUDGET_MS,
+            "Slowest packages: " + ", ".join(
+                f"{name} {ms:.0f} ms" for name, ms in slowest))
@@ -0,0 +1,73 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from pool import snapshot
+from pool.management.commands.benchmark_pool import seed_benchmark_data
+from pool.models import Game, Season, WeekReveal, WeekWindow
+from pool.views import DashboardView
+
+
+class WeekSummaryRevealTests(TestCase):
+    """The group sees a pick once its game kicks off, not before."""
+
+    def setUp(self):
+        snapshot._snapshots.clear()
+        self.users, _ = seed_benchmark_data(3, 2)
+        self.season = Season.objects.get()
+        self.games = list(Game.objects.filter(week=2).order_by("game_time"))
+
+    def kick_off_first_game(self):
+        """The Thursday game: the week's picks close, its other games stay open."""
+        first = self.games[0]
+        first.game_time = timezone.now() - timedelta(hours=1)
+        first.save()
+        WeekWindow.generate(self.season)
+        return first
+
+    def summaries(self):
+        return {summary["week"]: summary for summary in
+                DashboardView().get_all_weeks_game_picks_summary(self.season)}
+
+    def shown_games(self, summary):
+        """Ids of the games whose picks the summary shows."""
+        return {pick.game.id for row in summary["summary"]
+                for pick in row["picks"] if pick}
+
+    def test_a_week_with_no_kickoffs_is_hidden(self):
+        summaries = self.summaries()
+        self.assertNotIn(2, summaries)
+        self.assertEqual(len(self.shown_games(summaries[1])), 16)
+
+    def test_the_reveal_shows_only_games_that_kicked_off(self):
+        first = self.kick_off_first_game()
+        summary = self.summaries()[2]
+
+        self.assertTrue(WeekReveal.objects.filter(week=2).exists())
+        self.assertEqual(self.shown_games(summary), {first.pk})
+        counts = {game.id: game.pick_counts for game in summary["games"]}
+        self.assertEqual(sum(counts.pop(first.pk)), len(self.users))
+        self.assertEqual(set(counts.values()), {None})
+
+    def test_the_scored_week_shows_only_games_that_kicked_off(self):
+        first = self.kick_off_first_game()
+        first.winner = first.home_team
+        first.save()
+        summary = self.summaries()[2]
+
+        self.assertEqual(self.shown_games(summary), {first.pk})
+        self.assertEqual(
+            [row["points_earned"] for row in summary["summary"]],
+            [first.points if row["picks"][0].picked_team_id == first.home_team_id
+             else 0 for row in summary["summary"]])
+
+    def test_the_stored_summaries_keep_every_pick(self):
+        self.kick_off_first_game()
+        self.summaries()
+        view = DashboardView()
+        view.stale_results = []
+        stored = {summary["week"]: summary for summary in
+                  view.get_stored_result(self.season, "week_summaries",
+                                         lambda: None)}
+        self.assertEqual(len(self.shown_games(stored[2])), 16)
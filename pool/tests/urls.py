@@ -0,0 +1,6 @@
+from django.urls import include, path
+
+from django_project import urls as project_urls
+
+# The pool's pages are not mounted in the off season; the tests need them
+urlpatterns = [path("", include("pool.urls"))] + project_urls.urlpatterns
@@ -1,9 +1,10 @@
 from django.urls import path
-from .views import PickView, DashboardView
+from .views import PickView, DashboardView, SeasonArchiveView
 
 
 urlpatterns = [
     path("", DashboardView.as_view(), name="dashboard"),
     path('picks/week/<int:week>/', PickView.as_view(), name="make_picks"),
+    path('seasons/<int:year>/', SeasonArchiveView.as_view(), name="season_archive"),
 
 ]
\ No newline at end of file
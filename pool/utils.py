@@ -1,47 +1,90 @@
-from datetime import datetime, time, timedelta, timezone as dt_timezone
-import pytz
+from bisect import bisect_right
+
+from django.core.cache import cache
 from django.utils import timezone
-from django.db.models import Min, Max
-from .models import Game, PoolSettings
+from .models import PoolSettings, Season, WeekWindow
+from .snapshot import get_snapshot
+
+CURRENT_SEASON_CACHE_KEY = "pool:current_season"
+POOL_SETTINGS_CACHE_KEY = "pool:settings"
+WEEK_WINDOWS_CACHE_KEY = "pool:week_windows:{}"
+_MISSING = object()
+
+
+def get_current_season():
+    """
+    The season the site reads and writes, or None before one is created
+    or once it is archived (archived seasons are served from their
+    archive file).
+
+    Cached briefly since every request needs it; Season.save() clears the
+    cache in this process.
+    """
+    season = cache.get(CURRENT_SEASON_CACHE_KEY, _MISSING)
+    if season is _MISSING:
+        season = Season.objects.filter(is_current=True,
+                                       is_archived=False).first()
+        cache.set(CURRENT_SEASON_CACHE_KEY, season, 60)
+    return season
+
 
-def get_week_info():
-    now = timezone.now()
+def clear_current_season_cache():
+    cache.delete(CURRENT_SEASON_CACHE_KEY)
 
-    eastern = pytz.timezone('US/Eastern')
-    now_eastern = now.astimezone(eastern)
 
-    # Find most recent Tuesday 2 AM Eastern
-    days_since_tuesday = (now_eastern.weekday() - 1) % 7  # Tuesday = 1
-    last_tuesday_date = (now_eastern - timedelta(days=days_since_tuesday)).date()
-    week_start_naive = datetime.combine(last_tuesday_date, time(2, 0))
-    week_start = eastern.localize(week_start_naive).astimezone(dt_timezone.utc)
+def get_week_windows(season):
+    """
+    A season's week windows as (opens_at timestamps, rows), sorted by
+    opens_at, where each row is (week, phase, opens_at, closes_at, ends_at).
 
-    week_end = week_start + timedelta(days=7)
+    Cached since every request looks up the current week; WeekWindow saves
+    and WeekWindow.generate() clear it.
+    """
+    if season is None:
+        return [], []
+    key = WEEK_WINDOWS_CACHE_KEY.format(season.pk)
+    windows = cache.get(key)
+    if windows is None:
+        rows = list(
+            WeekWindow.objects.filter(season=season).order_by("opens_at")
+            .values_list("week", "phase", "opens_at", "closes_at", "ends_at")
+        )
+        windows = ([row[2].timestamp() for row in rows], rows)
+        cache.set(key, windows, 300)
+    return windows
 
-    # Pick window -- correct value: timedelta(days=2)
-    pick_open = week_start
-    pick_close = eastern.localize(
-        # Close pick window at 8pm Eastern on Thursday -- Normal
-        # datetime.combine(last_tuesday_date + timedelta(days=2), time(13, 0))
 
-        # close pick window at 6pm on Sunday (Superbowl)
-        datetime.combine(last_tuesday_date + timedelta(days=5), time(18, 00))
+def clear_week_windows_cache(season_id):
+    cache.delete(WEEK_WINDOWS_CACHE_KEY.format(season_id))
 
-    ).astimezone(dt_timezone.utc)
 
-    current_game_week = (
-        Game.objects
-        .filter(game_time__gte=week_start, game_time__lt=week_end)
-        .values_list('week', flat=True)
-        .first()
-    )
+def get_week_info(now=None):
+    """
+    The current week of the current season and its pick window.
 
-    if current_game_week is None:
-        current_game_week = 1
+    Before the first window this is week 1; after the season it stays on
+    the last week with picks closed.
+    """
+    now = now or timezone.now()
+    opens, rows = get_week_windows(get_current_season())
+    if not rows:
+        return {
+            'week': 1,
+            'phase': WeekWindow.REGULAR,
+            'week_start': None,
+            'week_end': None,
+            'pick_open': None,
+            'pick_close': None,
+            'is_pick_open': False,
+            'is_pick_closed': False,
+        }
 
+    i = min(max(bisect_right(opens, now.timestamp()) - 1, 0), len(rows) - 1)
+    week, phase, pick_open, pick_close, week_end = rows[i]
     return {
-        'week': current_game_week,
-        'week_start': week_start,
+        'week': week,
+        'phase': phase,
+        'week_start': pick_open,
         'week_end': week_end,
         'pick_open': pick_open,
         'pick_close': pick_close,
@@ -49,5 +92,32 @@ def get_week_info():
         'is_pick_closed': now >= pick_close,
     }
 
+def get_locked_games(season, now=None):
+    """
+    Ids of the season's games that have kicked off and take no more picks,
+    or none while the pick window is switched off in PoolSettings.
+
+    One bisect over the season snapshot's kickoff index, which can be up to
+    POOL_SNAPSHOT_MAX_AGE behind. Saving a pick must check the game's own
+    game_time as well.
+    """
+    if season is None or not get_pool_settings().enforce_pick_window:
+        return frozenset()
+    return get_snapshot(season).started_games(now or timezone.now())
+
+
 def get_pool_settings():
-    return PoolSettings.objects.first() or PoolSettings(enforce_pick_window=True)
\ No newline at end of file
+    """
+    The PoolSettings row, or unsaved defaults. Cached like the current
+    season; PoolSettings.save() clears the cache in this process.
+    """
+    pool_settings = cache.get(POOL_SETTINGS_CACHE_KEY)
+    if pool_settings is None:
+        pool_settings = (PoolSettings.objects.first()
+                         or PoolSettings(enforce_pick_window=True))
+        cache.set(POOL_SETTINGS_CACHE_KEY, pool_settings, 60)
+    return pool_settings
+
+
+def clear_pool_settings_cache():
+    cache.delete(POOL_SETTINGS_CACHE_KEY)
\ No newline at end of file
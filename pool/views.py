@@ -1,25 +1,35 @@
 # pool/views.py
 # Lines 84-88 control enforcement of pick window
+import copy
+import logging
+
 from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth import get_user_model
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.db.models import Count
+from django.http import Http404
 from django.shortcuts import render, redirect
 from django.utils import timezone
 from django.views import View
 from django.views.generic import TemplateView
 from django.core.mail import send_mail
+from pool.archive import load_season_archive
 from pool.forms import PickFormSet
-from pool.models import Game, Pick
-from pool.utils import get_week_info, get_pool_settings
+from pool.models import Game, Pick, Season, WarmResult, WeekReveal
+from pool.scoring import rank_rows, score_week
+from pool.snapshot import get_snapshot
+from pool.utils import (get_week_info, get_pool_settings, get_current_season,
+                        get_locked_games, get_week_windows)
+
+logger = logging.getLogger(__name__)
 
 
 class PickView(LoginRequiredMixin, View):
     template_name = 'pool/make_picks.html'
 
     def get_games(self, week):
-        return Game.objects.filter(week=week).order_by('game_time')
+        return Game.objects.filter(season=get_current_season(),
+                                   week=week).order_by('game_time')
 
     def get_initial_data(self, games, user):
         """Pre-fill picks if the user has already made them — single query version."""
@@ -38,35 +48,36 @@ class PickView(LoginRequiredMixin, View):
 
     def get(self, request, week):
         games = self.get_games(week)
+        locked = get_locked_games(get_current_season())
         formset = PickFormSet(games=games, initial=self.get_initial_data(games,
-                                                                         request.user))
+                                                                         request.user),
+                              locked=locked)
+        is_pick_open = any(game.id not in locked for game in games)
         return render(request, self.template_name,
-                      {'formset': formset, 'week': week, 'games': games})
+                      {'formset': formset, 'week': week, 'games': games,
+                       'is_pick_open': is_pick_open})
 
     def post(self, request, week):
-        print("POST reached PickView.post")
+        logger.debug("POST reached PickView.post")
 
-        games = self.get_games(week)
-        formset = PickFormSet(request.POST, games=games)
+        games = list(self.get_games(week))
+        # Lock from the rows just read, not the cached kickoff index
+        now = timezone.now()
+        locked = frozenset(game.id for game in games if game.game_time <= now)
+        formset = PickFormSet(request.POST, games=games, locked=locked)
 
 
         pick_list=[]
         if formset.is_valid():
-            for form, game in zip(formset.forms, games):
-                picked_team = form.cleaned_data.get('picked_team')
-                if picked_team:
-                    # Prevent picking after start time
-                    if timezone.now() < game.game_time:
-                        Pick.objects.update_or_create(
-                            user=request.user,
-                            game=game,
-                            defaults={'picked_team': picked_team}
-                        )
-                        pick_list.append({'game': game, 'picked_team': picked_team})
+            # Pick.submit skips games that kick off before the write
+            pick_list = Pick.submit(request.user, [
+                (game, form.cleaned_data['picked_team'])
+                for form, game in zip(formset.forms, games)
+                if form.cleaned_data.get('picked_team')
+            ])
 
             messages.success(request, 'Your picks have been saved.')
-            print("Adding success message")
-            print(pick_list, flush=True)
+            logger.debug("Saved picks for %s: %s", request.user, pick_list)
             return redirect('make_picks', week=week)
         else:
             messages.error(request, "You must make a pick for every game.")
@@ -80,6 +91,8 @@ User = get_user_model()
 
 class DashboardView(LoginRequiredMixin, TemplateView):
     template_name = 'pool/dashboard.html'
+    result_labels = {"standings": "season standings",
+                     "week_summaries": "weekly results"}
 
     # ------------------------
     # Context helpers
@@ -96,9 +109,9 @@ class DashboardView(LoginRequiredMixin, TemplateView):
         if not settings.enforce_pick_window:
             week_info['is_pick_open'] = True
             week_info['is_pick_closed'] = False
-            print("Pick Window NOT enforced")
+            logger.debug("Pick Window NOT enforced")
         else:
-            print("Pick Window enforced")
+            logger.debug("Pick Window enforced")
 
         if week_info:
             context['current_week'] = week_info['week']
@@ -113,14 +126,24 @@ class DashboardView(LoginRequiredMixin, TemplateView):
             context['is_pick_open'] = True
             context['is_pick_closed'] = False
 
+        # Games lock one at a time at kickoff; the form stays open while any
+        # of its games has not started.
+        if 'games' in kwargs:
+            locked = kwargs.get('locked_games', frozenset())
+            context['is_pick_open'] = any(
+                game.id not in locked for game in kwargs['games'])
+            context['is_pick_closed'] = not context['is_pick_open']
+
+        season = get_current_season()
+
         # --- This Week's Games ---
         context['current_week_games'] = Game.objects.filter(
-            week=context['current_week']
+            season=season, week=context['current_week']
         ).order_by('game_time')
 
         # --- Past Picks ---
         past_picks = (
-            Pick.objects.filter(user=self.request.user,
+            Pick.objects.filter(user=self.request.user, season=season,
                                 game__game_time__lt=timezone.now())
             .select_related('game', 'picked_team', 'game__home_team',
                             'game__away_team', 'game__winner')
@@ -132,101 +155,83 @@ class DashboardView(LoginRequiredMixin, TemplateView):
         # --- Weekly Picks (All Users) ---
         week_info = get_week_info()
 
+        self.stale_results = []
         context[
-            'all_weeks_game_summary'] = self.get_all_weeks_game_picks_summary()
+            'all_weeks_game_summary'] = self.get_all_weeks_game_picks_summary(
+            allow_stale=True)
 
         # --- Optional stubs ---
-        overall_standings = self.get_overall_standings()
+        overall_standings = self.get_overall_standings(allow_stale=True)
         context['standings'] = overall_standings['standings']
         context['weeks'] = overall_standings['weeks']
+        context['stale_results'] = self.stale_results
 
         return context
 
+    def get_season_snapshot(self, season):
+        """The shared in-memory season, if the read paths are set to use it."""
+        if season is None or settings.POOL_SCORING_BACKEND != "snapshot":
+            return None
+        return get_snapshot(season)
+
     def get_weekly_picks(self, week):
         """
         Returns all picks for the given week with user/game info.
         """
         return (
-            Pick.objects.filter(game__week=week)
+            Pick.objects.filter(season=get_current_season(), week=week)
             .select_related('user', 'picked_team', 'game', 'game__home_team',
                             'game__away_team', 'game__winner')
             .order_by('user__username', 'game__game_time')
         )
 
-    def get_overall_standings(self):
-        # UNIQUE_BONUS = 2  # keep in sync with your rules
-        # PERFECT_WEEK_BONUS = 3
-
-        # Playoffs -- no bonuses
-        UNIQUE_BONUS = 0  # keep in sync with your rules
-        PERFECT_WEEK_BONUS = 0
-
+    def get_stored_result(self, season, name, compute, allow_stale=False):
+        """
+        A WarmResult. With allow_stale, the last result may be served while
+        it is recomputed in the background; it is noted in stale_results.
+        """
+        if not allow_stale:
+            return WarmResult.get_or_compute(season, name, compute)
+        value, freshness = WarmResult.get_or_revalidate(season, name, compute)
+        if freshness['stale']:
+            self.stale_results.append(
+                {"name": name, "label": self.result_labels[name], **freshness})
+        return value
+
+    def get_overall_standings(self, season=None, allow_stale=False):
+        season = season or get_current_season()
+        if season is None:
+            return self.compute_overall_standings(season)
+        return self.get_stored_result(
+            season, "standings",
+            lambda: self.compute_overall_standings(season), allow_stale)
+
+    def compute_overall_standings(self, season):
         User = get_user_model()
         users = list(User.objects.all())
-        user_ids = [u.id for u in users]
 
-        weeks = list(
-            Game.objects.values_list('week', flat=True).distinct().order_by(
-                'week')
-        )
+        snapshot = self.get_season_snapshot(season)
+        if snapshot:
+            weeks = snapshot.weeks()
+        else:
+            weeks = list(
+                Game.objects.filter(season=season)
+                .values_list('week', flat=True).distinct().order_by('week')
+            )
 
         # Per-user weekly totals will be accumulated here in week order
         per_user_weekly = {u.id: [] for u in users}
 
         for week in weeks:
-            games = list(
-                Game.objects.filter(week=week).select_related("winner"))
-            if not games:
-                # still push 0 for every user to keep column counts aligned
-                for uid in user_ids:
-                    per_user_weekly[uid].append(0)
-                continue
-
-            game_ids = [g.id for g in games]
-            games_count = len(games)
-
-            # All picks for this week in one query
-            picks_qs = (
-                Pick.objects
-                .filter(game_id__in=game_ids)
-                .select_related("user", "game", "game__winner")
-            )
-            picks = list(picks_qs)
-
-            # Build a set of (game_id, picked_team_id) that are unique across all users
-            # (We do not filter by correctness here; we check correctness when awarding.)
-            uniques = (
-                picks_qs.values("game_id", "picked_team_id")
-                .annotate(cnt=Count("id"))
-                .filter(cnt=1)
-            )
-            unique_set = {(u["game_id"], u["picked_team_id"]) for u in uniques}
-
-            # Compute weekly totals per user
-            week_totals = {uid: 0 for uid in user_ids}
-            wins_count = {uid: 0 for uid in user_ids}
-
-            for p in picks:
-                correct = (
-                        p.picked_team_id == p.game.winner_id and p.game.winner_id is not None)
-                base = p.game.points if correct else 0
-                unique_bonus = UNIQUE_BONUS if correct and (p.game_id,
-                    p.picked_team_id) in unique_set else 0
-                week_totals[p.user_id] += base + unique_bonus
-                if correct:
-                    wins_count[p.user_id] += 1
-
-            # Perfect week bonus: only when every game has a winner and the user got them all right
-            # (wins == number of games in the week)
-            all_winners_set = all(g.winner_id is not None for g in games)
-            if all_winners_set:
-                for uid in user_ids:
-                    if wins_count[uid] == games_count and games_count > 0:
-                        week_totals[uid] += PERFECT_WEEK_BONUS
+            if snapshot:
+                games = snapshot.games_for_week(week)
+            else:
+                games = list(Game.objects.filter(season=season, week=week))
+            score = score_week(season, week, games)
 
             # Append this week's total to each user's ledger
-            for uid in user_ids:
-                per_user_weekly[uid].append(week_totals[uid])
+            for uid in per_user_weekly:
+                per_user_weekly[uid].append(score.points.get(uid, 0))
 
         # Build standings rows
         standings = []
@@ -239,19 +244,7 @@ class DashboardView(LoginRequiredMixin, TemplateView):
                 "total_points": total_points,
             })
 
-        # Sort descending by total points
-        standings.sort(key=lambda r: r["total_points"], reverse=True)
-
-        # 1224-style ranking
-        last_points = None
-        last_rank = 0
-        for i, row in enumerate(standings, start=1):
-            if row["total_points"] != last_points:
-                row["rank"] = i
-                last_rank = i
-                last_points = row["total_points"]
-            else:
-                row["rank"] = last_rank
+        rank_rows(standings, "total_points")
 
         return {
             "weeks": weeks,
@@ -264,35 +257,42 @@ class DashboardView(LoginRequiredMixin, TemplateView):
     def get(self, request, *args, **kwargs):
         week_info = get_week_info()
         week = int(kwargs.get('week', week_info['week'] if week_info else 1))
-        games = Game.objects.filter(week=week).order_by('game_time')
+        season = get_current_season()
+        games = Game.objects.filter(season=season,
+                                    week=week).order_by('game_time')
+        locked = get_locked_games(season)
         formset = PickFormSet(
             games=games,
-            initial=self.get_initial_picks(games, request.user)
+            initial=self.get_initial_picks(games, request.user),
+            locked=locked,
         )
 
         context = self.get_context_data(
             week=week,
             formset=formset,
-            games=games
+            games=games,
+            locked_games=locked,
         )
         return self.render_to_response(context)
 
     def post(self, request, *args, **kwargs):
         week = int(kwargs.get('week', get_week_info()['week']))
-        games = Game.objects.filter(week=week).order_by('game_time')
-        formset = PickFormSet(request.POST, games=games)
+        season = get_current_season()
+        games = list(Game.objects.filter(season=season,
+                                         week=week).order_by('game_time'))
+        # Lock from the rows just read rather than the cached kickoff index,
+        # so a stale index can never let a pick in after kickoff
+        now = timezone.now()
+        locked = frozenset(game.id for game in games if game.game_time <= now)
+        formset = PickFormSet(request.POST, games=games, locked=locked)
 
         if formset.is_valid():
-            pick_list = []
-            for form, game in zip(formset.forms, games):
-                picked_team = form.cleaned_data.get('picked_team')
-                if picked_team and timezone.now() < game.game_time:
-                    Pick.objects.update_or_create(
-                        user=request.user,
-                        game=game,
-                        defaults={'picked_team': picked_team}
-                    )
-                    pick_list.append((game, picked_team))
+            # Pick.submit skips games that kick off before the write
+            Pick.submit(request.user, [
+                (game, form.cleaned_data['picked_team'])
+                for form, game in zip(formset.forms, games)
+                if form.cleaned_data.get('picked_team')
+            ])
             messages.success(request, 'Your picks have been saved.')
 
             # if "send_email" in request.POST:
@@ -314,7 +314,8 @@ class DashboardView(LoginRequiredMixin, TemplateView):
 
                 # Always get the latest picks from the DB
                 user_picks = Pick.objects.filter(user=request.user,
-                                                 game__week=week).select_related(
+                                                 season=season,
+                                                 week=week).select_related(
                     "game")
 
                 email_body = ""
@@ -335,7 +336,8 @@ class DashboardView(LoginRequiredMixin, TemplateView):
         context = self.get_context_data(
             week=week,
             formset=formset,
-            games=games
+            games=games,
+            locked_games=locked,
         )
         return self.render_to_response(context)
 
@@ -352,93 +354,128 @@ class DashboardView(LoginRequiredMixin, TemplateView):
             for game in games
         ]
 
-    def get_all_weeks_game_picks_summary(self):
+    def get_all_weeks_game_picks_summary(self, season=None,
+                                         allow_stale=False):
+        season = season or get_current_season()
+        if season is None:
+            return self.compute_week_summaries(season)
+        all_summaries = self.get_stored_result(
+            season, "week_summaries",
+            lambda: self.compute_week_summaries(season), allow_stale)
+
+        # Picks stay hidden from the group until their game kicks off. The
+        # week's picks close at its first kickoff, but its later games still
+        # take picks, so this goes game by game. The stored summaries hold
+        # every pick; they are hidden here, at read time.
+        started = get_snapshot(season).started_games(timezone.now())
+        return self.hide_unstarted_picks(all_summaries, started)
+
+    def hide_unstarted_picks(self, all_summaries, started):
+        """
+        The summaries with the picks on games not in `started` left out,
+        along with their pick counts. A week none of whose games has
+        started is left out altogether. The stored summaries are not changed.
+        """
+        shown = []
+        for week_summary in all_summaries:
+            hidden = [game.id not in started for game in week_summary["games"]]
+            if not any(hidden):
+                shown.append(week_summary)
+                continue
+            if all(hidden):
+                continue
+
+            games = []
+            for game, hide in zip(week_summary["games"], hidden):
+                if hide and getattr(game, "pick_counts", None):
+                    game = copy.copy(game)
+                    game.pick_counts = None
+                games.append(game)
+            summary = [
+                {**row, "picks": [None if hide else pick
+                                  for pick, hide in zip(row["picks"], hidden)]}
+                for row in week_summary["summary"]
+            ]
+            shown.append({**week_summary, "games": games, "summary": summary})
+        return shown
+
+    def compute_week_summaries(self, season):
+        """Every week's results with picks, newest first."""
+        # The bonus-point fix-ups are one data_version bump, not one per pick
+        with Season.batch_changes():
+            return self.summarize_weeks(season)
+
+    def summarize_weeks(self, season):
         users = User.objects.all()
+        snapshot = self.get_season_snapshot(season)
 
         # Grab all distinct weeks, descending
-        weeks = Game.objects.values_list("week", flat=True).distinct().order_by(
-            "-week")
+        if snapshot:
+            weeks = snapshot.weeks()[::-1]
+        else:
+            weeks = Game.objects.filter(season=season).values_list(
+                "week", flat=True).distinct().order_by("-week")
 
         all_summaries = []
 
-        for week in weeks:
-            games = Game.objects.filter(week=week).select_related(
-                "home_team", "away_team", "winner"
-            ).order_by("game_time")
+        # Weeks whose picks have closed but that have no results yet are
+        # shown from their frozen WeekReveal, without scoring
+        reveals = {reveal.week: reveal for reveal in
+                   WeekReveal.objects.filter(season=season)}
+        now = timezone.now()
+        closed = {row[0] for row in get_week_windows(season)[1]
+                  if row[3] <= now}
 
-            if not Pick.objects.filter(game__in=games).exists():
+        for week in weeks:
+            if snapshot:
+                games = snapshot.games_for_week(week)
+            else:
+                games = list(Game.objects.filter(season=season, week=week).select_related(
+                    "home_team", "away_team", "winner"
+                ).order_by("game_time"))
+
+            if not any(game.winner_id for game in games) and (
+                    week in reveals or week in closed):
+                reveal = reveals.get(week) or WeekReveal.freeze(season.pk, week)
+                week_summary = self.get_reveal_summary(reveal, games, users,
+                                                       week)
+                if week_summary:
+                    all_summaries.append(week_summary)
                 continue
 
-            week_summary = []
-
-            # --- Precompute uniqueness ---
-            unique_map = (
-                Pick.objects.filter(game__in=games)
-                .values("game_id", "picked_team_id")
-                .annotate(count=Count("id"))
-                .filter(count=1)
-            )
-            unique_set = {(u["game_id"], u["picked_team_id"]) for u in
-                unique_map}
-
-            for user in users:
-                picks = Pick.objects.filter(user=user,
-                                            game__in=games).select_related(
-                    "picked_team", "game", "game__winner"
+            if snapshot:
+                picks = snapshot.picks_for_week(week, games)
+            else:
+                picks = list(
+                    Pick.objects.filter(season=season, week=week).select_related(
+                        "picked_team", "game", "game__winner")
                 )
-                picks_by_game = {pick.game_id: pick for pick in picks}
-
-                # --- Recompute points per pick ---
-                earned_points = 0
-                wins = 0
-
-                for pick in picks:
-                    # Base points
-                    base = pick.game.points if pick.picked_team_id == pick.game.winner_id else 0
-                    if base > 0:
-                        wins += 1
-
-                    # Unique bonus (only if pick is correct and unique)
-                    # unique_bonus = 2 if (pick.game_id,
-                    #     pick.picked_team_id) in unique_set and base > 0 else 0
-
-                    # Playoffs - No bonuses
-                    unique_bonus = 0 if (pick.game_id,
-                        pick.picked_team_id) in unique_set and base > 0 else 0
-
-                    # Update Pick.bonus_points if it differs
-                    if pick.bonus_points != unique_bonus:
-                        pick.bonus_points = unique_bonus
-                        pick.save(update_fields=["bonus_points"])
-
-                    earned_points += base + unique_bonus
-
-                # Perfect week bonus
-                # perfect_week_bonus = 3 if wins and wins == len(games) else 0
+            if not picks:
+                continue
 
-                # Playoffs - No bonuses
-                perfect_week_bonus = 0 if wins and wins == len(games) else 0
+            score = score_week(season, week, games)
+            picks_by_user = {}
+            for pick in picks:
+                picks_by_user.setdefault(pick.user_id, {})[pick.game_id] = pick
 
-                earned_points += perfect_week_bonus
+                # Update Pick.bonus_points if it differs
+                unique_bonus = score.pick_bonus(pick.game, pick.picked_team_id)
+                if pick.bonus_points != unique_bonus:
+                    pick.bonus_points = unique_bonus
+                    pick.save(update_fields=["bonus_points"])
 
+            week_summary = []
+            for user in users:
+                picks_by_game = picks_by_user.get(user.id, {})
                 week_summary.append({
                     "user": user,
                     "picks": [picks_by_game.get(game.id) for game in games],
-                    "points_earned": earned_points,
+                    "points_earned": score.points.get(user.id, 0),
                     "week": week,
-                    "perfect_week": bool(perfect_week_bonus),
+                    "perfect_week": bool(score.perfect_week_bonus(user.id)),
                 })
 
-            # Sort & rank
-            week_summary.sort(key=lambda r: r["points_earned"], reverse=True)
-
-            current_rank = 0
-            last_points = None
-            for idx, row in enumerate(week_summary, start=1):
-                if row["points_earned"] != last_points:
-                    current_rank = idx
-                    last_points = row["points_earned"]
-                row["rank"] = current_rank
+            rank_rows(week_summary, "points_earned")
 
             all_summaries.append({
                 "week": week,
@@ -446,24 +483,45 @@ class DashboardView(LoginRequiredMixin, TemplateView):
                 "summary": week_summary,
             })
 
-        # prevents current week picks from being visible to group while pick
-        # window is open. If the pick window is open and the first item in
-        # all_summaries has the same week as the current week,
-        # then all_summaries[1:] are shown, so the current week is hidden.
-        # But when the pick window closes, the conditional fails and
-        # all_summaries are displayed.
+        return all_summaries
 
-        week_info = get_week_info()
-        # print((week_info['week'] == all_summaries[0]['week']) and week_info[
-        #     'is_pick_open'])
-        # if week_info['is_pick_open'] and week_info['week'] == all_summaries[0]['week']:
-        #     return all_summaries[1:]
-
-        if (
-                all_summaries
-                and week_info['is_pick_open']
-                and week_info['week'] == all_summaries[0]['week']
-        ):
-            return all_summaries[1:]
+    def get_reveal_summary(self, reveal, games, users, week):
+        """A week's summary from its frozen picks: everyone on 0 points."""
+        picks_by_user = reveal.picks_by_user(games)
+        if not any(picks_by_user.values()):
+            return None
+        pick_counts = reveal.pick_counts()
+        for game in games:
+            game.pick_counts = pick_counts.get(game.id)
+
+        week_summary = []
+        for user in users:
+            picks_by_game = picks_by_user.get(user.id, {})
+            week_summary.append({
+                "user": user,
+                "picks": [picks_by_game.get(game.id) for game in games],
+                "points_earned": 0,
+                "week": week,
+                "perfect_week": False,
+            })
+        rank_rows(week_summary, "points_earned")
+        return {"week": week, "games": games, "summary": week_summary}
 
-        return all_summaries
+
+class SeasonArchiveView(LoginRequiredMixin, TemplateView):
+    """Standings and weekly results of an archived season, read from its file."""
+    template_name = 'pool/season_archive.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        try:
+            archive = load_season_archive(self.kwargs['year'])
+        except FileNotFoundError:
+            raise Http404("No archive for that season.")
+
+        standings = archive.standings()
+        context['season'] = archive
+        context['standings'] = standings['standings']
+        context['weeks'] = standings['weeks']
+        context['all_weeks_game_summary'] = archive.week_summaries()
+        return context
@@ -0,0 +1,57 @@
+# pool/warmup.py
+"""
+Primes a worker's caches before it takes traffic, so the first visitor
+after a scale-to-zero start does not pay for them. Called from
+django_project/wsgi.py; with gunicorn's preload_app it runs once in the
+master and the forked workers inherit the warm caches.
+"""
+import logging
+import time
+
+from django.db import connections
+from django.template.loader import get_template
+from django.urls import get_resolver
+
+from .snapshot import get_snapshot
+from .utils import get_current_season, get_pool_settings, get_week_info
+
+logger = logging.getLogger("pool.warmup")
+
+TEMPLATES = ("pool/dashboard.html", "pool/make_picks.html")
+
+
+def load_standings():
+    """The current season's snapshot, which the standings are built from."""
+    season = get_current_season()
+    if season is not None:
+        get_snapshot(season)
+
+
+def warm_up():
+    """Run each step, log how long it took, and return the timings in ms."""
+    timings = {}
+
+    def step(name, func):
+        start = time.perf_counter()
+        try:
+            func()
+        except Exception:
+            logger.warning("Warm-up step %s failed", name, exc_info=True)
+        timings[name] = round((time.perf_counter() - start) * 1000, 1)
+
+    step("urls", lambda: get_resolver().url_patterns)
+    step("templates", lambda: [get_template(name) for name in TEMPLATES])
+    step("pool_settings", get_pool_settings)
+    step("week_info", get_week_info)
+    step("standings", load_standings)
+
+    # Never hand an open connection (or a psycopg pool and its threads)
+    # across fork() to the workers
+    for conn in connections.all(initialized_only=True):
+        conn.close()
+        if hasattr(conn, "close_pool"):
+            conn.close_pool()
+
+    logger.info("Warm-up: %s", ", ".join(
+        f"{name} {ms:.0f} ms" for name, ms in timings.items()))
+    return timings